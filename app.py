@@ -2,20 +2,34 @@
 # Entry point for the Streamlit app. Orchestrates the flow using modular helpers.
 
 import streamlit as st
-from contextlib import suppress
+from contextlib import nullcontext, suppress
 
 # Local modules now under the package
-from interactive_pdf_qa.config import load_env
-from interactive_pdf_qa.resources import get_embeddings, get_llm
-from interactive_pdf_qa.pdf_utils import save_uploaded_pdfs, load_documents_from_pdfs, split_documents
+from interactive_pdf_qa.config import (
+    load_env,
+    CONTEXT_PACKING,
+    EMBED_WARMUP,
+    TRACE_ENABLED,
+    PDF_BRANCH_TIMEOUT_SECONDS,
+    WEB_BRANCH_TIMEOUT_SECONDS,
+)
+from interactive_pdf_qa.resources import get_embeddings, get_llm, get_reranker, warm_up_embeddings
+from interactive_pdf_qa.fingerprint import hash_uploads
 from interactive_pdf_qa.rag import (
-    build_retriever,
     build_contextualize_prompt,
     build_qa_prompt,
-    build_history_aware_retriever,
+    build_question_rewriter,
     build_rag_chain,
 )
-from interactive_pdf_qa.history import ensure_store, get_session_history, build_conversational_chain
+from interactive_pdf_qa.answer_cache import SemanticAnswerCache
+from interactive_pdf_qa.context_packing import ContextPacker, collect_pack_stats
+from interactive_pdf_qa.rewrite_gate import RewriteGate
+from interactive_pdf_qa.history import (
+    build_conversational_chain,
+    default_session_id,
+    ensure_store,
+    get_session_history,
+)
 from interactive_pdf_qa.ui import (
     render_header,
     render_api_key_input,
@@ -23,14 +37,27 @@ from interactive_pdf_qa.ui import (
     render_file_uploader,
     render_question_input,
     render_agent_toggle,
+    render_ingest_progress,
+    render_cache_metrics,
+    render_rewrite_stats,
+    render_branch_notes,
+    render_stream_toggle,
+    render_latency,
+    render_prompt_tokens,
+    render_trace_toggle,
+    render_trace_panel,
+    with_script_run_ctx,
 )
 
 # New modular helpers
-from interactive_pdf_qa.agents import build_web_agent, compute_index_sig, compute_agent_sig
-from interactive_pdf_qa.synthesis import synthesize_combined_answer
+from interactive_pdf_qa.agents import compute_index_sig, compute_agent_sig
+from interactive_pdf_qa.synthesis import synthesize_combined_answer, stream_combined_answer
+from interactive_pdf_qa.streaming import StreamTimer, answer_chunks
+from interactive_pdf_qa.orchestration import run_branches
+from interactive_pdf_qa.tracing import TracingCallbackHandler, get_tracer
 
-# Keep Streamlit callback handler for agent thoughts display
-from langchain.callbacks import StreamlitCallbackHandler
+# The ingestion stack (FAISS, PDF parsing), the agent/tool stack and the Streamlit agent
+# callback handler are imported where first used, so the first page renders without them
 
 # Load environment variables
 load_env()
@@ -41,6 +68,10 @@ load_env()
 # ---------------------------
 
 def main():
+    # Load the embedding model in the background while the page renders
+    if EMBED_WARMUP:
+        warm_up_embeddings()
+
     # Header
     render_header()
 
@@ -52,15 +83,18 @@ def main():
 
     # Initialize core resources
     llm = get_llm(api_key)
-    embeddings = get_embeddings()
 
-    # Chat session id and state store
-    session_id = render_session_input()
+    # Chat session id and history backend
+    session_id = render_session_input(default_session_id())
     ensure_store()
 
     # Toggle for enabling external tools/agent
     use_tools = render_agent_toggle()
 
+    # Stage timings cost nothing unless enabled here or with PDFQA_TRACE=1
+    show_timings = render_trace_toggle(TRACE_ENABLED)
+    tracer = get_tracer()
+
     # Ingest PDFs
     uploaded_files = render_file_uploader()
 
@@ -68,21 +102,50 @@ def main():
     if not uploaded_files and "conversational_rag_chain" not in st.session_state and not use_tools:
         return
 
-    # If files uploaded, rebuild only when they change
+    # If files uploaded, stream only the changed files into the index in the background
     if uploaded_files:
-        sig = compute_index_sig(uploaded_files)
+        hash_memo = st.session_state.setdefault("upload_hashes", {})
+        sig = compute_index_sig(uploaded_files, hash_memo)
         if st.session_state.get("index_sig") != sig:
             with st.spinner("Processing documents..."):
-                pdf_paths = save_uploaded_pdfs(uploaded_files)
-                documents = load_documents_from_pdfs(pdf_paths)
-                splits = split_documents(documents)
+                from interactive_pdf_qa.index_manager import IndexManager
+                from interactive_pdf_qa.index_store import IndexStore
+                from interactive_pdf_qa.ingest import StreamingIngestor
+                from interactive_pdf_qa.pdf_utils import iter_upload_pages
+
+                embeddings = get_embeddings()
+                manager = st.session_state.get("index_manager")
+                if manager is None:
+                    manager = IndexManager(embeddings, store=IndexStore())
+                    st.session_state["index_manager"] = manager
+                previous_job = st.session_state.get("ingest_job")
+                if previous_job is not None:
+                    previous_job.cancel()
+                uploads = hash_uploads(uploaded_files, hash_memo)
+                ingest_job = StreamingIngestor(manager).start(
+                    {key: (lambda f=f: iter_upload_pages(f)) for key, f in uploads.items()}
+                )
+                st.session_state["ingest_job"] = ingest_job
 
-                # Build retriever and RAG pipeline
-                retriever = build_retriever(splits, embeddings)
+                # Build retriever and RAG pipeline (answers cover whatever is indexed so far)
+                retriever = manager.as_retriever(reranker=get_reranker())
                 contextualize_prompt = build_contextualize_prompt()
-                history_aware_retriever = build_history_aware_retriever(llm, retriever, contextualize_prompt)
+                rewrite_gate = st.session_state.setdefault("rewrite_gate", RewriteGate())
+                question_rewriter = build_question_rewriter(llm, contextualize_prompt, rewrite_gate)
                 qa_prompt = build_qa_prompt()
-                rag_chain = build_rag_chain(llm, history_aware_retriever, qa_prompt)
+                answer_cache = st.session_state.get("answer_cache")
+                if answer_cache is None:
+                    answer_cache = SemanticAnswerCache(embeddings)
+                    st.session_state["answer_cache"] = answer_cache
+                # Cached answers are dropped when the upload set changes or another PDF
+                # finishes ingesting (not on every embedded batch)
+                answer_cache.bind(lambda sig=sig, job=ingest_job: (sig, job.progress.sources_done))
+                context_packer = None
+                if CONTEXT_PACKING:
+                    context_packer = st.session_state.setdefault("context_packer", ContextPacker())
+                rag_chain = build_rag_chain(
+                    llm, question_rewriter, retriever, qa_prompt, answer_cache, context_packer
+                )
                 # Store both wrapped and unwrapped versions
                 st.session_state["rag_chain_unwrapped"] = rag_chain
                 st.session_state["conversational_rag_chain"] = build_conversational_chain(rag_chain)
@@ -90,7 +153,8 @@ def main():
                 # Clear any previous agent so it can be rebuilt with the new PDF tool
                 st.session_state.pop("web_agent", None)
                 st.session_state.pop("agent_sig", None)
-                st.success("Document index is ready.")
+
+    render_ingest_progress(st.session_state.get("ingest_job"))
 
     conversational_rag_chain = st.session_state.get("conversational_rag_chain")
 
@@ -100,6 +164,8 @@ def main():
         agent_sig = compute_agent_sig(api_key, session_id)
 
         if st.session_state.get("agent_sig") != agent_sig:
+            from interactive_pdf_qa.agents import build_web_agent
+
             st.session_state["web_agent"] = build_web_agent(llm, session_id)
             st.session_state["agent_sig"] = agent_sig
 
@@ -109,33 +175,66 @@ def main():
         return
 
     # Ask question and display answer
+    stream_answers = render_stream_toggle()
     user_input = render_question_input()
     if user_input:
-        # Tools-enabled path
-        if use_tools and st.session_state.get("web_agent") is not None:
-            with st.spinner("Thinking across PDFs and web tools..."):
-                st_cb = None
-                with suppress(Exception):
-                    st_cb = StreamlitCallbackHandler(st.container(), expand_new_thoughts=True)
-
-                # Get a PDF answer (side-effect free; do not auto-write history)
-                pdf_answer = None
-                if st.session_state.get("rag_chain_unwrapped") is not None:
-                    session_history = get_session_history(session_id)
-                    pdf_result = st.session_state["rag_chain_unwrapped"].invoke(
-                        {"input": user_input, "chat_history": session_history.messages}
-                    )
-                    pdf_answer = pdf_result.get("answer")
+        # Timings and prompt sizes are collected for this request only; other sessions
+        # are unaffected
+        trace = tracer.trace() if show_timings or tracer.enabled else nullcontext()
+        with trace as trace_id, collect_pack_stats() as pack_stats:
+            timer = StreamTimer()
+            trace_callbacks = [TracingCallbackHandler(tracer)] if trace_id is not None else []
+            # Tools-enabled path
+            if use_tools and st.session_state.get("web_agent") is not None:
+                with st.spinner("Thinking across PDFs and web tools..."):
+                    st_cb = None
+                    with suppress(Exception):
+                        # Keep Streamlit callback handler for agent thoughts display
+                        from langchain.callbacks import StreamlitCallbackHandler
 
-                # Get an answer from web tools agent
-                agent_answer = st.session_state["web_agent"].run(
-                    user_input, callbacks=[st_cb] if st_cb else None
-                )
+                        st_cb = StreamlitCallbackHandler(st.container(), expand_new_thoughts=True)
 
-                # Synthesize a single combined answer
-                final_answer = synthesize_combined_answer(
-                    llm, user_input, pdf_answer, agent_answer
-                )
+                    # PDF answer (side-effect free; do not auto-write history) and web agent
+                    # answer are independent, so run them concurrently with per-branch timeouts
+                    chat_history = get_session_history(session_id).messages
+                    rag_chain_unwrapped = st.session_state.get("rag_chain_unwrapped")
+                    web_agent = st.session_state["web_agent"]
+                    branches = {
+                        "web": lambda cbs: web_agent.run(
+                            user_input, callbacks=cbs + trace_callbacks + ([st_cb] if st_cb else [])
+                        ),
+                    }
+                    if rag_chain_unwrapped is not None:
+                        branches["pdf"] = lambda cbs: rag_chain_unwrapped.invoke(
+                            {"input": user_input, "chat_history": chat_history},
+                            config={"callbacks": cbs + trace_callbacks},
+                        ).get("answer")
+                    results = run_branches(
+                        branches,
+                        timeouts={"pdf": PDF_BRANCH_TIMEOUT_SECONDS, "web": WEB_BRANCH_TIMEOUT_SECONDS},
+                        wrap=with_script_run_ctx,
+                    )
+                    pdf_answer = results["pdf"].value if "pdf" in results and results["pdf"].ok else None
+                    agent_answer = results["web"].value if results["web"].ok else None
+                render_branch_notes(results)
+
+                # Synthesize a single combined answer from whatever finished in time
+                st.write("Assistant:")
+                if pdf_answer and agent_answer:
+                    if stream_answers:
+                        chunks = stream_combined_answer(llm, user_input, pdf_answer, agent_answer)
+                    else:
+                        chunks = [synthesize_combined_answer(llm, user_input, pdf_answer, agent_answer)]
+                else:
+                    chunks = [
+                        pdf_answer
+                        or agent_answer
+                        or "Sorry, neither the PDFs nor the web tools produced an answer in time."
+                    ]
+                # Display only the final combined answer
+                st.write_stream(timer.wrap(chunks))
+                tracer.record("request", timer.started, timer.total, mode="tools", ttft=timer.ttft)
+                final_answer = timer.text
 
                 # Always write one combined history turn for this session
                 session_history = get_session_history(session_id)
@@ -150,25 +249,31 @@ def main():
                     chat_mem.add_user_message(user_input)
                     chat_mem.add_ai_message(final_answer)
 
-                # Display only the final combined answer
-                st.write("Assistant:", final_answer)
-
-                # Optional: Inspect the raw store for debugging
-                st.write(st.session_state.store)
+                render_latency(timer)
+                render_prompt_tokens(pack_stats[-1] if pack_stats else None)
+                st.write("Chat History:", session_history.messages)
+            else:
+                # RAG-only path; the history wrapper records the turn once the stream completes
                 session_history = get_session_history(session_id)
+                chain_input = {"input": user_input}
+                chain_config = {"configurable": {"session_id": session_id}, "callbacks": trace_callbacks}
+
+                st.write("Assistant:")
+                if stream_answers:
+                    chunks = answer_chunks(conversational_rag_chain.stream(chain_input, config=chain_config))
+                else:
+                    chunks = [conversational_rag_chain.invoke(chain_input, config=chain_config)["answer"]]
+                st.write_stream(timer.wrap(chunks))
+                tracer.record("request", timer.started, timer.total, mode="rag", ttft=timer.ttft)
+                render_latency(timer)
+                render_prompt_tokens(pack_stats[-1] if pack_stats else None)
                 st.write("Chat History:", session_history.messages)
-        else:
-            # RAG-only path
-            session_history = get_session_history(session_id)
-            response = conversational_rag_chain.invoke(
-                {"input": user_input},
-                config={"configurable": {"session_id": session_id}},
-            )
-            # Optional: Inspect the raw store for debugging
-            st.write(st.session_state.store)
-
-            st.write("Assistant:", response["answer"])
-            st.write("Chat History:", session_history.messages)
+
+        if show_timings:
+            render_trace_panel(tracer, tracer.spans(trace_id=trace_id))
+
+    render_cache_metrics(st.session_state.get("answer_cache"))
+    render_rewrite_stats(st.session_state.get("rewrite_gate"))
 
 
 if __name__ == "__main__":
@@ -0,0 +1 @@
+# Benchmarks for the Interactive PDF QA pipeline (run with python -m benchmarks.<name>)
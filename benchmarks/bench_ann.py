@@ -0,0 +1,100 @@
+"""Recall vs. latency of the ANN index types against the exact flat baseline.
+
+    python -m benchmarks.bench_ann --vectors 200000 --nprobe 4 16 64 --ef-search 32 64 128
+    python -m benchmarks.bench_ann --types ivfpq --vectors 1000000
+
+Vectors are synthetic (a Gaussian mixture, so IVF cells are meaningful); recall@k is
+the fraction of the flat index's top-k ids that each index also returns.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from typing import List
+
+import faiss
+import numpy as np
+
+from interactive_pdf_qa.ann_index import build_index, choose_spec, tune
+from interactive_pdf_qa.config import HNSW_EF_SEARCH, IVF_NPROBE
+
+
+def synthetic_vectors(n: int, dim: int, clusters: int = 256, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    assignment = rng.integers(0, clusters, size=n)
+    return centers[assignment] + 0.5 * rng.normal(size=(n, dim)).astype(np.float32)
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    hits = sum(len(set(f) & set(t)) for f, t in zip(found.tolist(), truth.tolist()))
+    return hits / truth.size
+
+
+def timed_search(index: faiss.Index, queries: np.ndarray, k: int):
+    start = time.perf_counter()
+    _, labels = index.search(queries, k)
+    return labels, (time.perf_counter() - start) * 1000 / len(queries)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--types", nargs="+", default=["ivf", "hnsw", "ivfpq"])
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[IVF_NPROBE])
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[HNSW_EF_SEARCH])
+    parser.add_argument("--threads", type=int, default=0, help="0 = faiss default")
+    args = parser.parse_args()
+
+    if args.threads:
+        faiss.omp_set_num_threads(args.threads)
+    vectors = synthetic_vectors(args.vectors, args.dim)
+    ids = np.arange(len(vectors), dtype=np.int64)
+    queries = synthetic_vectors(args.queries, args.dim, seed=1)
+
+    def report(kind: str, index: faiss.Index, build_s: float, labels, ms: float, **params) -> None:
+        print(
+            json.dumps(
+                {
+                    "type": kind,
+                    **params,
+                    "vectors": args.vectors,
+                    "build_s": round(build_s, 2),
+                    "bytes": int(faiss.serialize_index(index).size),
+                    f"recall@{args.k}": round(recall_at_k(labels, truth), 4),
+                    "ms_per_query": round(ms, 4),
+                }
+            )
+        )
+
+    start = time.perf_counter()
+    flat = build_index(choose_spec(len(vectors), "flat"), vectors, ids)
+    flat_build = time.perf_counter() - start
+    truth, flat_ms = timed_search(flat, queries, args.k)
+    report("flat", flat, flat_build, truth, flat_ms)
+    del flat
+
+    for kind in args.types:
+        spec = choose_spec(len(vectors), kind)
+        start = time.perf_counter()
+        index = build_index(spec, vectors, ids)
+        build_s = time.perf_counter() - start
+        sweeps: List[dict] = (
+            [{"ef_search": ef} for ef in args.ef_search]
+            if kind == "hnsw"
+            else [{"nprobe": p} for p in args.nprobe]
+            if spec.needs_training
+            else [{}]
+        )
+        for params in sweeps:
+            tune(index, **params)
+            labels, ms = timed_search(index, queries, args.k)
+            report(str(spec), index, build_s, labels, ms, **params)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Micro-benchmark for the CPU embedding engine (chunks/sec).
+
+    python -m benchmarks.bench_embeddings --chunks 512 --batch-size 32 64 --threads 1 4
+    python -m benchmarks.bench_embeddings --quantize
+"""
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import random
+import time
+from typing import List
+
+from interactive_pdf_qa.config import EMBEDDING_MODEL
+from interactive_pdf_qa.embedding_engine import CpuEmbeddingEngine
+
+_WORDS = (
+    "pump valve pressure clause torque bearing warranty section manual shall install "
+    "inspect replace gasket seal motor voltage circuit breaker part number assembly"
+).split()
+
+
+def synthetic_chunks(n: int, min_chars: int = 200, max_chars: int = 1500, seed: int = 0) -> List[str]:
+    """Random text chunks with varied lengths, like real PDF splits."""
+    rng = random.Random(seed)
+    chunks = []
+    for _ in range(n):
+        target = rng.randint(min_chars, max_chars)
+        words: List[str] = []
+        while sum(len(w) + 1 for w in words) < target:
+            words.append(rng.choice(_WORDS))
+        chunks.append(" ".join(words))
+    return chunks
+
+
+def bench(engine: CpuEmbeddingEngine, chunks: List[str], repeats: int) -> float:
+    engine.encode(chunks[: engine.batch_size])  # warm-up
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        engine.encode(chunks)
+        best = min(best, time.perf_counter() - start)
+    return len(chunks) / best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=EMBEDDING_MODEL)
+    parser.add_argument("--chunks", type=int, default=512)
+    parser.add_argument("--batch-size", type=int, nargs="+", default=[32])
+    parser.add_argument("--threads", type=int, nargs="+", default=[0], help="0 = torch default")
+    parser.add_argument("--quantize", action="store_true", help="Also benchmark the int8 model")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    chunks = synthetic_chunks(args.chunks)
+    modes = [False, True] if args.quantize else [False]
+    for quantize, threads, batch_size in itertools.product(modes, args.threads, args.batch_size):
+        engine = CpuEmbeddingEngine(
+            args.model, batch_size=batch_size, threads=threads or None, quantize=quantize
+        )
+        rate = bench(engine, chunks, args.repeats)
+        print(
+            json.dumps(
+                {
+                    "model": engine.signature,
+                    "batch_size": batch_size,
+                    "threads": threads or "default",
+                    "chunks": len(chunks),
+                    "chunks_per_sec": round(rate, 1),
+                }
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
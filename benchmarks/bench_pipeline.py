@@ -0,0 +1,229 @@
+"""End-to-end benchmark of the ingestion and query hot paths on synthetic PDFs.
+
+    python -m benchmarks.bench_pipeline --pdfs 4 --pages 50 --output results.json
+    python -m benchmarks.bench_pipeline --chunking recursive --chunk-size 1000 --baseline results.json
+    python -m benchmarks.bench_pipeline --embeddings fake --save-baseline baseline.json
+
+Stages: parse (``load_documents_from_pdfs``), split (``split_documents``), embed,
+index build (``IndexManager`` + retriever) and queries through the RAG chain with the
+deterministic fake LLM (latency percentiles and answer accuracy against the facts the
+generator planted). Peak RSS is sampled after every stage. Results are one JSON
+document; with ``--baseline``, each metric is compared and regressions beyond
+``--tolerance`` are flagged (exit status 1 with ``--fail-on-regression``).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import resource
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from interactive_pdf_qa.config import (
+    CHUNKING,
+    CHUNK_OVERLAP,
+    CHUNK_OVERLAP_TOKENS,
+    CHUNK_SIZE,
+    CHUNK_TOKENS,
+    EMBEDDING_MODEL,
+    RETRIEVAL_K,
+)
+
+from .synthetic_pdf import make_corpus
+
+# Metric name suffix -> whether larger values are better
+_HIGHER_IS_BETTER = {"_per_sec": True, "accuracy": True, "_ms": False, "_mb": False}
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process and its (parse pool) children."""
+    unit = 1 if sys.platform == "darwin" else 1024  # ru_maxrss is bytes on macOS, KiB elsewhere
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return round(max(own, children) * unit / 2**20, 1)
+
+
+def timed(fn: Callable[[], Any]) -> Tuple[Any, float]:
+    start = time.perf_counter()
+    value = fn()
+    return value, time.perf_counter() - start
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+def _embeddings(kind: str, model: str):
+    if kind == "fake":
+        from langchain_core.embeddings import DeterministicFakeEmbedding
+
+        return DeterministicFakeEmbedding(size=384)
+    from interactive_pdf_qa.embedding_engine import CpuEmbeddingEngine
+
+    # Raw engine, no disk cache: measures embedding compute, not cache hits
+    return CpuEmbeddingEngine(model)
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    from interactive_pdf_qa.context_packing import ContextPacker
+    from interactive_pdf_qa.fake_llm import FakeChatModel
+    from interactive_pdf_qa.index_manager import IndexManager
+    from interactive_pdf_qa.pdf_utils import (
+        build_layout_splitter,
+        build_splitter,
+        load_documents_from_pdfs,
+        split_documents,
+    )
+    from interactive_pdf_qa.rag import (
+        build_contextualize_prompt,
+        build_qa_prompt,
+        build_question_rewriter,
+        build_rag_chain,
+    )
+
+    metrics: Dict[str, float] = {}
+    with tempfile.TemporaryDirectory(prefix="pdfqa-bench-") as tmp:
+        paths, facts = make_corpus(tmp, args.pdfs, args.pages, args.seed)
+
+        pages, seconds = timed(lambda: load_documents_from_pdfs(paths))
+        metrics["parse_pages_per_sec"] = len(pages) / seconds
+        metrics["parse_peak_rss_mb"] = peak_rss_mb()
+
+    if args.chunking == "layout":
+        splitter = build_layout_splitter(args.chunk_tokens, args.chunk_overlap_tokens)
+    else:
+        splitter = build_splitter(args.chunk_size, args.chunk_overlap)
+    chunks, seconds = timed(lambda: split_documents(pages, splitter))
+    metrics["split_chunks_per_sec"] = len(chunks) / seconds
+
+    embeddings = _embeddings(args.embeddings, args.model)
+    texts = [c.page_content for c in chunks]
+    embeddings.embed_documents(texts[:8])  # warm-up (model load, first batch)
+    vectors, seconds = timed(lambda: embeddings.embed_documents(texts))
+    metrics["embed_chunks_per_sec"] = len(texts) / seconds
+    metrics["embed_peak_rss_mb"] = peak_rss_mb()
+
+    def build():
+        manager = IndexManager(embeddings)
+        manager.add_embeddings("bench", texts, vectors, [c.metadata for c in chunks])
+        return manager, manager.as_retriever(k=args.k)
+
+    (manager, retriever), seconds = timed(build)
+    metrics["index_vectors_per_sec"] = len(texts) / seconds
+
+    llm = FakeChatModel()
+    chain = build_rag_chain(
+        llm,
+        build_question_rewriter(llm, build_contextualize_prompt()),
+        retriever,
+        build_qa_prompt(),
+        context_packer=ContextPacker() if not args.no_packing else None,
+    )
+    sample = facts[:: max(1, len(facts) // args.queries)][: args.queries]
+    chain.invoke({"input": sample[0].question, "chat_history": []})  # warm-up
+    latencies, correct = [], 0
+    for fact in sample:
+        output, seconds = timed(lambda: chain.invoke({"input": fact.question, "chat_history": []}))
+        latencies.append(seconds * 1000)
+        correct += fact.part_number in output.get("answer", "")
+    metrics["query_p50_ms"] = percentile(latencies, 0.50)
+    metrics["query_p95_ms"] = percentile(latencies, 0.95)
+    metrics["query_accuracy"] = correct / len(sample)
+    metrics["peak_rss_mb"] = peak_rss_mb()
+
+    return {
+        "config": {
+            "pdfs": args.pdfs,
+            "pages": len(pages),
+            "chunks": len(chunks),
+            "chunking": args.chunking,
+            **(
+                {"chunk_tokens": args.chunk_tokens, "chunk_overlap_tokens": args.chunk_overlap_tokens}
+                if args.chunking == "layout"
+                else {"chunk_size": args.chunk_size, "chunk_overlap": args.chunk_overlap}
+            ),
+            "k": args.k,
+            "embeddings": args.model if args.embeddings == "model" else "fake",
+            "context_packing": not args.no_packing,
+            "queries": len(sample),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+        },
+        "metrics": {name: round(value, 3) for name, value in metrics.items()},
+    }
+
+
+def compare(current: Dict[str, float], baseline: Dict[str, float], tolerance: float) -> List[Dict[str, Any]]:
+    """Per-metric change against ``baseline``; ``regression`` marks changes for the worse."""
+    rows = []
+    for name, value in current.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        higher_better = next((v for suffix, v in _HIGHER_IS_BETTER.items() if name.endswith(suffix)), True)
+        change = (value - base) / base if base else 0.0
+        worse = -change if higher_better else change
+        rows.append(
+            {
+                "metric": name,
+                "baseline": base,
+                "current": value,
+                "change": round(change, 4),
+                "regression": worse > tolerance,
+            }
+        )
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdfs", type=int, default=4)
+    parser.add_argument("--pages", type=int, default=25, help="Pages per PDF")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunking", choices=["layout", "recursive"], default=CHUNKING)
+    parser.add_argument("--chunk-tokens", type=int, default=CHUNK_TOKENS, help="Layout chunk size")
+    parser.add_argument("--chunk-overlap-tokens", type=int, default=CHUNK_OVERLAP_TOKENS)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Recursive chunk size (chars)")
+    parser.add_argument("--chunk-overlap", type=int, default=CHUNK_OVERLAP)
+    parser.add_argument("--k", type=int, default=RETRIEVAL_K)
+    parser.add_argument("--model", default=EMBEDDING_MODEL)
+    parser.add_argument("--embeddings", choices=["model", "fake"], default="model")
+    parser.add_argument("--no-packing", action="store_true", help="Disable context packing")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--output", help="Write results JSON here (default: stdout)")
+    parser.add_argument("--save-baseline", help="Also write results to this baseline file")
+    parser.add_argument("--baseline", help="Compare against a saved results file")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed relative change for the worse")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args(argv)
+
+    results = run(args)
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as fh:
+            baseline = json.load(fh)
+        results["comparison"] = compare(results["metrics"], baseline["metrics"], args.tolerance)
+        regressions = [row["metric"] for row in results["comparison"] if row["regression"]]
+        if baseline.get("config") != results["config"]:
+            print("note: baseline was recorded with a different config", file=sys.stderr)
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            fh.write(text + "\n")
+    else:
+        print(text)
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as fh:
+            fh.write(text + "\n")
+    if regressions:
+        print(f"regressions: {', '.join(regressions)}", file=sys.stderr)
+    return 1 if regressions and args.fail_on_regression else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
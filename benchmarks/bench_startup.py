@@ -0,0 +1,90 @@
+"""Import-time profile of the app's cold start.
+
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --modules app interactive_pdf_qa.headless --top 25
+    python -m benchmarks.bench_startup --budget-ms 2000 --fail-over-budget
+
+Each module is imported in a fresh interpreter with ``-X importtime``. One JSON line
+per module reports the total import time, the slowest imports (by self and cumulative
+time) and any heavy stack from ``DEFERRED`` that got imported although the app only
+loads it on first use (a regression of the lazy imports).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import subprocess
+import sys
+from typing import Dict, List, Optional
+
+# Stacks the entry point must not import at start-up (loaded on first use)
+DEFERRED = (
+    "faiss",
+    "torch",
+    "sentence_transformers",
+    "pypdf",
+    "langchain.agents",
+    "langchain.chains",
+    "langchain_community",
+    "langchain_groq",
+)
+
+_LINE_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def profile(module: str) -> Dict:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        match = _LINE_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    error = None
+    if proc.returncode != 0:
+        error = (proc.stderr.strip().splitlines() or ["import failed"])[-1]
+    total_us = sum(r[2] for r in rows if r[3] == 0)
+    names = {r[0] for r in rows}
+    return {
+        "module": module,
+        "total_ms": round(total_us / 1000, 1),
+        "modules_imported": len(rows),
+        "rows": rows,
+        "deferred_imported": sorted(
+            stack for stack in DEFERRED if any(n == stack or n.startswith(stack + ".") for n in names)
+        ),
+        "error": error,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", nargs="+", default=["app"])
+    parser.add_argument("--top", type=int, default=15, help="Slowest imports to list")
+    parser.add_argument("--budget-ms", type=float, default=1500.0, help="Start-up import budget per module")
+    parser.add_argument("--fail-over-budget", action="store_true")
+    args = parser.parse_args(argv)
+
+    failed = False
+    for module in args.modules:
+        report = profile(module)
+        rows = report.pop("rows")
+        report["slowest_self_ms"] = {
+            name: round(us / 1000, 1) for name, us, _, _ in sorted(rows, key=lambda r: -r[1])[: args.top]
+        }
+        report["slowest_cumulative_ms"] = {
+            name: round(us / 1000, 1) for name, _, us, _ in sorted(rows, key=lambda r: -r[2])[: args.top]
+        }
+        report["over_budget"] = report["total_ms"] > args.budget_ms
+        failed |= bool(report["over_budget"] or report["deferred_imported"] or report["error"])
+        print(json.dumps(report))
+    return 1 if failed and args.fail_over_budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
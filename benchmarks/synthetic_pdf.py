@@ -0,0 +1,133 @@
+"""Synthetic text PDFs of configurable size, written without any PDF library.
+
+Pages are filled with pseudo-random manual-style sentences. Every page also states one
+"fact" (a component and its part number), so query benchmarks have questions with a
+known answer:
+
+    python -m benchmarks.synthetic_pdf out_dir --pdfs 4 --pages 50
+"""
+from __future__ import annotations
+
+import argparse
+import random
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Tuple
+
+_WORDS = (
+    "pump valve pressure clause torque bearing warranty section manual shall install "
+    "inspect replace gasket seal motor voltage circuit breaker assembly housing flange "
+    "coupling shaft impeller filter sensor controller relay fuse terminal cable bracket"
+).split()
+_LINE_CHARS = 90
+_LINES_PER_PAGE = 60
+
+
+@dataclass(frozen=True)
+class Fact:
+    source: str
+    page: int
+    component: str
+    part_number: str
+
+    @property
+    def question(self) -> str:
+        return f"What is the part number of the {self.component}?"
+
+
+def _sentence(rng: random.Random) -> str:
+    words = [rng.choice(_WORDS) for _ in range(rng.randint(8, 18))]
+    return " ".join(words).capitalize() + "."
+
+
+def _wrap(text: str, width: int = _LINE_CHARS) -> List[str]:
+    lines, line = [], ""
+    for word in text.split():
+        if line and len(line) + 1 + len(word) > width:
+            lines.append(line)
+            line = word
+        else:
+            line = f"{line} {word}" if line else word
+    if line:
+        lines.append(line)
+    return lines
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _page_stream(lines: List[str]) -> bytes:
+    body = " ".join(f"({_escape(line)}) '" for line in lines)
+    return f"BT /F1 10 Tf 50 780 Td 12 TL {body} ET".encode("latin-1")
+
+
+def _write_pdf(path: Path, pages: List[List[str]]) -> None:
+    # Objects: 1 catalog, 2 page tree, 3 font, then (page, contents) pairs
+    objects: List[bytes] = [b"", b"", b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for lines in pages:
+        stream = _page_stream(lines)
+        page_id, contents_id = len(objects) + 1, len(objects) + 2
+        kids.append(f"{page_id} 0 R")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {contents_id} 0 R "
+            f"/Resources << /Font << /F1 3 0 R >> >> >>".encode()
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+    objects[0] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(pages)} >>".encode()
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + obj + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    path.write_bytes(bytes(out))
+
+
+def make_pdf(path: Path, pages: int, seed: int = 0) -> List[Fact]:
+    """Write one PDF with ``pages`` full pages; returns the facts it states."""
+    rng = random.Random(f"{seed}:{path.name}")
+    facts: List[Fact] = []
+    page_lines: List[List[str]] = []
+    for page in range(pages):
+        component = f"{rng.choice(_WORDS)} {rng.choice(_WORDS)} unit {path.stem}-{page}"
+        part_number = f"PN-{rng.randint(10000, 99999)}"
+        facts.append(Fact(str(path), page, component, part_number))
+        sentences = [_sentence(rng) for _ in range(40)]
+        sentences.insert(rng.randrange(len(sentences)), f"The part number of the {component} is {part_number}.")
+        page_lines.append(_wrap(" ".join(sentences))[:_LINES_PER_PAGE])
+    _write_pdf(path, page_lines)
+    return facts
+
+
+def make_corpus(directory: str, pdfs: int, pages: int, seed: int = 0) -> Tuple[List[str], List[Fact]]:
+    """Write ``pdfs`` PDFs of ``pages`` pages each under ``directory``."""
+    root = Path(directory)
+    root.mkdir(parents=True, exist_ok=True)
+    paths, facts = [], []
+    for i in range(pdfs):
+        path = root / f"synthetic-{i:03d}.pdf"
+        facts.extend(make_pdf(path, pages, seed))
+        paths.append(str(path))
+    return paths, facts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directory")
+    parser.add_argument("--pdfs", type=int, default=4)
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    paths, facts = make_corpus(args.directory, args.pdfs, args.pages, args.seed)
+    print(f"wrote {len(paths)} PDF(s), {len(facts)} pages to {args.directory}")
+
+
+if __name__ == "__main__":
+    main()
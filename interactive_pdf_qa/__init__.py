@@ -3,10 +3,32 @@
 __all__ = [
     "config",
     "resources",
+    "embedding_engine",
+    "embedding_cache",
+    "fingerprint",
     "pdf_utils",
+    "pdf_parsing",
+    "chunking",
+    "scratch",
+    "ingest",
     "rag",
+    "rewrite_gate",
+    "answer_cache",
+    "context_packing",
+    "index_manager",
+    "ann_index",
+    "hybrid",
+    "metadata_index",
+    "index_store",
     "history",
+    "history_store",
     "ui",
     "agents",
+    "web_tools",
     "synthesis",
+    "streaming",
+    "orchestration",
+    "fake_llm",
+    "headless",
+    "tracing",
 ]
@@ -1,29 +1,28 @@
 from __future__ import annotations
 
-from typing import List, Optional
+from typing import TYPE_CHECKING, Dict, List, Optional
 from importlib import import_module
 
 import streamlit as st
 
-from langchain_community.utilities import ArxivAPIWrapper, WikipediaAPIWrapper
-from langchain_community.tools import (
-    ArxivQueryRun,
-    WikipediaQueryRun,
-    DuckDuckGoSearchRun,
-)
-from langchain.agents import initialize_agent, AgentType
-from langchain.tools import Tool
-
+from .config import HISTORY_WINDOW_MESSAGES, WEB_BRANCH_TIMEOUT_SECONDS
 from .history import get_session_history
+from .tracing import span
+from .fingerprint import hash_uploads, set_signature
+
+# The agent and tool stacks (langchain.agents, the tool wrappers) are imported when an
+# agent is first built, so sessions that never enable tools do not pay for them
+if TYPE_CHECKING:
+    from langchain.tools import Tool
 
 
-def compute_index_sig(uploaded_files: List) -> str:
+def compute_index_sig(uploaded_files: List, memo: Optional[Dict] = None) -> str:
     """
     Create a signature for uploaded files so we rebuild the index only when they change.
+
+    Built from file contents (not names/sizes) and independent of upload order.
     """
-    return "|".join(
-        f"{f.name}:{getattr(f, 'size', None) or len(f.getvalue())}" for f in uploaded_files
-    )
+    return set_signature(hash_uploads(uploaded_files, memo))
 
 
 def compute_agent_sig(api_key: str, session_id: str | int) -> str:
@@ -34,25 +33,23 @@ def compute_agent_sig(api_key: str, session_id: str | int) -> str:
 
 
 def _create_external_tools() -> List:
-    wiki = WikipediaQueryRun(
-        api_wrapper=WikipediaAPIWrapper(top_k_results=1, doc_content_chars_max=250)
-    )
-    arxiv = ArxivQueryRun(
-        api_wrapper=ArxivAPIWrapper(top_k_results=1, doc_content_chars_max=250)
-    )
-    search = DuckDuckGoSearchRun(name="Search")
-    return [wiki, arxiv, search]
+    from .web_tools import as_langchain_tools, build_backends
+
+    # Cached Wikipedia/Arxiv/Search backends plus a parallel fan-out tool over all of them
+    return as_langchain_tools(build_backends())
 
 
 def _create_pdf_tool(session_id: str | int) -> Optional[Tool]:
     if st.session_state.get("rag_chain_unwrapped") is None:
         return None
+    from langchain.tools import Tool
 
     def _pdf_tool_call(q: str) -> str:
         session_history = get_session_history(session_id)
-        res = st.session_state["rag_chain_unwrapped"].invoke(
-            {"input": q, "chat_history": session_history.messages}
-        )
+        with span("agent.pdf_tool"):
+            res = st.session_state["rag_chain_unwrapped"].invoke(
+                {"input": q, "chat_history": session_history.messages}
+            )
         return res.get("answer", "")
 
     return Tool(
@@ -66,18 +63,21 @@ def _create_pdf_tool(session_id: str | int) -> Optional[Tool]:
 
 
 def _seed_agent_memory(session_id: str | int):
-    ConversationBufferMemory = None
+    ConversationBufferWindowMemory = None
     try:
-        ConversationBufferMemory = getattr(
-            import_module("langchain.memory"), "ConversationBufferMemory"
+        ConversationBufferWindowMemory = getattr(
+            import_module("langchain.memory"), "ConversationBufferWindowMemory"
         )
     except (ModuleNotFoundError, ImportError, AttributeError):
-        ConversationBufferMemory = None
+        ConversationBufferWindowMemory = None
 
-    if ConversationBufferMemory is None:
+    if ConversationBufferWindowMemory is None:
         return None
 
-    agent_memory = ConversationBufferMemory(memory_key="chat_history", return_messages=True)
+    # Same window as the chat history backend (k counts question/answer exchanges)
+    agent_memory = ConversationBufferWindowMemory(
+        memory_key="chat_history", return_messages=True, k=max(1, HISTORY_WINDOW_MESSAGES // 2)
+    )
 
     # Seed from existing session chat history
     session_history_obj = get_session_history(session_id)
@@ -95,6 +95,8 @@ def _seed_agent_memory(session_id: str | int):
 
 
 def build_web_agent(llm, session_id: str | int):
+    from langchain.agents import AgentType, initialize_agent
+
     tools = _create_external_tools()
 
     pdf_tool = _create_pdf_tool(session_id)
@@ -109,5 +111,8 @@ def build_web_agent(llm, session_id: str | int):
         agent=AgentType.ZERO_SHOT_REACT_DESCRIPTION,
         memory=agent_memory,  # may be None; agent works without it
         handle_parsing_errors=True,
+        # Stop the ReAct loop by itself once the tools-mode branch deadline has passed
+        max_execution_time=WEB_BRANCH_TIMEOUT_SECONDS,
+        early_stopping_method="force",
     )
     return agent
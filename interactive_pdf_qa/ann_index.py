@@ -0,0 +1,186 @@
+"""FAISS index types for the managed vector store, chosen by corpus size.
+
+Flat search is exact but its cost grows linearly with the number of chunks. Larger
+corpora switch to approximate indexes:
+
+- ``flat``  - exact L2 search (``IndexIDMap2(IndexFlatL2)``), no training.
+- ``ivf``   - inverted lists over ``nlist`` k-means cells, ``nprobe`` cells searched.
+- ``hnsw``  - graph index, ``efSearch`` controls recall; fastest queries but no cheap
+  deletes, so removals rebuild the graph from the remaining vectors.
+- ``ivfpq`` - IVF with product-quantized codes (``PQ_M`` bytes per vector at 8 bits),
+  for corpora whose full-precision vectors no longer fit in memory.
+
+Every index keeps the caller's stable int64 ids: IVF indexes store them natively (with
+a hashtable direct map so vectors can be reconstructed), flat and HNSW go through
+``IndexIDMap2``.
+"""
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import Optional
+
+import faiss
+import numpy as np
+
+from .config import (
+    ANN_FLAT_MAX_VECTORS,
+    ANN_INDEX_TYPE,
+    ANN_IVF_MAX_VECTORS,
+    ANN_RETRAIN_GROWTH,
+    ANN_TRAIN_SAMPLE,
+    HNSW_EF_CONSTRUCTION,
+    HNSW_EF_SEARCH,
+    HNSW_M,
+    IVF_NLIST,
+    IVF_NPROBE,
+    PQ_M,
+    PQ_NBITS,
+)
+
+INDEX_TYPES = ("flat", "ivf", "hnsw", "ivfpq")
+# Below these sizes k-means has too few points per centroid; such corpora stay flat
+_MIN_TRAIN_VECTORS = {"ivf": 39, "ivfpq": 39 * 2 ** PQ_NBITS}
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    kind: str
+    nlist: int = 0
+
+    @property
+    def needs_training(self) -> bool:
+        return self.kind in ("ivf", "ivfpq")
+
+    def __str__(self) -> str:
+        return f"{self.kind}(nlist={self.nlist})" if self.needs_training else self.kind
+
+
+def auto_nlist(n: int) -> int:
+    """Rule of thumb: about 4*sqrt(n) cells, with at least ~39 training points per cell."""
+    return max(1, min(int(4 * math.sqrt(max(n, 1))), n // 39))
+
+
+def choose_spec(n: int, kind: str = ANN_INDEX_TYPE, nlist: Optional[int] = IVF_NLIST) -> IndexSpec:
+    """Index spec for a corpus of ``n`` vectors; ``kind="auto"`` picks by size."""
+    if kind == "auto":
+        if n <= ANN_FLAT_MAX_VECTORS:
+            kind = "flat"
+        elif n <= ANN_IVF_MAX_VECTORS:
+            kind = "ivf"
+        else:
+            kind = "ivfpq"
+    if kind not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type {kind!r}; expected 'auto' or one of {INDEX_TYPES}")
+    if kind in _MIN_TRAIN_VECTORS:
+        if n < _MIN_TRAIN_VECTORS[kind]:
+            return IndexSpec("flat")
+        return IndexSpec(kind, nlist or auto_nlist(n))
+    return IndexSpec(kind)
+
+
+def _pq_m(dim: int, m: int = PQ_M) -> int:
+    # The number of sub-quantizers must divide the dimension
+    m = min(m, dim)
+    while dim % m:
+        m -= 1
+    return m
+
+
+def new_index(spec: IndexSpec, dim: int) -> faiss.Index:
+    """Empty index for ``spec`` that accepts ``add_with_ids`` (after training, for IVF)."""
+    if spec.kind == "flat":
+        return faiss.IndexIDMap2(faiss.IndexFlatL2(dim))
+    if spec.kind == "hnsw":
+        graph = faiss.IndexHNSWFlat(dim, HNSW_M)
+        graph.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+        return faiss.IndexIDMap2(graph)
+    quantizer = faiss.IndexFlatL2(dim)
+    if spec.kind == "ivf":
+        index = faiss.IndexIVFFlat(quantizer, dim, spec.nlist, faiss.METRIC_L2)
+    else:
+        index = faiss.IndexIVFPQ(quantizer, dim, spec.nlist, _pq_m(dim), PQ_NBITS)
+    index.own_fields = True
+    quantizer.this.disown()
+    index.set_direct_map_type(faiss.DirectMap.Hashtable)
+    return index
+
+
+def tune(index: faiss.Index, nprobe: int = IVF_NPROBE, ef_search: int = HNSW_EF_SEARCH) -> None:
+    """Apply query-time parameters (``nprobe`` for IVF, ``efSearch`` for HNSW)."""
+    inner = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap2) else index
+    if isinstance(inner, faiss.IndexHNSW):
+        inner.hnsw.efSearch = ef_search
+    elif isinstance(inner, faiss.IndexIVF):
+        inner.nprobe = min(nprobe, inner.nlist)
+
+
+def search_selected(index: faiss.Index, queries: np.ndarray, k: int, ids: np.ndarray):
+    """``index.search`` restricted to ``ids`` (an ``IDSelectorBatch`` applied inside FAISS).
+
+    The sparser the selection, the more IVF cells (or HNSW candidates) are visited, so
+    enough selected vectors are reached to fill ``k`` results.
+    """
+    selector = faiss.IDSelectorBatch(np.asarray(ids, dtype=np.int64))
+    sparsity = max(1.0, index.ntotal / max(1, len(ids)))
+    inner = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap2) else index
+    if isinstance(inner, faiss.IndexHNSW):
+        ef_search = max(inner.hnsw.efSearch, k)
+        params = faiss.SearchParametersHNSW(
+            sel=selector, efSearch=int(min(ef_search * sparsity, 16 * ef_search))
+        )
+    elif isinstance(inner, faiss.IndexIVF):
+        params = faiss.SearchParametersIVF(
+            sel=selector, nprobe=int(min(math.ceil(inner.nprobe * sparsity), inner.nlist))
+        )
+    else:
+        params = faiss.SearchParameters(sel=selector)
+    return index.search(np.ascontiguousarray(queries, dtype=np.float32), k, params=params)
+
+
+def index_kind(index: faiss.Index) -> str:
+    inner = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap2) else index
+    if isinstance(inner, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(inner, faiss.IndexIVFPQ):
+        return "ivfpq"
+    if isinstance(inner, faiss.IndexIVF):
+        return "ivf"
+    return "flat"
+
+
+def supports_remove(index: faiss.Index) -> bool:
+    return index_kind(index) != "hnsw"
+
+
+def build_index(spec: IndexSpec, vectors: np.ndarray, ids: np.ndarray, seed: int = 0) -> faiss.Index:
+    """Train (on at most ``ANN_TRAIN_SAMPLE`` vectors) and fill an index for ``spec``."""
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    index = new_index(spec, vectors.shape[1])
+    if spec.needs_training:
+        sample = vectors
+        if len(vectors) > ANN_TRAIN_SAMPLE:
+            rows = np.random.default_rng(seed).choice(len(vectors), ANN_TRAIN_SAMPLE, replace=False)
+            sample = vectors[np.sort(rows)]
+        index.train(sample)
+    if len(vectors):
+        index.add_with_ids(vectors, np.asarray(ids, dtype=np.int64))
+    tune(index)
+    return index
+
+
+def reconstruct_ids(index: faiss.Index, ids) -> np.ndarray:
+    """Stored vectors for ``ids`` (approximate for ``ivfpq``)."""
+    ids = np.asarray(list(ids), dtype=np.int64)
+    if not len(ids):
+        return np.zeros((0, index.d), dtype=np.float32)
+    return index.reconstruct_batch(ids)
+
+
+def needs_rebuild(current: IndexSpec, trained_on: int, n: int, kind: str = ANN_INDEX_TYPE) -> bool:
+    """Whether the index for ``current`` (trained on ``trained_on`` vectors) is stale at ``n``."""
+    target = choose_spec(n, kind)
+    if target.kind != current.kind:
+        # Only grow into larger index types; a shrinking corpus keeps its trained index
+        return current.kind == "flat" or (current.kind, target.kind) == ("ivf", "ivfpq")
+    return current.needs_training and n >= trained_on * ANN_RETRAIN_GROWTH
@@ -0,0 +1,166 @@
+"""Semantic answer cache for repeated and near-duplicate questions.
+
+Answers are keyed by the embedding of the standalone (history-resolved) question and
+scoped to the current index: whenever the bound index version changes, every cached
+answer is dropped. The app's version changes with the upload set and each time a PDF
+finishes ingesting, not with every embedded batch. A lookup hits when cosine
+similarity to a cached question passes ``threshold``. On a miss, the question's
+embedding is passed on as ``question_vector`` so retrieval does not embed it again.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.runnables import Runnable, RunnableLambda, RunnablePassthrough
+
+from .config import ANSWER_CACHE_MAX_ENTRIES, ANSWER_CACHE_THRESHOLD, ANSWER_CACHE_TTL_SECONDS
+from .tracing import span
+
+
+@dataclass
+class _Entry:
+    vector: np.ndarray
+    answer: str
+    context: List[Any]
+    created: float = field(default_factory=time.monotonic)
+
+
+class SemanticAnswerCache:
+    """LRU + TTL cache of answers, matched by standalone-question similarity."""
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        threshold: float = ANSWER_CACHE_THRESHOLD,
+        max_entries: int = ANSWER_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = ANSWER_CACHE_TTL_SECONDS,
+    ):
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._next_key = 0
+        self._index_version: Callable[[], Hashable] = lambda: None
+        self._bound_version: Hashable = None
+        self._lock = threading.Lock()
+
+    # ---------------------------
+    # Index scoping
+    # ---------------------------
+
+    def bind(self, index_version: Callable[[], Hashable]) -> None:
+        """Scope the cache to an index; ``index_version()`` is checked on every lookup."""
+        with self._lock:
+            self._index_version = index_version
+            self._check_version_locked()
+
+    def _check_version_locked(self) -> None:
+        version = self._index_version()
+        if version != self._bound_version:
+            self._entries.clear()
+            self._bound_version = version
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    # ---------------------------
+    # Lookup and insert
+    # ---------------------------
+
+    def _normalize(self, embedding: Sequence[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else vector
+
+    def _expire_locked(self) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        cutoff = time.monotonic() - self.ttl_seconds
+        for key in [k for k, e in self._entries.items() if e.created < cutoff]:
+            del self._entries[key]
+
+    def lookup(
+        self, question: str, embedding: Optional[Sequence[float]] = None
+    ) -> Tuple[Optional[_Entry], np.ndarray]:
+        """Return ``(entry or None, question vector)``; the vector is reused by ``put``.
+
+        ``embedding`` is ``question``'s embedding, if the caller has it already.
+        """
+        if embedding is None:
+            embedding = self.embeddings.embed_query(question)
+        vector = self._normalize(embedding)
+        with self._lock:
+            self._check_version_locked()
+            self._expire_locked()
+            best_key, best_score = None, -1.0
+            if self._entries:
+                keys = list(self._entries)
+                scores = np.stack([self._entries[k].vector for k in keys]) @ vector
+                i = int(np.argmax(scores))
+                best_key, best_score = keys[i], float(scores[i])
+            if best_key is not None and best_score >= self.threshold:
+                self._entries.move_to_end(best_key)
+                self.hits += 1
+                return self._entries[best_key], vector
+            self.misses += 1
+            return None, vector
+
+    def put(self, vector: np.ndarray, answer: str, context: Optional[List[Any]] = None, version: Hashable = None) -> None:
+        with self._lock:
+            self._check_version_locked()
+            if version != self._bound_version:
+                return  # answered against an index that has changed since
+            self._entries[self._next_key] = _Entry(vector, answer, list(context or []))
+            self._next_key += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self._entries),
+        }
+
+    # ---------------------------
+    # Chain integration
+    # ---------------------------
+
+    def wrap(self, retrieve_and_answer: Runnable) -> Runnable:
+        """Put the cache in front of a chain step that reads ``standalone_question``."""
+
+        def _route(inputs: Dict[str, Any]):
+            with span("answer_cache.lookup") as s:
+                embedding = self.embeddings.embed_query(inputs["standalone_question"])
+                entry, vector = self.lookup(inputs["standalone_question"], embedding)
+                s.set(hit=entry is not None)
+            if entry is not None:
+                return {**inputs, "context": entry.context, "answer": entry.answer, "answer_cache_hit": True}
+
+            version = self._bound_version
+
+            def _store(run) -> None:
+                outputs = run.outputs or {}
+                answer = outputs.get("answer")
+                if isinstance(answer, str) and answer:
+                    self.put(vector, answer, outputs.get("context"), version)
+
+            # Returning a runnable lets LangChain invoke or stream it with the same input;
+            # retrieval reuses the question's embedding from ``question_vector``
+            with_vector = RunnablePassthrough.assign(question_vector=lambda _: embedding)
+            return (with_vector | retrieve_and_answer).with_listeners(on_end=_store)
+
+        return RunnableLambda(_route, name="answer_cache")
@@ -0,0 +1,258 @@
+"""Layout-aware chunking of extracted page text, sized by tokens.
+
+Page text (as PyPDF extracts it) is split into blocks: headings (short numbered,
+all-caps or title-case lines), tables (runs of lines with several aligned columns)
+and paragraphs (separated by blank lines; wrapped lines are re-joined). Blocks are
+packed into chunks of at most ``max_tokens``: a heading always starts a new chunk and
+becomes the ``section`` of the chunks that follow it, tables are only split between
+rows (repeating the header row), and oversized paragraphs are split on sentences,
+then words, with ``overlap_tokens`` carried over between pieces.
+
+Kept free of LangChain imports, like ``pdf_parsing``, so large page sets can be
+chunked in the shared worker pool.
+"""
+from __future__ import annotations
+
+import math
+import re
+from dataclasses import dataclass
+from typing import Iterator, List, NamedTuple, Optional, Sequence
+
+from .config import (
+    CHARS_PER_TOKEN,
+    CHUNK_OVERLAP_TOKENS,
+    CHUNK_PAGES_PER_TASK,
+    CHUNK_PARALLEL_MIN_PAGES,
+    CHUNK_TOKENS,
+)
+from .pdf_parsing import get_pool
+
+_HEADING_MAX_CHARS = 80
+_NUMBERED_HEADING_RE = re.compile(
+    r"^(?:(?:chapter|section|part|appendix|article)\s+[\w.-]+|\d+(?:\.\d+)*\.?|[A-Z]\.|[IVX]+\.)\s+\S",
+    re.IGNORECASE,
+)
+_TABLE_CELL_SEP_RE = re.compile(r"\t|\s{2,}|\s*\|\s*")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+_MINOR_WORDS = frozenset("a an and as at by for in of on or the to with".split())
+
+
+@dataclass(frozen=True)
+class Chunk:
+    text: str
+    section: Optional[str] = None
+
+
+class Block(NamedTuple):
+    kind: str                         # "heading", "paragraph" or "table"
+    text: str
+
+
+def _is_heading(line: str) -> bool:
+    if len(line) > _HEADING_MAX_CHARS or line[-1] in ",;":
+        return False
+    words = line.split()
+    if _NUMBERED_HEADING_RE.match(line):
+        return len(words) <= 12 and not line.endswith(".")
+    if line.endswith((".", ":", "?", "!")) or len(words) > 10:
+        return False
+    letters = [c for c in line if c.isalpha()]
+    if len(letters) >= 3 and all(c.isupper() for c in letters):
+        return True
+    significant = [w for w in words if w.lower() not in _MINOR_WORDS]
+    return len(words) >= 2 and all(w[0].isupper() or not w[0].isalpha() for w in significant)
+
+
+def _is_table_row(line: str) -> bool:
+    return len([c for c in _TABLE_CELL_SEP_RE.split(line.strip()) if c]) >= 3
+
+
+def _join_lines(lines: List[str]) -> str:
+    text = ""
+    for line in lines:
+        if text.endswith("-") and line[:1].islower():
+            text = text[:-1] + line          # re-join a word hyphenated across lines
+        else:
+            text = f"{text} {line}" if text else line
+    return text
+
+
+def parse_blocks(text: str) -> Iterator[Block]:
+    """Split one page of extracted text into heading, paragraph and table blocks."""
+    lines = [line.rstrip() for line in text.splitlines()]
+    paragraph: List[str] = []
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        stripped = line.strip()
+        if not stripped:
+            if paragraph:
+                yield Block("paragraph", _join_lines(paragraph))
+                paragraph = []
+            i += 1
+            continue
+        if _is_table_row(line) and i + 1 < len(lines) and _is_table_row(lines[i + 1]):
+            if paragraph:
+                yield Block("paragraph", _join_lines(paragraph))
+                paragraph = []
+            rows = []
+            while i < len(lines) and lines[i].strip() and _is_table_row(lines[i]):
+                rows.append(lines[i].strip())
+                i += 1
+            yield Block("table", "\n".join(rows))
+            continue
+        if _is_heading(stripped):
+            if paragraph:
+                yield Block("paragraph", _join_lines(paragraph))
+                paragraph = []
+            yield Block("heading", stripped)
+        else:
+            paragraph.append(stripped)
+        i += 1
+    if paragraph:
+        yield Block("paragraph", _join_lines(paragraph))
+
+
+class LayoutChunker:
+    """Packs a page's blocks into token-sized chunks (see the module docstring).
+
+    A chunk holds at most ``max_tokens`` of body text, plus its leading heading.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = CHUNK_TOKENS,
+        overlap_tokens: int = CHUNK_OVERLAP_TOKENS,
+        chars_per_token: int = CHARS_PER_TOKEN,
+    ):
+        self.max_tokens = max(1, max_tokens)
+        self.overlap_tokens = max(0, min(overlap_tokens, self.max_tokens // 2))
+        self.chars_per_token = max(1, chars_per_token)
+
+    def tokens(self, text: str) -> int:
+        return math.ceil(len(text) / self.chars_per_token)
+
+    def chunk(self, text: str, section: Optional[str] = None) -> List[Chunk]:
+        """Chunk one page; chunks before its first heading get ``section``."""
+        chunks: List[Chunk] = []
+        parts: List[str] = []
+        size = 0
+        body = False                  # whether ``parts`` holds more than a heading
+
+        for block in parse_blocks(text):
+            if block.kind == "heading":
+                if body:
+                    chunks.append(Chunk("\n\n".join(parts), section))
+                    parts, size = [], 0
+                # Consecutive headings (title, then subtitle) stay together
+                parts.append(block.text)
+                section = " / ".join(parts) if not body and len(parts) > 1 else block.text
+                body = False
+                continue
+            pieces = self._split_table(block.text) if block.kind == "table" else self._split_text(block.text)
+            for piece in pieces:
+                tokens = self.tokens(piece)
+                if body and size + tokens > self.max_tokens:
+                    chunks.append(Chunk("\n\n".join(parts), section))
+                    parts, size = [], 0
+                parts.append(piece)
+                size += tokens
+                body = True
+        if parts:
+            chunks.append(Chunk("\n\n".join(parts), section))
+        return chunks
+
+    def _split_text(self, text: str) -> List[str]:
+        if self.tokens(text) <= self.max_tokens:
+            return [text]
+        units: List[str] = []
+        for sentence in _SENTENCE_RE.split(text):
+            if self.tokens(sentence) <= self.max_tokens:
+                units.append(sentence)
+            else:
+                units.extend(self._word_windows(sentence))
+
+        pieces: List[str] = []
+        current: List[str] = []
+        size = 0
+        for unit in units:
+            tokens = self.tokens(unit) + 1
+            if current and size + tokens > self.max_tokens:
+                pieces.append(" ".join(current))
+                current = self._overlap(current)
+                size = sum(self.tokens(u) + 1 for u in current)
+                if size + tokens > self.max_tokens:
+                    current, size = [], 0
+            current.append(unit)
+            size += tokens
+        if current:
+            pieces.append(" ".join(current))
+        return pieces
+
+    def _overlap(self, units: List[str]) -> List[str]:
+        """Trailing units of a finished piece that fit in ``overlap_tokens``."""
+        kept: List[str] = []
+        size = 0
+        for unit in reversed(units):
+            size += self.tokens(unit) + 1
+            if size > self.overlap_tokens:
+                break
+            kept.append(unit)
+        return kept[::-1]
+
+    def _word_windows(self, text: str) -> List[str]:
+        max_chars = self.max_tokens * self.chars_per_token
+        windows: List[str] = []
+        current = ""
+        for word in text.split():
+            word = word[:max_chars]
+            if current and len(current) + 1 + len(word) > max_chars:
+                windows.append(current)
+                current = word
+            else:
+                current = f"{current} {word}" if current else word
+        if current:
+            windows.append(current)
+        return windows
+
+    def _split_table(self, table: str) -> List[str]:
+        if self.tokens(table) <= self.max_tokens:
+            return [table]
+        header, *rows = table.split("\n")
+        pieces: List[str] = []
+        current = [header]
+        size = self.tokens(header) + 1
+        for row in rows:
+            tokens = self.tokens(row) + 1
+            if len(current) > 1 and size + tokens > self.max_tokens:
+                pieces.append("\n".join(current))
+                current, size = [header], self.tokens(header) + 1
+            current.append(row)
+            size += tokens
+        if len(current) > 1:
+            pieces.append("\n".join(current))
+        return pieces
+
+
+def _chunk_batch(chunker: LayoutChunker, texts: List[str]) -> List[List[Chunk]]:
+    return [chunker.chunk(text) for text in texts]
+
+
+def chunk_pages(
+    texts: Sequence[str],
+    chunker: LayoutChunker,
+    workers: int,
+    pages_per_task: int = CHUNK_PAGES_PER_TASK,
+    min_parallel_pages: int = CHUNK_PARALLEL_MIN_PAGES,
+) -> List[List[Chunk]]:
+    """Chunk every page independently, in batches across the worker pool for large inputs.
+
+    Pages are chunked without the previous page's section; chunks before a page's first
+    heading have ``section=None`` for the caller to fill in.
+    """
+    if workers <= 1 or len(texts) < min_parallel_pages:
+        return _chunk_batch(chunker, list(texts))
+    step = max(1, pages_per_task)
+    batches = [list(texts[i : i + step]) for i in range(0, len(texts), step)]
+    results = get_pool(workers).map(_chunk_batch, [chunker] * len(batches), batches)
+    return [page for batch in results for page in batch]
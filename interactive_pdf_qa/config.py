@@ -7,14 +7,118 @@ from dotenv import load_dotenv
 # ---------------------------
 MODEL_NAME = "gemma2-9b-it"
 EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+# Embedding engine: encode batch size, torch intra-op threads (None -> torch default),
+# L2-normalized output and dynamic int8 quantization of the model's linear layers
+EMBED_ENCODE_BATCH_SIZE = 32
+EMBED_THREADS = None
+EMBED_NORMALIZE = False
+EMBED_QUANTIZE = False
+# Start loading the embedding model in a background thread when the app starts, so the first
+# page renders without waiting for it
+EMBED_WARMUP = True
+# Chunking: "layout" splits pages on headings, paragraphs and tables into chunks of at most
+# CHUNK_TOKENS (estimated at CHARS_PER_TOKEN); "recursive" is the plain character splitter
+CHUNKING = os.getenv("PDFQA_CHUNKING", "layout")
+CHUNK_TOKENS = 300
+CHUNK_OVERLAP_TOKENS = 30
+# Pages chunked per worker task, and the page count below which chunking stays serial
+CHUNK_PAGES_PER_TASK = 64
+CHUNK_PARALLEL_MIN_PAGES = 256
 CHUNK_SIZE = 5000
 # Lower overlap to reduce total text processed during embedding
 CHUNK_OVERLAP = 100
+# PDF parsing: worker processes, pages per task, and the page count below which parsing stays serial
+PARSE_WORKERS = min(4, os.cpu_count() or 1)
+PARSE_PAGES_PER_TASK = 16
+PARSE_PARALLEL_MIN_PAGES = 32
+# Scratch directory for PDFs spilled to disk for parallel parsing (None -> system temp dir)
+SCRATCH_DIR = os.getenv("PDFQA_SCRATCH_DIR")
+SCRATCH_MAX_BYTES = 512 * 1024 * 1024
+# Streaming ingest: chunks embedded per batch and capacity of the queues between stages
+EMBED_BATCH_SIZE = 64
+INGEST_QUEUE_SIZE = 256
 # Retrieval: number of chunks to fetch per query (smaller is faster)
 RETRIEVAL_K = 3
+# Vector index type: "auto" uses exact flat search up to ANN_FLAT_MAX_VECTORS, IVF up to
+# ANN_IVF_MAX_VECTORS and IVF-PQ beyond; or force "flat", "ivf", "hnsw" or "ivfpq"
+ANN_INDEX_TYPE = os.getenv("PDFQA_INDEX_TYPE", "auto")
+ANN_FLAT_MAX_VECTORS = 50_000
+ANN_IVF_MAX_VECTORS = 1_000_000
+# IVF indexes are retrained once the corpus has grown this many times past its training size
+ANN_RETRAIN_GROWTH = 4
+ANN_TRAIN_SAMPLE = 256_000
+# ANN parameters: IVF cells (None -> ~4*sqrt(n)) and cells probed per query, HNSW graph
+# degree and build/search beam widths, PQ sub-quantizers (bytes per vector) and bits each
+IVF_NLIST = None
+IVF_NPROBE = 16
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 80
+HNSW_EF_SEARCH = 64
+PQ_M = 48
+PQ_NBITS = 8
+# Metadata pre-filter: selections up to this many chunks are scored exactly from their stored
+# vectors instead of searching the ANN index with an id selector
+PREFILTER_EXACT_MAX = 2048
+# Hybrid retrieval: fuse FAISS and BM25 rankings over a larger candidate pool (RRF), then
+# optionally rerank the pool with a CPU cross-encoder before keeping RETRIEVAL_K chunks
+HYBRID_RETRIEVAL = True
+HYBRID_CANDIDATE_K = 20
+RRF_K = 60
+BM25_K1 = 1.5
+BM25_B = 0.75
+RERANK_ENABLED = False
+RERANKER_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+# Context packing: token budgets for retrieved passages and chat history in the QA prompt
+# (estimated at CHARS_PER_TOKEN), and how much of each truncated older turn is kept
+CONTEXT_PACKING = True
+CONTEXT_TOKEN_BUDGET = 1500
+HISTORY_TOKEN_BUDGET = 600
+HISTORY_TRUNCATE_CHARS = 200
+CHARS_PER_TOKEN = 4
+# History-rewrite gate: recent messages considered, memoized rewrites, classifier cut-off
+REWRITE_HISTORY_TAIL = 4
+REWRITE_MEMO_SIZE = 512
+REWRITE_CLASSIFIER_THRESHOLD = 0.5
+# Semantic answer cache: min cosine similarity for a hit, LRU size and TTL
+ANSWER_CACHE_THRESHOLD = 0.95
+ANSWER_CACHE_MAX_ENTRIES = 256
+ANSWER_CACHE_TTL_SECONDS = 3600
+# Tools mode: PDF and web branches run concurrently; answers arriving after these are dropped
+PDF_BRANCH_TIMEOUT_SECONDS = 30
+WEB_BRANCH_TIMEOUT_SECONDS = 45
+# External tools: "live" (network) or "offline" (JSON stand-ins in TOOL_OFFLINE_DIR),
+# on-disk result cache TTL and how long a parallel fan-out waits for slow sources
+TOOL_BACKEND = os.getenv("PDFQA_TOOL_BACKEND", "live")
+TOOL_OFFLINE_DIR = os.getenv("PDFQA_TOOL_OFFLINE_DIR")
+TOOL_CACHE_TTL_SECONDS = 24 * 3600
+TOOL_FANOUT_TIMEOUT_SECONDS = 15
+# Headless batch runs: questions answered concurrently and the default LLM ("groq" or "fake")
+HEADLESS_CONCURRENCY = 4
+HEADLESS_LLM = os.getenv("PDFQA_HEADLESS_LLM", "groq")
+# Tracing: per-stage spans (PDFQA_TRACE=1), exported at exit to PDFQA_TRACE_FILE
+# (Chrome trace for .json, JSONL otherwise); at most TRACE_MAX_SPANS are kept in memory
+TRACE_ENABLED = os.getenv("PDFQA_TRACE", "0") == "1"
+TRACE_FILE = os.getenv("PDFQA_TRACE_FILE")
+TRACE_MAX_SPANS = 20_000
 # LLM generation limits (smaller responses are faster/cheaper)
 LLM_MAX_TOKENS = 512
 LLM_TEMPERATURE = 0.2
+# Local cache directory shared by on-disk caches (override with PDFQA_CACHE_DIR)
+CACHE_DIR = os.getenv(
+    "PDFQA_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "interactive_pdf_qa")
+)
+# Embedding cache: max chunk vectors kept per embedding model (least recently used are evicted)
+EMBEDDING_CACHE_MAX_ENTRIES = 200_000
+# Per-PDF FAISS indexes saved by content hash, reused across sessions and processes
+INDEX_STORE_DIR = os.path.join(CACHE_DIR, "indexes")
+# Chat history backend: "sqlite" (shared by every process using HISTORY_DB_PATH) or "memory";
+# messages kept per session and recent messages loaded into prompts
+HISTORY_BACKEND = os.getenv("PDFQA_HISTORY_BACKEND", "sqlite")
+HISTORY_DB_PATH = os.getenv("PDFQA_HISTORY_DB", os.path.join(CACHE_DIR, "history.sqlite3"))
+HISTORY_MAX_MESSAGES = 200
+HISTORY_WINDOW_MESSAGES = 12
+# External tool results (see TOOL_CACHE_TTL_SECONDS)
+TOOL_CACHE_DIR = os.path.join(CACHE_DIR, "tools")
 
 
 def load_env() -> None:
@@ -0,0 +1,334 @@
+"""Fit retrieved passages and chat history into a token budget for the QA prompt.
+
+Stuffing whole chunks and the full chat history into the QA prompt makes prompt size
+(and LLM latency) grow with chunk size and session length. ``ContextPacker`` sits
+between retrieval and the QA chain and:
+
+- strips text repeated between adjacent chunks of the same PDF (splitter overlap) and
+  drops duplicate sentences;
+- when the passages exceed ``context_budget`` tokens, keeps the sentences most similar
+  to the standalone question (in document order, gaps marked with "...");
+- keeps recent history turns verbatim and truncates (or summarizes) older ones to
+  stay within ``history_budget`` tokens.
+
+Token counts are estimates from a pluggable ``token_counter`` (by default ~4 characters
+per token) and are reported per request as ``prompt_tokens`` in the chain output. The
+full ``PackStats`` of a request are available inside ``collect_pack_stats()``, which is
+scoped to the calling context like ``tracing.Tracer.trace``, so a packer shared between
+sessions never reports one request's stats to another.
+"""
+from __future__ import annotations
+
+import math
+import re
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.messages import BaseMessage, SystemMessage
+from langchain_core.runnables import Runnable, RunnableLambda
+
+from .config import (
+    CHARS_PER_TOKEN,
+    CHUNK_OVERLAP,
+    CONTEXT_TOKEN_BUDGET,
+    HISTORY_TOKEN_BUDGET,
+    HISTORY_TRUNCATE_CHARS,
+)
+from .hybrid import tokenize
+from .tracing import span
+
+TokenCounter = Callable[[str], int]
+# summarizer(old messages) -> short summary text replacing them in the prompt
+HistorySummarizer = Callable[[Sequence[BaseMessage]], str]
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+|\n\s*\n")
+_MIN_OVERLAP_CHARS = 20
+_GAP = " ... "
+_STOPWORDS = frozenset(
+    "a an and are as at be by do does for from how i in is it of on or the this to was "
+    "what when where which who why with".split()
+)
+
+
+def approx_token_count(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN) if text else 0
+
+
+def split_sentences(text: str) -> List[str]:
+    return [s.strip() for s in _SENTENCE_RE.split(text) if s and s.strip()]
+
+
+def _overlap(head: str, tail: str, max_chars: int) -> int:
+    """Length of the longest suffix of ``head`` that is also a prefix of ``tail``."""
+    for size in range(min(len(head), len(tail), max_chars), _MIN_OVERLAP_CHARS - 1, -1):
+        if head.endswith(tail[:size]):
+            return size
+    return 0
+
+
+def strip_adjacent_overlap(documents: Sequence[Document], max_chars: int = 2 * CHUNK_OVERLAP) -> List[str]:
+    """Chunk texts with text already present in another chunk of the same source removed."""
+    texts: List[str] = []
+    for i, doc in enumerate(documents):
+        text = doc.page_content
+        source = doc.metadata.get("source")
+        for prev_doc, prev in zip(documents[:i], texts):
+            if source is None or prev_doc.metadata.get("source") != source:
+                continue
+            cut = _overlap(prev, text, max_chars)
+            if cut:
+                text = text[cut:]
+            cut = _overlap(text, prev, max_chars)
+            if cut:
+                text = text[:-cut]
+        texts.append(text)
+    return texts
+
+
+@dataclass
+class PackStats:
+    """Estimated prompt tokens for one request, after and before packing."""
+
+    context_tokens: int = 0
+    history_tokens: int = 0
+    question_tokens: int = 0
+    overhead_tokens: int = 0
+    raw_context_tokens: int = 0
+    raw_history_tokens: int = 0
+
+    @property
+    def prompt_tokens(self) -> int:
+        return self.context_tokens + self.history_tokens + self.question_tokens + self.overhead_tokens
+
+    @property
+    def saved_tokens(self) -> int:
+        return (self.raw_context_tokens - self.context_tokens) + (
+            self.raw_history_tokens - self.history_tokens
+        )
+
+
+# Stats collected by the innermost ``collect_pack_stats`` of the current context
+_collected: ContextVar[Optional[List[PackStats]]] = ContextVar("pdfqa_pack_stats", default=None)
+
+
+@contextmanager
+def collect_pack_stats() -> Iterator[List[PackStats]]:
+    """Collect the ``PackStats`` of every packing done in this context, in order.
+
+    Chain steps running in copies of the context (LangChain's executors,
+    ``run_branches``) append to the same list. Empty after an answer cache hit.
+    """
+    stats: List[PackStats] = []
+    token = _collected.set(stats)
+    try:
+        yield stats
+    finally:
+        _collected.reset(token)
+
+
+class ContextPacker:
+    """Trims retrieved chunks and chat history to fit the QA prompt's token budget."""
+
+    def __init__(
+        self,
+        context_budget: int = CONTEXT_TOKEN_BUDGET,
+        history_budget: int = HISTORY_TOKEN_BUDGET,
+        token_counter: TokenCounter = approx_token_count,
+        embeddings: Optional[Embeddings] = None,
+        summarizer: Optional[HistorySummarizer] = None,
+        truncate_chars: int = HISTORY_TRUNCATE_CHARS,
+    ):
+        self.context_budget = context_budget
+        self.history_budget = history_budget
+        self.count = token_counter
+        self.embeddings = embeddings
+        self.summarizer = summarizer
+        self.truncate_chars = truncate_chars
+        self.requests = 0
+        self.total_prompt_tokens = 0
+        self.total_saved_tokens = 0
+        self._lock = threading.Lock()
+
+    # ---------------------------
+    # Retrieved passages
+    # ---------------------------
+
+    def _lexical_scores(self, question: str, sentences: Sequence[str]) -> np.ndarray:
+        terms = [t for t in set(tokenize(question)) if t not in _STOPWORDS]
+        bags = [Counter(tokenize(s)) for s in sentences]
+        n = len(bags)
+        scores = np.zeros(n, dtype=np.float32)
+        for term in terms:
+            df = sum(1 for bag in bags if term in bag)
+            if not df:
+                continue
+            idf = math.log(1.0 + n / df)
+            scores += np.asarray([idf if term in bag else 0.0 for bag in bags], dtype=np.float32)
+        lengths = np.asarray([math.sqrt(1 + sum(bag.values())) for bag in bags], dtype=np.float32)
+        return scores / lengths
+
+    def _semantic_scores(self, question: str, sentences: Sequence[str]) -> np.ndarray:
+        vectors = np.asarray(self.embeddings.embed_documents(list(sentences)), dtype=np.float32)
+        query = np.asarray(self.embeddings.embed_query(question), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1) * (np.linalg.norm(query) or 1.0)
+        return (vectors @ query) / np.where(norms == 0, 1.0, norms)
+
+    def pack_documents(self, question: str, documents: Sequence[Document]) -> Tuple[List[Document], int, int]:
+        """Return ``(packed documents, packed tokens, raw tokens)``."""
+        raw_tokens = sum(self.count(d.page_content) for d in documents)
+        seen = set()
+        units: List[Tuple[int, int, str, int]] = []  # (doc, position, sentence, tokens)
+        for d, text in enumerate(strip_adjacent_overlap(documents)):
+            for sentence in split_sentences(text):
+                key = " ".join(sentence.lower().split())
+                if key in seen:
+                    continue
+                seen.add(key)
+                units.append((d, len(units), sentence, self.count(sentence)))
+
+        if sum(u[3] for u in units) <= self.context_budget:
+            selected = units
+        else:
+            sentences = [u[2] for u in units]
+            if self.embeddings is not None:
+                scores = self._semantic_scores(question, sentences)
+            else:
+                scores = self._lexical_scores(question, sentences)
+            # Best sentences first; ties go to higher-ranked chunks. Sentences sharing nothing
+            # with the question are only used when nothing else matches.
+            order = sorted(range(len(units)), key=lambda i: (-float(scores[i]), units[i][0], i))
+            if float(scores[order[0]]) > 0:
+                order = [i for i in order if scores[i] > 0]
+            budget = self.context_budget
+            chosen = []
+            for i in order:
+                if units[i][3] <= budget:
+                    chosen.append(i)
+                    budget -= units[i][3]
+            selected = [units[i] for i in sorted(chosen)]
+
+        by_doc: Dict[int, List[Tuple[int, str]]] = {}
+        for d, position, sentence, _ in selected:
+            by_doc.setdefault(d, []).append((position, sentence))
+        packed: List[Document] = []
+        tokens = 0
+        for d, doc in enumerate(documents):
+            parts = by_doc.get(d)
+            if not parts:
+                continue
+            text = parts[0][1]
+            for (prev_pos, _), (pos, sentence) in zip(parts, parts[1:]):
+                text += (" " if pos == prev_pos + 1 else _GAP) + sentence
+            tokens += self.count(text)
+            packed.append(Document(page_content=text, metadata=dict(doc.metadata)))
+        return packed, tokens, raw_tokens
+
+    # ---------------------------
+    # Chat history
+    # ---------------------------
+
+    def _truncate(self, message: BaseMessage) -> BaseMessage:
+        text = str(message.content)
+        sentences = split_sentences(text)
+        short = sentences[0] if sentences else text
+        if len(short) > self.truncate_chars:
+            short = short[: self.truncate_chars].rstrip()
+        if short != text:
+            short += _GAP.rstrip()
+        return type(message)(content=short)
+
+    def pack_history(self, messages: Sequence[BaseMessage]) -> Tuple[List[BaseMessage], int, int]:
+        """Return ``(packed messages, packed tokens, raw tokens)``; newest turns win."""
+        sizes = [self.count(str(m.content)) for m in messages]
+        raw_tokens = sum(sizes)
+        if raw_tokens <= self.history_budget:
+            return list(messages), raw_tokens, raw_tokens
+
+        budget = self.history_budget
+        recent: List[BaseMessage] = []
+        i = len(messages)
+        while i > 0 and sizes[i - 1] <= budget:
+            i -= 1
+            budget -= sizes[i]
+            recent.insert(0, messages[i])
+        older = messages[:i]
+
+        condensed: List[BaseMessage] = []
+        if older and self.summarizer is not None:
+            summary = SystemMessage(content=f"Summary of the earlier conversation: {self.summarizer(older)}")
+            if self.count(str(summary.content)) <= budget:
+                condensed = [summary]
+        elif older:
+            for message in reversed(older):
+                short = self._truncate(message)
+                size = self.count(str(short.content))
+                if size > budget:
+                    break
+                budget -= size
+                condensed.insert(0, short)
+        packed = condensed + recent
+        return packed, sum(self.count(str(m.content)) for m in packed), raw_tokens
+
+    # ---------------------------
+    # Chain integration
+    # ---------------------------
+
+    def pack(
+        self,
+        question: str,
+        documents: Sequence[Document],
+        history: Sequence[BaseMessage],
+        user_input: str = "",
+        overhead_tokens: int = 0,
+    ) -> Tuple[List[Document], List[BaseMessage], PackStats]:
+        with span("context.pack") as s:
+            docs, context_tokens, raw_context = self.pack_documents(question, documents)
+            messages, history_tokens, raw_history = self.pack_history(history)
+            s.set(context_tokens=context_tokens, history_tokens=history_tokens)
+        stats = PackStats(
+            context_tokens=context_tokens,
+            history_tokens=history_tokens,
+            question_tokens=self.count(user_input or question),
+            overhead_tokens=overhead_tokens,
+            raw_context_tokens=raw_context,
+            raw_history_tokens=raw_history,
+        )
+        with self._lock:
+            self.requests += 1
+            self.total_prompt_tokens += stats.prompt_tokens
+            self.total_saved_tokens += stats.saved_tokens
+        collected = _collected.get()
+        if collected is not None:
+            collected.append(stats)
+        return docs, messages, stats
+
+    def as_runnable(self, prompt: Optional[Any] = None) -> Runnable:
+        """Chain step replacing ``context`` and ``chat_history`` with packed versions.
+
+        ``prompt`` (the QA prompt) is only used to count its fixed instruction tokens.
+        """
+        overhead = 0
+        if prompt is not None:
+            try:
+                overhead = self.count(prompt.format(context="", chat_history=[], input=""))
+            except (KeyError, ValueError):
+                overhead = 0
+
+        def _pack(inputs: Dict[str, Any]) -> Dict[str, Any]:
+            docs, history, stats = self.pack(
+                inputs.get("standalone_question") or inputs["input"],
+                inputs.get("context") or [],
+                inputs.get("chat_history") or [],
+                inputs.get("input", ""),
+                overhead,
+            )
+            return {**inputs, "context": docs, "chat_history": history, "prompt_tokens": stats.prompt_tokens}
+
+        return RunnableLambda(_pack, name="context_packer")
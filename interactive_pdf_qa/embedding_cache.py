@@ -0,0 +1,318 @@
+"""Persistent, content-addressed cache for chunk embeddings.
+
+Vectors are stored per embedding model in a memory-mapped float32 array on disk.
+Entries are keyed by a hash of the chunk text, so re-uploading a PDF (or adding one
+PDF to an existing set) only embeds chunks that were never seen before.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager, suppress
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+_INITIAL_CAPACITY = 1024
+# Keys per SQL ``IN (...)`` lookup (below SQLite's bound-variable limit)
+_LOOKUP_BATCH = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    slot INTEGER NOT NULL UNIQUE,
+    used INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_used ON entries (used);
+CREATE TABLE IF NOT EXISTS free_slots (slot INTEGER PRIMARY KEY);
+CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+"""
+
+
+def text_key(text: str) -> str:
+    """Content hash used as the cache key for a chunk."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _model_slug(model_name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.+-]+", "_", model_name).strip("_") or "model"
+
+
+class EmbeddingCache:
+    """LRU-capped vector cache shared by every process using the same directory.
+
+    Layout inside ``<directory>/<model>/``:
+      - ``vectors.<generation>.f32``: raw float32 rows of the model's dimension,
+        memory-mapped
+      - ``index.sqlite3``: key -> slot, a logical LRU clock per key, the free slots and
+        the current vector file generation
+
+    Every lookup and insert runs in one ``BEGIN IMMEDIATE`` transaction, which
+    serializes them across threads and processes, and touches only the rows of its own
+    keys. The vector file only grows in place, so other processes' memory maps stay
+    valid. Vectors are only written to slots no entry references (free or never used)
+    and become visible when their entries commit. An interrupted insert therefore
+    never leaves a key pointing at the wrong vector. Evicted slots are reused, so the
+    file never grows past ``max_entries`` rows. A change of vector size starts a new
+    generation with a new, empty file rather than truncating the mapped one; other
+    processes see the new generation in SQLite and remap.
+    """
+
+    def __init__(self, directory: str, model_name: str, max_entries: int, timeout: float = 30.0):
+        self.max_entries = max(1, int(max_entries))
+        self._dir = Path(directory) / _model_slug(model_name)
+        self._db_path = self._dir / "index.sqlite3"
+        self.timeout = timeout
+        self._local = threading.local()
+        self._map_lock = threading.Lock()
+        self._vectors: Optional[np.memmap] = None
+        self._vectors_generation = -1
+        self._dir.mkdir(parents=True, exist_ok=True)
+        self._connect().executescript(_SCHEMA)
+        with self._transaction() as conn:
+            generation = self._meta(conn, "generation") or 0
+            self._vectors_path(generation).touch(exist_ok=True)
+            self._remove_stale_files(generation)
+
+    # ---------------------------
+    # Storage
+    # ---------------------------
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite3 connections are not shared between threads; keep one per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self._db_path), timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Exclusive (across processes) read-modify-write transaction."""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    @staticmethod
+    def _meta(conn: sqlite3.Connection, name: str) -> Optional[int]:
+        row = conn.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return None if row is None else int(row[0])
+
+    @staticmethod
+    def _set_meta(conn: sqlite3.Connection, name: str, value: int) -> None:
+        conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)", (name, value))
+
+    def _tick(self, conn: sqlite3.Connection) -> int:
+        clock = (self._meta(conn, "clock") or 0) + 1
+        self._set_meta(conn, "clock", clock)
+        return clock
+
+    def _vectors_path(self, generation: int) -> Path:
+        return self._dir / f"vectors.{generation}.f32"
+
+    def _remove_stale_files(self, generation: int) -> None:
+        """Unlink vector files of other generations (call inside a transaction).
+
+        Processes still mapping one keep reading it until they remap; its data is only
+        freed once every map is gone.
+        """
+        for path in self._dir.glob("vectors.*.f32"):
+            if path != self._vectors_path(generation):
+                with suppress(OSError):
+                    path.unlink()
+
+    def _view(self, dim: int, rows: int, generation: int) -> np.memmap:
+        """Memory map covering at least ``rows`` rows of ``generation``'s file.
+
+        Remapped after the file grew or a new generation replaced it.
+        """
+        with self._map_lock:
+            vectors = self._vectors
+            if (
+                vectors is None
+                or self._vectors_generation != generation
+                or vectors.shape[1] != dim
+                or vectors.shape[0] < rows
+            ):
+                path = self._vectors_path(generation)
+                total = os.path.getsize(path) // (4 * dim)
+                vectors = np.memmap(path, dtype=np.float32, mode="r+", shape=(total, dim))
+                self._vectors = vectors
+                self._vectors_generation = generation
+            return vectors
+
+    def _reset(self, conn: sqlite3.Connection, dim: int) -> int:
+        """Start over for a new vector size (the model changed under the same name).
+
+        Runs inside the caller's transaction. Entries restart in a new generation with
+        an empty vector file; the old file is unlinked, never truncated, since other
+        processes may still have it mapped. Returns the new generation.
+        """
+        generation = (self._meta(conn, "generation") or 0) + 1
+        conn.execute("DELETE FROM entries")
+        conn.execute("DELETE FROM free_slots")
+        self._set_meta(conn, "generation", generation)
+        self._set_meta(conn, "dim", dim)
+        self._set_meta(conn, "next_slot", 0)
+        self._vectors_path(generation).touch(exist_ok=True)
+        self._remove_stale_files(generation)
+        return generation
+
+    def _slots(self, conn: sqlite3.Connection, keys: Sequence[str]) -> Dict[str, int]:
+        found: Dict[str, int] = {}
+        for i in range(0, len(keys), _LOOKUP_BATCH):
+            batch = keys[i : i + _LOOKUP_BATCH]
+            marks = ",".join("?" * len(batch))
+            found.update(conn.execute(f"SELECT key, slot FROM entries WHERE key IN ({marks})", batch))
+        return found
+
+    def _allocate(self, conn: sqlite3.Connection, n: int, dim: int, generation: int) -> List[int]:
+        """Up to ``n`` unreferenced slots: free ones first, then new rows at the end."""
+        slots = [row[0] for row in conn.execute("SELECT slot FROM free_slots LIMIT ?", (n,))]
+        next_slot = self._meta(conn, "next_slot") or 0
+        fresh = max(0, min(n - len(slots), self.max_entries - next_slot))
+        if fresh:
+            slots.extend(range(next_slot, next_slot + fresh))
+            path = self._vectors_path(generation)
+            rows = os.path.getsize(path) // (4 * dim)
+            if next_slot + fresh > rows:
+                capacity = max(_INITIAL_CAPACITY, rows)
+                while capacity < next_slot + fresh:
+                    capacity *= 2
+                # Growing in place keeps existing memory maps (here and elsewhere) valid
+                os.truncate(path, min(capacity, self.max_entries) * 4 * dim)
+        return slots
+
+    # ---------------------------
+    # Lookups and inserts
+    # ---------------------------
+
+    def __len__(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def get_many(self, keys: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """Return cached vectors (or None) for each key, refreshing their LRU position."""
+        keys = list(keys)
+        with self._transaction() as conn:
+            dim = self._meta(conn, "dim")
+            found = self._slots(conn, keys) if dim else {}
+            if not found:
+                return [None] * len(keys)
+            clock = self._tick(conn)
+            conn.executemany("UPDATE entries SET used = ? WHERE key = ?", [(clock, k) for k in found])
+            # Copy while holding the lock, so no eviction can reuse these slots meanwhile
+            generation = self._meta(conn, "generation") or 0
+            vectors = self._view(dim, max(found.values()) + 1, generation)
+            return [None if key not in found else np.array(vectors[found[key]]) for key in keys]
+
+    def put_many(self, keys: Sequence[str], vectors: Sequence[Sequence[float]]) -> None:
+        """Insert vectors, evicting the least recently used entries when full."""
+        if not keys:
+            return
+        arr = np.asarray(vectors, dtype=np.float32)
+        dim = arr.shape[1]
+        rows = dict(zip(keys, arr))
+        while True:
+            with self._transaction() as conn:
+                generation = self._meta(conn, "generation") or 0
+                if self._meta(conn, "dim") != dim:
+                    generation = self._reset(conn, dim)
+                clock = self._tick(conn)
+                # Content-addressed: a key already present holds this vector already
+                present = self._slots(conn, list(rows))
+                conn.executemany("UPDATE entries SET used = ? WHERE key = ?", [(clock, k) for k in present])
+                new_keys = [k for k in rows if k not in present][-self.max_entries :]
+                if not new_keys:
+                    return
+                slots = self._allocate(conn, len(new_keys), dim, generation)
+                if len(slots) < len(new_keys):
+                    # Free the slots first, in their own commit, then retry
+                    if self._evict(conn, len(new_keys) - len(slots), exclude=set(present)):
+                        continue
+                    if not slots:
+                        return
+                    new_keys = new_keys[: len(slots)]
+                view = self._view(dim, max(slots) + 1, generation)
+                view[slots] = np.stack([rows[k] for k in new_keys])
+                view.flush()
+                conn.executemany(
+                    "INSERT INTO entries (key, slot, used) VALUES (?, ?, ?)",
+                    [(k, slot, clock) for k, slot in zip(new_keys, slots)],
+                )
+                conn.executemany("DELETE FROM free_slots WHERE slot = ?", [(slot,) for slot in slots])
+                self._set_meta(conn, "next_slot", max((self._meta(conn, "next_slot") or 0), max(slots) + 1))
+                return
+
+    def _evict(self, conn: sqlite3.Connection, n: int, exclude: set) -> int:
+        """Drop up to ``n`` least recently used entries not in ``exclude``; their slots become free."""
+        victims = [
+            (key, slot)
+            for key, slot in conn.execute(
+                "SELECT key, slot FROM entries ORDER BY used LIMIT ?", (n + len(exclude),)
+            )
+            if key not in exclude
+        ][:n]
+        conn.executemany("DELETE FROM entries WHERE key = ?", [(key,) for key, _ in victims])
+        conn.executemany("INSERT INTO free_slots (slot) VALUES (?)", [(slot,) for _, slot in victims])
+        return len(victims)
+
+    def flush(self) -> None:
+        """Write vectors still pending in this process's memory map to disk."""
+        with self._map_lock:
+            if self._vectors is not None:
+                self._vectors.flush()
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that serves document vectors from an ``EmbeddingCache``.
+
+    Only ``embed_documents`` is cached; query embeddings are cheap and rarely repeat.
+    """
+
+    def __init__(self, inner: Embeddings, cache: EmbeddingCache):
+        self.inner = inner
+        self.cache = cache
+        self.hits = 0
+        self.misses = 0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [text_key(t) for t in texts]
+        cached = self.cache.get_many(keys)
+        missing = [i for i, vec in enumerate(cached) if vec is None]
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+
+        if missing:
+            # Embed each distinct unseen text once, even if it repeats within the batch
+            unique: "OrderedDict[str, str]" = OrderedDict()
+            for i in missing:
+                unique.setdefault(keys[i], texts[i])
+            new_vectors = self.inner.embed_documents(list(unique.values()))
+            self.cache.put_many(list(unique.keys()), new_vectors)
+            by_key = dict(zip(unique.keys(), new_vectors))
+            for i in missing:
+                cached[i] = by_key[keys[i]]
+
+        return [np.asarray(vec, dtype=np.float32).tolist() for vec in cached]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.inner.embed_query(text)
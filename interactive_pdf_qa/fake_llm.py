@@ -0,0 +1,77 @@
+"""Deterministic local chat model for tests, benchmarks and offline batch runs.
+
+``FakeChatModel`` needs no network or API key. Given a prompt with retrieved context
+(the QA prompt puts it in the system message) it answers with the context sentence
+that shares the most terms with the question; for any other prompt (history rewrite,
+synthesis) it returns the last human message unchanged. ``latency`` adds a fixed delay
+per call to mimic a remote model.
+"""
+from __future__ import annotations
+
+import re
+import time
+from typing import Any, Iterator, List, Optional
+
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import SimpleChatModel
+from langchain_core.messages import AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGenerationChunk
+
+_WORD_RE = re.compile(r"\w+")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+|\n\s*\n")
+_STOPWORDS = frozenset("and are can does for from has have how the this was what when where which who why with".split())
+
+
+def _terms(text: str) -> set:
+    return {w for w in _WORD_RE.findall(text.lower()) if len(w) > 2 and w not in _STOPWORDS}
+
+
+class FakeChatModel(SimpleChatModel):
+    """Extractive, deterministic stand-in for the Groq chat model."""
+
+    latency: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-extractive"
+
+    def _answer(self, messages: List[BaseMessage]) -> str:
+        question = next((str(m.content) for m in reversed(messages) if m.type == "human"), "")
+        system = next((str(m.content) for m in messages if m.type == "system"), "")
+        _, _, context = system.partition("\n\n")
+        if not context.strip():
+            return question
+        wanted = _terms(question)
+        sentences = [s.strip() for s in _SENTENCE_RE.split(context) if s.strip()]
+        if not sentences:
+            return "I don't know."
+        best = max(sentences, key=lambda s: len(wanted & _terms(s)))
+        if not wanted & _terms(best):
+            return "I don't know."
+        return " ".join(best.split())
+
+    def _call(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> str:
+        if self.latency:
+            time.sleep(self.latency)
+        return self._answer(messages)
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        if self.latency:
+            time.sleep(self.latency)
+        for token in re.findall(r"\S+\s*", self._answer(messages)):
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager is not None:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
@@ -0,0 +1,115 @@
+"""Content fingerprints for uploaded PDFs and per-file change detection.
+
+Uploads are hashed in fixed-size chunks over a memoryview of their buffer, so hashing
+never makes another full copy of the file. The set signature is order-independent,
+and ``diff_hashes`` tells the indexing layer exactly which files were added or removed.
+"""
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+HASH_CHUNK_SIZE = 1 << 20
+
+
+def _new_hash():
+    return hashlib.sha256()
+
+
+def hash_buffer(data) -> str:
+    """Hash bytes-like data chunk by chunk without copying it."""
+    digest = _new_hash()
+    with memoryview(data) as view:
+        view = view.cast("B")
+        for start in range(0, len(view), HASH_CHUNK_SIZE):
+            digest.update(view[start : start + HASH_CHUNK_SIZE])
+    return digest.hexdigest()
+
+
+def hash_stream(stream) -> str:
+    """Hash a binary file object from its start, restoring its position afterwards."""
+    digest = _new_hash()
+    position = stream.tell()
+    stream.seek(0)
+    try:
+        for chunk in iter(lambda: stream.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    finally:
+        stream.seek(position)
+    return digest.hexdigest()
+
+
+def hash_file(path: str) -> str:
+    with open(path, "rb") as fh:
+        return hash_stream(fh)
+
+
+def _memo_key(uploaded_file) -> Optional[Tuple[str, int]]:
+    file_id = getattr(uploaded_file, "file_id", None)
+    if file_id is None:
+        return None
+    return file_id, getattr(uploaded_file, "size", -1)
+
+
+def hash_upload(uploaded_file, memo: Optional[Dict] = None) -> str:
+    """Content hash of an uploaded file (Streamlit ``UploadedFile`` or any BytesIO).
+
+    ``memo`` caches hashes by upload id, so Streamlit reruns do not rehash unchanged files.
+    """
+    key = _memo_key(uploaded_file)
+    if memo is not None and key is not None and key in memo:
+        return memo[key]
+
+    getbuffer = getattr(uploaded_file, "getbuffer", None)
+    if getbuffer is not None:
+        with getbuffer() as view:
+            digest = hash_buffer(view)
+    else:
+        digest = hash_stream(uploaded_file)
+
+    if memo is not None and key is not None:
+        memo[key] = digest
+    return digest
+
+
+def hash_uploads(uploaded_files: Iterable, memo: Optional[Dict] = None) -> Dict[str, object]:
+    """Map content hash -> upload (duplicates collapse), pruning memo entries of gone files."""
+    files = list(uploaded_files)
+    by_hash = {hash_upload(f, memo): f for f in files}
+    if memo is not None:
+        live = {_memo_key(f) for f in files}
+        for stale in [k for k in memo if k not in live]:
+            del memo[stale]
+    return by_hash
+
+
+def set_signature(hashes: Iterable[str]) -> str:
+    """Order-independent signature for a set of content hashes."""
+    digest = _new_hash()
+    for h in sorted(set(hashes)):
+        digest.update(h.encode("ascii"))
+    return digest.hexdigest()
+
+
+@dataclass(frozen=True)
+class UploadDiff:
+    added: Tuple[str, ...]
+    removed: Tuple[str, ...]
+    unchanged: Tuple[str, ...]
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.added or self.removed)
+
+
+def diff_hashes(previous: Iterable[str], current: Iterable[str]) -> UploadDiff:
+    """Per-file diff between two sets of content hashes (order of ``current`` is kept)."""
+    prev = set(previous)
+    cur: List[str] = list(dict.fromkeys(current))
+    cur_set = set(cur)
+    return UploadDiff(
+        added=tuple(h for h in cur if h not in prev),
+        removed=tuple(sorted(prev - cur_set)),
+        unchanged=tuple(h for h in cur if h in prev),
+    )
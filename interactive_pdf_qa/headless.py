@@ -0,0 +1,340 @@
+"""Headless (non-Streamlit) batch QA over a folder of PDFs.
+
+    python -m interactive_pdf_qa.headless ./pdfs questions.jsonl -o answers.jsonl --llm fake
+    python -m interactive_pdf_qa.headless ./pdfs questions.jsonl --llm groq --concurrency 8
+    python -m interactive_pdf_qa.headless ./pdfs questions.jsonl --llm fake --fake-embeddings
+
+Each line of the questions file is a JSON object with ``question`` and optionally
+``id`` and ``session_id``. Questions sharing a ``session_id`` are answered in order
+with chat history (from the configured history backend); the rest run without
+history. Up to ``concurrency`` questions (retrieval plus LLM calls) run at once. One
+JSON line per question is written in input order, with its latency, and throughput is
+reported at the end. ``--llm fake --fake-embeddings`` needs no network, API key or
+embedding model (e.g. for CI).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Mapping, Optional
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.runnables.history import RunnableWithMessageHistory
+
+from .config import CONTEXT_PACKING, HEADLESS_CONCURRENCY, HEADLESS_LLM
+from .context_packing import ContextPacker
+from .fingerprint import UploadDiff, hash_file
+from .history_store import HistoryStore, open_history_store
+from .index_manager import IndexManager
+from .index_store import IndexStore, default_namespace
+from .ingest import StreamingIngestor
+from .pdf_utils import iter_documents_from_pdfs
+from .rag import build_contextualize_prompt, build_qa_prompt, build_question_rewriter, build_rag_chain
+from .rewrite_gate import RewriteGate
+
+
+def _fake_llm() -> BaseChatModel:
+    from .fake_llm import FakeChatModel
+
+    return FakeChatModel()
+
+
+def _groq_llm() -> BaseChatModel:
+    from .config import load_env
+    from .resources import create_llm
+
+    load_env()
+    api_key = os.getenv("GROQ_API_KEY")
+    if not api_key:
+        raise ValueError("Set GROQ_API_KEY to use the groq LLM (or use --llm fake)")
+    return create_llm(api_key)
+
+
+def _named_pages(path: Path) -> Iterator[Document]:
+    for page in iter_documents_from_pdfs([str(path)]):
+        # Same ``source`` as the app gives an upload of this file (its name), since
+        # the index store is shared by content hash
+        page.metadata["source"] = path.name
+        yield page
+
+
+# Deterministic hash embeddings (as in the benchmarks): no model download, offline runs
+FAKE_EMBEDDING_SIZE = 384
+FAKE_EMBEDDING_SIGNATURE = f"fake-hash-{FAKE_EMBEDDING_SIZE}"
+
+
+def fake_embeddings() -> Embeddings:
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+
+    return DeterministicFakeEmbedding(size=FAKE_EMBEDDING_SIZE)
+
+
+LLM_FACTORIES: Mapping[str, Callable[[], BaseChatModel]] = {
+    "fake": _fake_llm,
+    "groq": _groq_llm,
+}
+
+
+@dataclass
+class QAResult:
+    question: str
+    id: Any = None
+    session_id: Optional[str] = None
+    answer: str = ""
+    latency: float = 0.0
+    prompt_tokens: Optional[int] = None
+    sources: List[Dict[str, Any]] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+@dataclass
+class RunSummary:
+    questions: int = 0
+    errors: int = 0
+    wall_seconds: float = 0.0
+    latencies: List[float] = field(default_factory=list, repr=False)
+
+    @property
+    def throughput(self) -> float:
+        return self.questions / self.wall_seconds if self.wall_seconds else 0.0
+
+    def percentile(self, q: float) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "questions": self.questions,
+            "errors": self.errors,
+            "wall_seconds": round(self.wall_seconds, 3),
+            "questions_per_sec": round(self.throughput, 3),
+            "latency_p50": round(self.percentile(0.50), 3),
+            "latency_p95": round(self.percentile(0.95), 3),
+        }
+
+
+class HeadlessQA:
+    """The app's RAG pipeline without Streamlit: index a folder, answer questions."""
+
+    def __init__(
+        self,
+        llm: BaseChatModel,
+        embeddings: Optional[Embeddings] = None,
+        index_store: Optional[IndexStore] = None,
+        history_store: Optional[HistoryStore] = None,
+        concurrency: int = HEADLESS_CONCURRENCY,
+        context_packing: bool = CONTEXT_PACKING,
+    ):
+        if embeddings is None:
+            from .resources import create_embeddings
+
+            embeddings = create_embeddings()
+        self.llm = llm
+        self.embeddings = embeddings
+        self.manager = IndexManager(embeddings, store=index_store)
+        self.history_store = history_store or open_history_store()
+        self.concurrency = max(1, concurrency)
+        self.context_packer = ContextPacker() if context_packing else None
+        self.rewrite_gate = RewriteGate()
+        self._session_locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+        rewriter = build_question_rewriter(llm, build_contextualize_prompt(), self.rewrite_gate)
+        self.rag_chain = build_rag_chain(
+            llm,
+            rewriter,
+            self.manager.as_retriever(),
+            build_qa_prompt(),
+            context_packer=self.context_packer,
+        )
+        self.conversational_chain = RunnableWithMessageHistory(
+            self.rag_chain,
+            self.history_store.get,
+            input_messages_key="input",
+            history_messages_key="chat_history",
+            output_messages_key="answer",
+        )
+
+    # ---------------------------
+    # Indexing
+    # ---------------------------
+
+    def index_folder(self, folder: str) -> UploadDiff:
+        """Make the index match the PDFs under ``folder`` (keyed by content hash)."""
+        paths = {hash_file(str(p)): p for p in sorted(Path(folder).rglob("*.pdf"))}
+        return StreamingIngestor(self.manager).run(
+            {key: (lambda p=p: _named_pages(p)) for key, p in paths.items()}
+        )
+
+    # ---------------------------
+    # Questions
+    # ---------------------------
+
+    def _session_lock(self, session_id: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._session_locks.setdefault(session_id, threading.Lock())
+
+    def ask(self, question: str, session_id: Optional[str] = None, id: Any = None) -> QAResult:
+        """Answer one question; errors are reported in the result, not raised."""
+        result = QAResult(question=question, id=id, session_id=session_id)
+        started = time.perf_counter()
+        try:
+            if session_id is None:
+                output = self.rag_chain.invoke({"input": question, "chat_history": []})
+            else:
+                # Turns of one session depend on each other's history
+                with self._session_lock(session_id):
+                    output = self.conversational_chain.invoke(
+                        {"input": question}, config={"configurable": {"session_id": session_id}}
+                    )
+            result.answer = output.get("answer", "")
+            result.prompt_tokens = output.get("prompt_tokens")
+            result.sources = [
+                {"source": d.metadata.get("source"), "page": d.metadata.get("page")}
+                for d in output.get("context") or []
+            ]
+        except Exception as exc:
+            result.error = f"{type(exc).__name__}: {exc}"
+        result.latency = time.perf_counter() - started
+        return result
+
+    def _submit(self, pool: ThreadPoolExecutor, item: Mapping[str, Any], after: Optional[Future]) -> Future:
+        """Submit one question; with ``after``, only once that future has finished.
+
+        Chaining a turn off its session's previous turn keeps the turns in input order
+        without a waiting turn holding a pool thread.
+        """
+        args = (item["question"], item.get("session_id"), item.get("id"))
+        if after is None:
+            return pool.submit(self.ask, *args)
+        result: Future = Future()
+
+        def copy(done: Future) -> None:
+            try:
+                result.set_result(done.result())
+            except BaseException as exc:
+                result.set_exception(exc)
+
+        def start(_: Future) -> None:
+            if not result.set_running_or_notify_cancel():
+                return
+            try:
+                pool.submit(self.ask, *args).add_done_callback(copy)
+            except RuntimeError as exc:
+                # The pool shut down because the caller stopped consuming results
+                result.set_exception(exc)
+
+        after.add_done_callback(start)
+        return result
+
+    def run(self, questions: Iterable[Mapping[str, Any]]) -> Iterator[QAResult]:
+        """Answer ``questions`` with bounded concurrency, yielding results in input order.
+
+        Questions of one session run one after another, in input order; different
+        sessions and session-less questions run concurrently.
+        """
+        window = 2 * self.concurrency
+        pending: Deque[Future] = deque()
+        last_turn: Dict[str, Future] = {}
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="pdfqa-qa") as pool:
+            try:
+                for item in questions:
+                    session_id = item.get("session_id")
+                    future = self._submit(pool, item, last_turn.get(session_id))
+                    if session_id is not None:
+                        last_turn[session_id] = future
+                    pending.append(future)
+                    if len(pending) >= window:
+                        yield pending.popleft().result()
+                while pending:
+                    yield pending.popleft().result()
+            finally:
+                for future in pending:
+                    future.cancel()
+
+
+def read_questions(path: str) -> Iterator[Dict[str, Any]]:
+    with open(path, encoding="utf-8") as fh:
+        for n, line in enumerate(fh, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            if isinstance(item, str):
+                item = {"question": item}
+            item.setdefault("id", n)
+            yield item
+
+
+def run_batch(qa: HeadlessQA, questions: Iterable[Mapping[str, Any]], out) -> RunSummary:
+    """Answer ``questions`` and write one JSON line per result to ``out``."""
+    summary = RunSummary()
+    started = time.perf_counter()
+    for result in qa.run(questions):
+        summary.questions += 1
+        summary.errors += result.error is not None
+        summary.latencies.append(result.latency)
+        record = asdict(result)
+        record["latency"] = round(result.latency, 4)
+        out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        out.flush()
+    summary.wall_seconds = time.perf_counter() - started
+    return summary
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("folder", help="Folder of PDFs (searched recursively)")
+    parser.add_argument("questions", help="JSONL file of questions")
+    parser.add_argument("-o", "--output", help="Answers JSONL (default: stdout)")
+    parser.add_argument("--llm", choices=sorted(LLM_FACTORIES), default=HEADLESS_LLM)
+    parser.add_argument("--concurrency", type=int, default=HEADLESS_CONCURRENCY)
+    parser.add_argument(
+        "--fake-embeddings",
+        action="store_true",
+        help="Deterministic hash embeddings instead of the embedding model (offline, e.g. CI)",
+    )
+    parser.add_argument("--no-store", action="store_true", help="Do not read or write the index store")
+    parser.add_argument("--history", choices=["sqlite", "memory"], default="memory")
+    args = parser.parse_args(argv)
+
+    # Fake vectors are stored apart from the model's, so neither is served for the other
+    namespace = default_namespace(FAKE_EMBEDDING_SIGNATURE) if args.fake_embeddings else None
+    qa = HeadlessQA(
+        LLM_FACTORIES[args.llm](),
+        embeddings=fake_embeddings() if args.fake_embeddings else None,
+        index_store=None if args.no_store else IndexStore(namespace=namespace),
+        history_store=open_history_store(args.history),
+        concurrency=args.concurrency,
+    )
+    started = time.perf_counter()
+    diff = qa.index_folder(args.folder)
+    print(
+        f"indexed {len(diff.added)} PDF(s), {qa.manager.num_vectors} chunks "
+        f"in {time.perf_counter() - started:.2f}s",
+        file=sys.stderr,
+    )
+
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        summary = run_batch(qa, read_questions(args.questions), out)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(json.dumps(summary.as_dict()), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,38 @@
 """Chat history helpers for session-scoped histories in Streamlit."""
+from uuid import uuid4
+
 import streamlit as st
-from langchain_community.chat_message_histories import ChatMessageHistory
 from langchain_core.chat_history import BaseChatMessageHistory
 from langchain_core.runnables.history import RunnableWithMessageHistory
 
+from .history_store import HistoryStore, open_history_store
+
+
+@st.cache_resource(show_spinner=False)
+def get_history_store() -> HistoryStore:
+    """Create and cache the configured history backend (shared by all sessions)."""
+    return open_history_store()
+
+
+def ensure_store() -> HistoryStore:
+    """Ensure the chat history backend is open."""
+    return get_history_store()
+
+
+def default_session_id() -> str:
+    """A random session id for this browser session, kept across reruns.
 
-def ensure_store():
-    """Ensure a place in session_state to keep per-session chat histories."""
-    if "store" not in st.session_state:
-        st.session_state.store = {}
+    The history store is shared by every user of the process, so a fixed default
+    would let everyone who keeps it read and extend the same conversation.
+    """
+    if "default_session_id" not in st.session_state:
+        st.session_state["default_session_id"] = uuid4().hex
+    return st.session_state["default_session_id"]
 
 
 def get_session_history(session: str) -> BaseChatMessageHistory:
-    """Get or initialize the chat history object for a given session id."""
-    ensure_store()
-    if session not in st.session_state.store:
-        st.session_state.store[session] = ChatMessageHistory()
-    return st.session_state.store[session]
+    """Get the (bounded, windowed) chat history object for a given session id."""
+    return get_history_store().get(session)
 
 
 def build_conversational_chain(rag_chain):
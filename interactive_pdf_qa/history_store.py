@@ -0,0 +1,181 @@
+"""Bounded chat history backends (SQLite by default, or in-memory).
+
+Histories are capped per session (oldest messages are dropped past ``max_messages``)
+and reading ``messages`` only loads the most recent ``window`` messages, which is all
+the prompts use. Both operations hit an index on (session, id), so the per-request
+cost stays flat however long a session runs.
+
+The SQLite backend runs in WAL mode with a busy timeout, so several app processes
+(replicas behind a load balancer, or the headless runner) can share one database file.
+"""
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Deque, Dict, List, Optional, Sequence
+
+from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.messages import BaseMessage, message_to_dict, messages_from_dict
+
+from .config import HISTORY_BACKEND, HISTORY_DB_PATH, HISTORY_MAX_MESSAGES, HISTORY_WINDOW_MESSAGES
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    message TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS messages_session ON messages (session_id, id);
+"""
+
+
+class HistoryStore(ABC):
+    """Hands out per-session chat histories."""
+
+    @abstractmethod
+    def get(self, session_id: str) -> BaseChatMessageHistory:
+        """The history of ``session_id`` (empty for a new session)."""
+
+    def close(self) -> None:
+        pass
+
+
+# ---------------------------
+# SQLite backend
+# ---------------------------
+
+
+class SQLiteHistoryStore(HistoryStore):
+    """Chat histories in one SQLite database shared by threads and processes."""
+
+    def __init__(
+        self,
+        path: str = HISTORY_DB_PATH,
+        max_messages: int = HISTORY_MAX_MESSAGES,
+        window: int = HISTORY_WINDOW_MESSAGES,
+        timeout: float = 30.0,
+    ):
+        self.path = path
+        self.max_messages = max(1, max_messages)
+        self.window = max(1, window)
+        self.timeout = timeout
+        self._local = threading.local()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite3 connections are not shared between threads; keep one per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def recent(self, session_id: str, limit: Optional[int] = None) -> List[BaseMessage]:
+        rows = self._connect().execute(
+            "SELECT message FROM messages WHERE session_id = ? ORDER BY id DESC LIMIT ?",
+            (session_id, limit or self.window),
+        ).fetchall()
+        return messages_from_dict([json.loads(row[0]) for row in reversed(rows)])
+
+    def append(self, session_id: str, messages: Sequence[BaseMessage]) -> None:
+        if not messages:
+            return
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT INTO messages (session_id, message) VALUES (?, ?)",
+                [(session_id, json.dumps(message_to_dict(m))) for m in messages],
+            )
+            # Keep the newest max_messages rows of this session
+            conn.execute(
+                "DELETE FROM messages WHERE session_id = ? AND id <= ("
+                "SELECT id FROM messages WHERE session_id = ? ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                (session_id, session_id, self.max_messages),
+            )
+
+    def clear(self, session_id: str) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+
+    def get(self, session_id: str) -> BaseChatMessageHistory:
+        return SQLiteChatMessageHistory(self, session_id)
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class SQLiteChatMessageHistory(BaseChatMessageHistory):
+    """One session's history; ``messages`` is the recent window, read on access."""
+
+    def __init__(self, store: SQLiteHistoryStore, session_id: str):
+        self.store = store
+        self.session_id = session_id
+
+    @property
+    def messages(self) -> List[BaseMessage]:  # type: ignore[override]
+        return self.store.recent(self.session_id)
+
+    def add_messages(self, messages: Sequence[BaseMessage]) -> None:
+        self.store.append(self.session_id, list(messages))
+
+    def clear(self) -> None:
+        self.store.clear(self.session_id)
+
+
+# ---------------------------
+# In-memory backend
+# ---------------------------
+
+
+class InMemoryHistoryStore(HistoryStore):
+    """Process-local histories, capped per session (lost on restart)."""
+
+    def __init__(self, max_messages: int = HISTORY_MAX_MESSAGES, window: int = HISTORY_WINDOW_MESSAGES):
+        self.max_messages = max(1, max_messages)
+        self.window = max(1, window)
+        self._sessions: Dict[str, Deque[BaseMessage]] = {}
+        self._lock = threading.Lock()
+
+    def _messages(self, session_id: str) -> Deque[BaseMessage]:
+        with self._lock:
+            return self._sessions.setdefault(session_id, deque(maxlen=self.max_messages))
+
+    def get(self, session_id: str) -> BaseChatMessageHistory:
+        return InMemoryChatMessageHistory(self._messages(session_id), self.window)
+
+
+class InMemoryChatMessageHistory(BaseChatMessageHistory):
+    def __init__(self, buffer: Deque[BaseMessage], window: int):
+        self._buffer = buffer
+        self.window = window
+
+    @property
+    def messages(self) -> List[BaseMessage]:  # type: ignore[override]
+        start = max(0, len(self._buffer) - self.window)
+        return [self._buffer[i] for i in range(start, len(self._buffer))]
+
+    def add_messages(self, messages: Sequence[BaseMessage]) -> None:
+        self._buffer.extend(messages)
+
+    def clear(self) -> None:
+        self._buffer.clear()
+
+
+def open_history_store(backend: str = HISTORY_BACKEND, **kwargs) -> HistoryStore:
+    """Create the configured history backend ("sqlite" or "memory")."""
+    if backend == "sqlite":
+        return SQLiteHistoryStore(**kwargs)
+    if backend == "memory":
+        return InMemoryHistoryStore(**kwargs)
+    raise ValueError(f"Unknown history backend {backend!r}; expected 'sqlite' or 'memory'")
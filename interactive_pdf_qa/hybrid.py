@@ -0,0 +1,133 @@
+"""Keyword (BM25) index, rank fusion and an optional CPU cross-encoder reranker.
+
+Dense vectors miss exact-term lookups such as part numbers and clause IDs. The
+``IndexManager`` keeps a ``BM25Index`` next to FAISS (updated on every add/remove), and
+hybrid retrieval fuses both rankings with reciprocal rank fusion over a larger
+candidate pool. A cross-encoder can then rerank the pool down to the final ``k``.
+"""
+from __future__ import annotations
+
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Container, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from langchain_core.documents import Document
+
+from .config import BM25_B, BM25_K1, RERANKER_MODEL, RRF_K
+from .tracing import span
+
+# Keeps identifiers like "X-200", "4.2.1" or "ISO/IEC" together as one token
+_TOKEN_RE = re.compile(r"[A-Za-z0-9]+(?:[-_./:][A-Za-z0-9]+)*")
+_PART_RE = re.compile(r"[A-Za-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased terms; compound identifiers also contribute their parts."""
+    terms: List[str] = []
+    for match in _TOKEN_RE.finditer(text.lower()):
+        token = match.group(0)
+        terms.append(token)
+        parts = _PART_RE.findall(token)
+        if len(parts) > 1:
+            terms.extend(parts)
+    return terms
+
+
+class BM25Index:
+    """Incremental Okapi BM25 inverted index over integer document ids."""
+
+    def __init__(self, k1: float = BM25_K1, b: float = BM25_B):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[int, int]] = defaultdict(dict)
+        self._doc_terms: Dict[int, List[str]] = {}
+        self._doc_len: Dict[int, int] = {}
+        self._total_len = 0
+
+    def __len__(self) -> int:
+        return len(self._doc_len)
+
+    def add(self, doc_id: int, text: str) -> None:
+        counts = Counter(tokenize(text))
+        for term, tf in counts.items():
+            self._postings[term][doc_id] = tf
+        self._doc_terms[doc_id] = list(counts)
+        length = sum(counts.values())
+        self._doc_len[doc_id] = length
+        self._total_len += length
+
+    def remove(self, doc_ids: Iterable[int]) -> None:
+        for doc_id in doc_ids:
+            for term in self._doc_terms.pop(doc_id, []):
+                postings = self._postings.get(term)
+                if postings is not None:
+                    postings.pop(doc_id, None)
+                    if not postings:
+                        del self._postings[term]
+            self._total_len -= self._doc_len.pop(doc_id, 0)
+
+    def search(self, query: str, k: int, allowed: Optional[Container[int]] = None) -> List[Tuple[int, float]]:
+        """Top ``k`` ``(id, score)`` pairs, considering only ids in ``allowed`` if given."""
+        n = len(self._doc_len)
+        if not n:
+            return []
+        avg_len = self._total_len / n or 1.0
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1.0 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, tf in postings.items():
+                if allowed is not None and doc_id not in allowed:
+                    continue
+                norm = self.k1 * (1.0 - self.b + self.b * self._doc_len[doc_id] / avg_len)
+                scores[doc_id] += idf * tf * (self.k1 + 1.0) / (tf + norm)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[int]], k: int = RRF_K) -> List[Tuple[int, float]]:
+    """Fuse ranked id lists: score(id) = sum over lists of 1 / (k + rank)."""
+    scores: Dict[int, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] += 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+class CrossEncoderReranker:
+    """Reranks candidate chunks with a small sentence-transformers cross-encoder on CPU."""
+
+    def __init__(self, model_name: str = RERANKER_MODEL, batch_size: int = 16):
+        from sentence_transformers import CrossEncoder
+
+        self.model = CrossEncoder(model_name, device="cpu")
+        self.batch_size = batch_size
+
+    def rerank(self, query: str, documents: Sequence[Document], top_n: int) -> List[Document]:
+        if len(documents) <= 1:
+            return list(documents)[:top_n]
+        with span("rerank", candidates=len(documents)):
+            scores = self.model.predict(
+                [(query, d.page_content) for d in documents],
+                batch_size=self.batch_size,
+                show_progress_bar=False,
+            )
+        order = sorted(range(len(documents)), key=lambda i: float(scores[i]), reverse=True)
+        return [documents[i] for i in order[:top_n]]
+
+
+def fuse_and_rerank(
+    query: str,
+    vector_ranking: Sequence[int],
+    keyword_ranking: Sequence[int],
+    lookup,
+    k: int,
+    reranker: Optional[CrossEncoderReranker] = None,
+) -> List[Document]:
+    """RRF over both rankings, then optional rerank; ``lookup(id)`` returns a Document."""
+    fused = [doc_id for doc_id, _ in reciprocal_rank_fusion([vector_ranking, keyword_ranking])]
+    if reranker is None:
+        return [lookup(doc_id) for doc_id in fused[:k]]
+    return reranker.rerank(query, [lookup(doc_id) for doc_id in fused], k)
@@ -0,0 +1,336 @@
+"""Incremental FAISS index that tracks which source PDF owns which vectors.
+
+Instead of rebuilding the whole vector store when the upload set changes, the
+``IndexManager`` adds vectors only for new PDFs and removes vectors only for PDFs
+that were dropped. Vectors are stored under stable int64 ids (``IndexIDMap2``) so
+removals never renumber the rest of the index. The FAISS index type (flat, IVF, HNSW,
+IVF-PQ) follows the corpus size and is rebuilt as the corpus grows; see ``ann_index``.
+"""
+from __future__ import annotations
+
+import threading
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+
+from .ann_index import (
+    IndexSpec,
+    build_index,
+    choose_spec,
+    needs_rebuild,
+    new_index,
+    reconstruct_ids,
+    search_selected,
+    supports_remove,
+    tune,
+)
+from .config import ANN_INDEX_TYPE, HYBRID_CANDIDATE_K, HYBRID_RETRIEVAL, PREFILTER_EXACT_MAX, RETRIEVAL_K
+from .fingerprint import UploadDiff, diff_hashes
+from .hybrid import BM25Index, CrossEncoderReranker, fuse_and_rerank
+from .metadata_index import ChunkFilter, ChunkMetadataIndex
+from .tracing import span
+
+if TYPE_CHECKING:
+    from .index_store import IndexStore
+
+
+class IndexManager:
+    """Owns a FAISS vector store and the vector ids belonging to each source.
+
+    With an ``IndexStore`` attached, sources are keyed by PDF content hash: stored
+    sources are attached from disk instead of being parsed and embedded, and newly
+    embedded sources are saved for other sessions.
+
+    All mutations and searches take an internal lock, so a background ingest can add
+    vectors while questions are answered from what is already indexed. A BM25 keyword
+    index over the same ids is maintained alongside FAISS for hybrid retrieval, and a
+    ``ChunkMetadataIndex`` (document, page, section) lets searches take a ``ChunkFilter``
+    that restricts candidates before the vector search.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        store: Optional["IndexStore"] = None,
+        index_type: str = ANN_INDEX_TYPE,
+    ):
+        self.embeddings = embeddings
+        self.store = store
+        self.index_type = index_type
+        self.index_spec: IndexSpec = choose_spec(0, index_type)
+        self._trained_on = 0
+        self.vectorstore: Optional[FAISS] = None
+        self.keyword_index = BM25Index()
+        self.metadata_index = ChunkMetadataIndex()
+        self._source_ids: Dict[str, List[int]] = {}
+        self._next_id = 0
+        self._lock = threading.RLock()
+        # Bumped on every add/remove so caches can tell when results may have changed
+        self.version = 0
+
+    @property
+    def sources(self) -> List[str]:
+        return list(self._source_ids)
+
+    @property
+    def num_vectors(self) -> int:
+        return 0 if self.vectorstore is None else self.vectorstore.index.ntotal
+
+    def has_source(self, key: str) -> bool:
+        return key in self._source_ids
+
+    def _ensure_store(self, dim: int) -> FAISS:
+        if self.vectorstore is None:
+            index = new_index(self.index_spec, dim)
+            tune(index)
+            self.vectorstore = FAISS(
+                embedding_function=self.embeddings,
+                index=index,
+                docstore=InMemoryDocstore(),
+                index_to_docstore_id={},
+            )
+        return self.vectorstore
+
+    def add_embeddings(
+        self,
+        key: str,
+        texts: Sequence[str],
+        vectors: Sequence[Sequence[float]],
+        metadatas: Optional[Sequence[dict]] = None,
+    ) -> int:
+        """Append pre-computed vectors to ``key`` (creating the source if needed)."""
+        if not texts:
+            # Still record the source, so a PDF without text counts as indexed
+            with self._lock:
+                self._source_ids.setdefault(key, [])
+            return 0
+        arr = np.asarray(vectors, dtype=np.float32)
+        metadatas = metadatas or [{} for _ in texts]
+        with self._lock:
+            store = self._ensure_store(arr.shape[1])
+            ids = np.arange(self._next_id, self._next_id + len(texts), dtype=np.int64)
+            self._next_id += len(texts)
+            docstore_ids = [f"{key}:{i}" for i in ids]
+
+            store.index.add_with_ids(arr, ids)
+            store.docstore.add(
+                {
+                    doc_id: Document(page_content=text, metadata=dict(meta))
+                    for doc_id, text, meta in zip(docstore_ids, texts, metadatas)
+                }
+            )
+            store.index_to_docstore_id.update(zip(ids.tolist(), docstore_ids))
+            for i, text in zip(ids.tolist(), texts):
+                self.keyword_index.add(i, text)
+            self.metadata_index.add(ids, metadatas)
+            self._source_ids.setdefault(key, []).extend(ids.tolist())
+            if needs_rebuild(self.index_spec, self._trained_on, store.index.ntotal, self.index_type):
+                self._rebuild(choose_spec(store.index.ntotal, self.index_type))
+            self.version += 1
+        return len(texts)
+
+    def _rebuild(self, spec: IndexSpec) -> None:
+        """Retrain and refill the FAISS index from the vectors currently indexed.
+
+        Runs under the lock, so queries wait for it. IVF-PQ only keeps compressed codes,
+        so rebuilding an IVF-PQ index retrains on the reconstructed approximations.
+        """
+        store = self.vectorstore
+        ids = np.fromiter(store.index_to_docstore_id, dtype=np.int64)
+        with span("index.rebuild", kind=str(spec), vectors=len(ids)):
+            vectors = reconstruct_ids(store.index, ids)
+            store.index = build_index(spec, vectors, ids)
+        self.index_spec = spec
+        self._trained_on = len(ids)
+
+    def add_source(self, key: str, documents: Sequence[Document]) -> int:
+        """Embed and index the chunks of one source. Returns the number of vectors added."""
+        texts = [d.page_content for d in documents]
+        vectors = self.embeddings.embed_documents(texts) if texts else []
+        return self.add_embeddings(key, texts, vectors, [d.metadata for d in documents])
+
+    def attach_source(self, key: str, source_store: FAISS) -> int:
+        """Copy the vectors and chunks of a saved per-source FAISS store into the index.
+
+        O(chunks) in time and memory: every stored vector is reconstructed into RAM and
+        re-added, and every chunk is tokenized again for BM25. This skips parsing and
+        embedding, which dominate ingest, but is not free for large PDFs.
+        """
+        ntotal = source_store.index.ntotal
+        if ntotal == 0:
+            return self.add_embeddings(key, [], [])
+        vectors = source_store.index.reconstruct_n(0, ntotal)
+        docs = [
+            source_store.docstore.search(source_store.index_to_docstore_id[i]) for i in range(ntotal)
+        ]
+        return self.add_embeddings(
+            key, [d.page_content for d in docs], vectors, [d.metadata for d in docs]
+        )
+
+    def attach_stored(self, key: str) -> bool:
+        """Attach ``key`` from the index store if it was saved before."""
+        if self.store is None:
+            return False
+        saved = self.store.load(key, self.embeddings)
+        if saved is None:
+            return False
+        self.attach_source(key, saved)
+        return True
+
+    def remove_source(self, key: str) -> int:
+        """Drop every vector owned by ``key``. Returns the number of vectors removed."""
+        with self._lock:
+            ids = self._source_ids.pop(key, [])
+            if not ids or self.vectorstore is None:
+                return 0
+            store = self.vectorstore
+            docstore_ids = [store.index_to_docstore_id.pop(i) for i in ids]
+            if supports_remove(store.index):
+                store.index.remove_ids(np.asarray(ids, dtype=np.int64))
+            else:
+                # HNSW graphs cannot drop nodes; rebuild from the remaining vectors
+                self._rebuild(self.index_spec)
+            store.docstore.delete(docstore_ids)
+            self.keyword_index.remove(ids)
+            self.metadata_index.remove(ids)
+            self.version += 1
+        return len(ids)
+
+    def diff(self, keys) -> UploadDiff:
+        """Per-source diff between what is indexed and ``keys``."""
+        return diff_hashes(self._source_ids, keys)
+
+    def _selection(self, where: Optional[ChunkFilter]) -> Optional[np.ndarray]:
+        """Ids allowed by ``where`` (``None``: no restriction)."""
+        if where is None or where.is_empty:
+            return None
+        return self.metadata_index.select(where)
+
+    def _vector_labels(self, vector: np.ndarray, k: int, selection: Optional[np.ndarray]) -> List[int]:
+        """Ids of the ``k`` nearest vectors, among ``selection`` if given."""
+        index = self.vectorstore.index
+        if selection is None:
+            _, labels = index.search(vector, k)
+        elif len(selection) <= PREFILTER_EXACT_MAX:
+            # Small selections: exact distances to their stored vectors beat an index scan
+            if not len(selection):
+                return []
+            distances = ((reconstruct_ids(index, selection) - vector) ** 2).sum(axis=1)
+            top = np.argsort(distances, kind="stable")[:k]
+            return selection[top].tolist()
+        else:
+            _, labels = search_selected(index, vector, k, selection)
+        return [int(i) for i in labels[0] if i != -1]
+
+    def _query_vector(self, query: str, query_vector: Optional[Sequence[float]]) -> np.ndarray:
+        if query_vector is None:
+            with span("embed.query"):
+                query_vector = self.embeddings.embed_query(query)
+        return np.asarray([query_vector], dtype=np.float32)
+
+    def search(
+        self,
+        query: str,
+        k: int = RETRIEVAL_K,
+        where: Optional[ChunkFilter] = None,
+        query_vector: Optional[Sequence[float]] = None,
+    ) -> List[Document]:
+        """Similarity search over whatever is indexed right now (restricted by ``where``).
+
+        ``query_vector``, if given, is ``query``'s embedding computed elsewhere.
+        """
+        if self.vectorstore is None:
+            return []
+        vector = self._query_vector(query, query_vector)
+        with self._lock, span("search.vector", k=k) as s:
+            selection = self._selection(where)
+            if selection is not None:
+                s.set(selected=len(selection))
+            return [self._document(i) for i in self._vector_labels(vector, k, selection)]
+
+    def _document(self, label: int) -> Document:
+        store = self.vectorstore
+        return store.docstore.search(store.index_to_docstore_id[label])
+
+    def hybrid_search(
+        self,
+        query: str,
+        k: int = RETRIEVAL_K,
+        candidate_k: int = HYBRID_CANDIDATE_K,
+        reranker: Optional[CrossEncoderReranker] = None,
+        where: Optional[ChunkFilter] = None,
+        query_vector: Optional[Sequence[float]] = None,
+    ) -> List[Document]:
+        """Fuse vector and BM25 rankings over ``candidate_k`` candidates each, keep ``k``."""
+        if self.vectorstore is None:
+            return []
+        vector = self._query_vector(query, query_vector)
+        with self._lock, span("search.hybrid", candidate_k=candidate_k) as s:
+            selection = self._selection(where)
+            allowed = None
+            if selection is not None:
+                s.set(selected=len(selection))
+                allowed = set(selection.tolist())
+            vector_ranking = self._vector_labels(vector, candidate_k, selection)
+            keyword_ranking = [i for i, _ in self.keyword_index.search(query, candidate_k, allowed)]
+            candidates = {
+                i: self._document(i) for i in dict.fromkeys(vector_ranking + keyword_ranking)
+            }
+        # Reranking runs outside the lock; it only needs the candidate documents
+        return fuse_and_rerank(
+            query, vector_ranking, keyword_ranking, candidates.__getitem__, k, reranker
+        )
+
+    def as_retriever(
+        self,
+        k: int = RETRIEVAL_K,
+        hybrid: bool = HYBRID_RETRIEVAL,
+        candidate_k: int = HYBRID_CANDIDATE_K,
+        reranker: Optional[CrossEncoderReranker] = None,
+        where: Optional[ChunkFilter] = None,
+    ) -> "ManagedRetriever":
+        return ManagedRetriever(
+            manager=self, k=k, hybrid=hybrid, candidate_k=candidate_k, reranker=reranker, where=where
+        )
+
+
+class ManagedRetriever(BaseRetriever):
+    """Retriever reading from an ``IndexManager``; sees vectors as soon as they are added."""
+
+    manager: Any
+    k: int = RETRIEVAL_K
+    hybrid: bool = HYBRID_RETRIEVAL
+    candidate_k: int = HYBRID_CANDIDATE_K
+    reranker: Any = None
+    # Optional ``ChunkFilter``; may be reassigned between queries
+    where: Any = None
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.manager.embeddings
+
+    def _get_relevant_documents(
+        self,
+        query: str,
+        *,
+        run_manager: CallbackManagerForRetrieverRun,
+        query_vector: Optional[Sequence[float]] = None,
+    ) -> List[Document]:
+        # ``query_vector`` (``retriever.invoke(query, query_vector=...)``) skips embedding
+        # a query that was embedded already, e.g. by the answer cache
+        if self.hybrid or self.reranker is not None:
+            return self.manager.hybrid_search(
+                query,
+                k=self.k,
+                candidate_k=self.candidate_k,
+                reranker=self.reranker,
+                where=self.where,
+                query_vector=query_vector,
+            )
+        return self.manager.search(query, k=self.k, where=self.where, query_vector=query_vector)
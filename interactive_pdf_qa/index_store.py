@@ -0,0 +1,189 @@
+"""On-disk store of per-PDF FAISS indexes keyed by a content hash of the PDF bytes.
+
+Each stored PDF lives in ``<root>/<namespace>/<pdf_hash>/`` as the usual LangChain
+``index.faiss`` + ``index.pkl`` pair. The namespace encodes the embedding model and
+chunking settings, so changing either never serves stale vectors. Any session (or
+replica sharing the directory) can attach a previously processed PDF without parsing
+or embedding it again. Attaching still copies the PDF's vectors and chunks into the
+session's index, so it costs time and memory linear in the PDF's chunk count (see
+``IndexManager.attach_source``); the memory-mapped load only avoids holding a second,
+file-backed copy in RAM while that happens.
+
+Offline pre-build for a folder of PDFs:
+
+    python -m interactive_pdf_qa.index_store build path/to/pdfs
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import pickle
+import re
+import shutil
+import tempfile
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+import faiss
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import Embeddings
+
+from .config import CHUNKING, CHUNK_OVERLAP, CHUNK_OVERLAP_TOKENS, CHUNK_SIZE, CHUNK_TOKENS, INDEX_STORE_DIR
+from .embedding_engine import embedding_signature
+from .fingerprint import hash_file
+
+
+def default_namespace(signature: Optional[str] = None) -> str:
+    """Store namespace for the chunking settings and an embedding ``signature``
+    (by default the configured model's)."""
+    model = re.sub(r"[^A-Za-z0-9_.+-]+", "_", signature or embedding_signature()).strip("_")
+    if CHUNKING == "layout":
+        return f"{model}-layout-t{CHUNK_TOKENS}-o{CHUNK_OVERLAP_TOKENS}"
+    return f"{model}-c{CHUNK_SIZE}-o{CHUNK_OVERLAP}"
+
+
+class IndexStore:
+    """Directory of saved per-PDF FAISS indexes."""
+
+    def __init__(self, root: str = INDEX_STORE_DIR, namespace: Optional[str] = None):
+        self.root = Path(root) / (namespace or default_namespace())
+
+    def _path(self, key: str) -> Path:
+        return self.root / key
+
+    def has(self, key: str) -> bool:
+        return (self._path(key) / "index.faiss").exists() and (self._path(key) / "index.pkl").exists()
+
+    def keys(self) -> List[str]:
+        if not self.root.exists():
+            return []
+        return sorted(p.name for p in self.root.iterdir() if self.has(p.name))
+
+    def writer(self, key: str, embeddings: Embeddings) -> "SourceWriter":
+        """Incremental writer for one PDF's chunks (see ``SourceWriter``)."""
+        return SourceWriter(self, key, embeddings)
+
+    def save(
+        self,
+        key: str,
+        texts: Sequence[str],
+        vectors: Sequence[Sequence[float]],
+        metadatas: Sequence[dict],
+        embeddings: Embeddings,
+    ) -> None:
+        """Persist one PDF's chunks and vectors. Writes are atomic per key."""
+        writer = self.writer(key, embeddings)
+        writer.add(texts, vectors, metadatas)
+        writer.commit()
+
+    def _write(self, key: str, store: FAISS) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_dir = Path(tempfile.mkdtemp(prefix=f".{key[:12]}-", dir=self.root))
+        try:
+            store.save_local(str(tmp_dir))
+            try:
+                os.replace(tmp_dir, self._path(key))
+            except OSError:
+                # Another process finished the same PDF first; keep its copy
+                pass
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def load(self, key: str, embeddings: Embeddings) -> Optional[FAISS]:
+        """Memory-map a stored index back into a FAISS vector store (None if missing).
+
+        ``index.pkl`` is unpickled, so only point the store at directories you control.
+        """
+        if not self.has(key):
+            return None
+        path = self._path(key)
+        index = faiss.read_index(str(path / "index.faiss"), faiss.IO_FLAG_MMAP)
+        with open(path / "index.pkl", "rb") as fh:
+            docstore, index_to_docstore_id = pickle.load(fh)
+        return FAISS(
+            embedding_function=embeddings,
+            index=index,
+            docstore=docstore,
+            index_to_docstore_id=index_to_docstore_id,
+        )
+
+
+class SourceWriter:
+    """Builds one PDF's store batch by batch; nothing is written until ``commit``.
+
+    Vectors go straight into the store's float32 FAISS index as they arrive, so a
+    streaming ingest does not have to keep the whole PDF's chunks aside until it ends.
+    """
+
+    def __init__(self, store: IndexStore, key: str, embeddings: Embeddings):
+        self.store = store
+        self.key = key
+        self.embeddings = embeddings
+        self.count = 0
+        self._vectorstore: Optional[FAISS] = None
+
+    def add(self, texts: Sequence[str], vectors: Sequence[Sequence[float]], metadatas: Sequence[dict]) -> None:
+        if not texts:
+            return
+        pairs = list(zip(texts, vectors))
+        ids = [f"{self.key}:{i}" for i in range(self.count, self.count + len(texts))]
+        if self._vectorstore is None:
+            self._vectorstore = FAISS.from_embeddings(pairs, self.embeddings, metadatas=list(metadatas), ids=ids)
+        else:
+            self._vectorstore.add_embeddings(pairs, metadatas=list(metadatas), ids=ids)
+        self.count += len(texts)
+
+    def commit(self) -> None:
+        """Write the store atomically (nothing is written for a PDF without chunks)."""
+        if self._vectorstore is not None:
+            self.store._write(self.key, self._vectorstore)
+
+
+def build_folder(folder: str, store: IndexStore, embeddings: Embeddings) -> List[str]:
+    """Index every PDF under ``folder`` that is not in the store yet; returns new keys."""
+    from .pdf_utils import load_documents_from_pdfs, split_documents
+
+    built: List[str] = []
+    for path in sorted(Path(folder).rglob("*.pdf")):
+        key = hash_file(str(path))
+        if store.has(key):
+            print(f"skip   {path} ({key[:12]})")
+            continue
+        pages = load_documents_from_pdfs([str(path)])
+        for page in pages:
+            # Same ``source`` as the app gives an upload of this file (its name)
+            page.metadata["source"] = path.name
+        splits = split_documents(pages)
+        texts = [d.page_content for d in splits]
+        vectors = embeddings.embed_documents(texts) if texts else []
+        store.save(key, texts, vectors, [d.metadata for d in splits], embeddings)
+        built.append(key)
+        print(f"built  {path} ({key[:12]}, {len(texts)} chunks)")
+    return built
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Manage the on-disk PDF index store.")
+    parser.add_argument("--store", default=INDEX_STORE_DIR, help="Index store root directory")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="Pre-build indexes for all PDFs in a folder")
+    build.add_argument("folder")
+    sub.add_parser("list", help="List stored PDF keys")
+    args = parser.parse_args(argv)
+
+    store = IndexStore(args.store)
+    if args.command == "list":
+        for key in store.keys():
+            print(key)
+        return
+
+    from .config import load_env
+    from .resources import create_embeddings
+
+    load_env()
+    built = build_folder(args.folder, store, create_embeddings())
+    print(f"{len(built)} new index(es) in {store.root}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+"""Streaming ingest: parse, split and embed as a bounded generator pipeline.
+
+Pages flow parse -> split -> embed through bounded queues, and chunks are embedded
+in fixed-size batches straight into the ``IndexManager``. Peak memory no longer scales
+with the corpus, and retrievers built on the manager can answer questions from
+whatever has been indexed so far.
+"""
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from dataclasses import dataclass, field, replace
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from .config import CHUNK_PARALLEL_MIN_PAGES, EMBED_BATCH_SIZE, INGEST_QUEUE_SIZE
+from .fingerprint import UploadDiff
+from .index_manager import IndexManager
+from .pdf_utils import default_splitter
+from .tracing import span
+
+if TYPE_CHECKING:
+    from .index_store import SourceWriter
+
+# Source key -> callable returning that source's pages lazily
+PageSources = Mapping[str, Callable[[], Iterable[Document]]]
+
+_END = object()
+
+
+class IngestCancelled(Exception):
+    """Raised inside the pipeline when the job is cancelled."""
+
+
+@dataclass(frozen=True)
+class IngestProgress:
+    sources_total: int = 0
+    sources_done: int = 0
+    pages: int = 0
+    chunks_indexed: int = 0
+    current_source: Optional[str] = None
+    elapsed: float = 0.0
+    done: bool = False
+
+    @property
+    def fraction(self) -> float:
+        if self.done or not self.sources_total:
+            return 1.0
+        return self.sources_done / self.sources_total
+
+
+@dataclass
+class _Stage:
+    thread: threading.Thread
+    errors: List[BaseException] = field(default_factory=list)
+
+
+class StreamingIngestor:
+    """Runs the parse -> split -> embed pipeline for the sources missing from a manager."""
+
+    def __init__(
+        self,
+        manager: IndexManager,
+        batch_size: int = EMBED_BATCH_SIZE,
+        queue_size: int = INGEST_QUEUE_SIZE,
+        split_window: int = CHUNK_PARALLEL_MIN_PAGES,
+        on_progress: Optional[Callable[[IngestProgress], None]] = None,
+    ):
+        self.manager = manager
+        self.batch_size = max(1, batch_size)
+        self.queue_size = max(1, queue_size)
+        self.split_window = max(1, split_window)
+        self.on_progress = on_progress
+        self.progress = IngestProgress()
+        self.error: Optional[BaseException] = None
+        self._cancel = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started = 0.0
+        self._finished: set = set()
+        self._writers: Dict[str, SourceWriter] = {}
+
+    # ---------------------------
+    # Public API
+    # ---------------------------
+
+    def run(self, sources: PageSources) -> UploadDiff:
+        """Ingest synchronously; removed sources are dropped, stored ones attached."""
+        self._started = time.perf_counter()
+        diff = self.manager.diff(sources)
+        for key in diff.removed:
+            self.manager.remove_source(key)
+
+        with span("index.attach_stored", sources=len(diff.added)):
+            pending = [key for key in diff.added if not self.manager.attach_stored(key)]
+        self._update(sources_total=len(diff.added), sources_done=len(diff.added) - len(pending))
+        if pending:
+            with span("ingest", sources=len(pending)):
+                self._stream(pending, sources)
+        self._update(done=True, current_source=None)
+        return diff
+
+    def start(self, sources: PageSources) -> "StreamingIngestor":
+        """Ingest in a background thread; poll ``progress``/``done``/``error``."""
+
+        def _target():
+            try:
+                self.run(sources)
+            except IngestCancelled:
+                pass
+            except BaseException as exc:  # surfaced to the UI via ``error``
+                self.error = exc
+
+        self._thread = threading.Thread(target=_target, name="pdfqa-ingest", daemon=True)
+        self._thread.start()
+        return self
+
+    @property
+    def done(self) -> bool:
+        return self.progress.done or self.error is not None or self._cancel.is_set()
+
+    def cancel(self, wait: bool = True) -> None:
+        self._cancel.set()
+        if wait and self._thread is not None:
+            self._thread.join()
+
+    # ---------------------------
+    # Pipeline
+    # ---------------------------
+
+    def _update(self, **changes) -> None:
+        changes.setdefault("elapsed", time.perf_counter() - self._started)
+        self.progress = replace(self.progress, **changes)
+        if self.on_progress is not None:
+            self.on_progress(self.progress)
+
+    def _put(self, q: "queue.Queue", item) -> None:
+        while not self._cancel.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+        raise IngestCancelled()
+
+    def _get(self, q: "queue.Queue"):
+        while not self._cancel.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        raise IngestCancelled()
+
+    def _spawn(self, name: str, fn: Callable[[], None]) -> _Stage:
+        errors: List[BaseException] = []
+
+        def _target():
+            try:
+                fn()
+            except IngestCancelled:
+                pass
+            except BaseException as exc:
+                errors.append(exc)
+                self._cancel.set()
+
+        stage = _Stage(thread=threading.Thread(target=_target, name=name, daemon=True), errors=errors)
+        stage.thread.start()
+        return stage
+
+    def _stream(self, keys: List[str], sources: PageSources) -> None:
+        pages_q: "queue.Queue" = queue.Queue(maxsize=self.queue_size)
+        chunks_q: "queue.Queue" = queue.Queue(maxsize=self.queue_size)
+        splitter = default_splitter()
+
+        def parse():
+            for key in keys:
+                for page in sources[key]():
+                    self._put(pages_q, (key, page))
+                self._put(pages_q, (key, _END))
+            self._put(pages_q, _END)
+
+        def split_window(key: str, pages: List[Document]) -> None:
+            for chunk in splitter.split_documents(pages):
+                self._put(chunks_q, (key, chunk))
+            for _ in pages:
+                self._put(chunks_q, (key, None))  # page markers for progress
+
+        def split():
+            # Pages are split in windows large enough for page-parallel chunking; a
+            # source's last window is split as soon as its end marker arrives
+            window: List[Document] = []
+            while True:
+                item = self._get(pages_q)
+                if item is _END:
+                    self._put(chunks_q, _END)
+                    return
+                key, page = item
+                if page is _END:
+                    if window:
+                        split_window(key, window)
+                        window = []
+                    self._put(chunks_q, item)
+                    continue
+                window.append(page)
+                if len(window) >= self.split_window:
+                    split_window(key, window)
+                    window = []
+
+        stages = [self._spawn("pdfqa-parse", parse), self._spawn("pdfqa-split", split)]
+        current: Optional[str] = None
+        failure: Optional[BaseException] = None
+        try:
+            for key, batch, source_done in self._batches(chunks_q):
+                if key != current:
+                    current = key
+                    self._update(current_source=key)
+                self._embed_batch(key, batch)
+                if source_done:
+                    self._finish_source(key)
+        except BaseException as exc:
+            failure = exc
+            self._cancel.set()
+            if current is not None and current not in self._finished:
+                # Never leave a half-indexed source behind
+                self.manager.remove_source(current)
+            self._writers.clear()
+        finally:
+            for stage in stages:
+                stage.thread.join()
+
+        # A failing stage cancels the pipeline; report its error rather than the cancellation
+        for stage in stages:
+            if stage.errors:
+                raise stage.errors[0]
+        if failure is not None:
+            raise failure
+
+    def _batches(self, chunks_q: "queue.Queue") -> Iterator[Tuple[str, List[Document], bool]]:
+        """Group chunks into embedding batches; the flag marks a source's final batch."""
+        batch: List[Document] = []
+        batch_key: Optional[str] = None
+        while True:
+            item = self._get(chunks_q)
+            if item is _END:
+                return
+            key, chunk = item
+            if batch_key is not None and key != batch_key and batch:
+                yield batch_key, batch, False
+                batch = []
+            batch_key = key
+            if chunk is None:
+                self._update(pages=self.progress.pages + 1)
+            elif chunk is _END:
+                yield key, batch, True
+                batch = []
+            else:
+                batch.append(chunk)
+                if len(batch) >= self.batch_size:
+                    yield key, batch, False
+                    batch = []
+
+    def _embed_batch(self, key: str, batch: List[Document]) -> None:
+        if not batch:
+            self.manager.add_embeddings(key, [], [])
+            return
+        texts = [d.page_content for d in batch]
+        metadatas = [d.metadata for d in batch]
+        embeddings = self.manager.embeddings
+        with span("embed", chunks=len(texts)) as s:
+            hits = getattr(embeddings, "hits", 0)
+            vectors = embeddings.embed_documents(texts)
+            s.set(cache_hits=getattr(embeddings, "hits", 0) - hits)
+        with span("index.add", chunks=len(texts)):
+            self.manager.add_embeddings(key, texts, vectors, metadatas)
+        if self.manager.store is not None:
+            writer = self._writers.get(key)
+            if writer is None:
+                writer = self._writers[key] = self.manager.store.writer(key, embeddings)
+            writer.add(texts, vectors, metadatas)
+        self._update(chunks_indexed=self.progress.chunks_indexed + len(batch))
+
+    def _finish_source(self, key: str) -> None:
+        self._finished.add(key)
+        writer = self._writers.pop(key, None)
+        if writer is not None:
+            with span("index.save", chunks=writer.count):
+                writer.commit()
+        self._update(sources_done=self.progress.sources_done + 1)
@@ -0,0 +1,109 @@
+"""Compact per-chunk metadata (document, page, section) for pre-filtering retrieval.
+
+One row per indexed chunk, keyed by the same stable int64 ids as the FAISS index.
+Documents and sections are stored as int32 codes into lookup tables, so the whole
+index costs 20 bytes per chunk and a filter by document, page range or section is a
+few vectorized comparisons over numpy arrays.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+_COLUMNS = {"id": np.int64, "doc": np.int32, "page": np.int32, "section": np.int32}
+
+
+@dataclass(frozen=True)
+class ChunkFilter:
+    """Which chunks a search may return; ``None`` fields do not constrain.
+
+    ``sources`` are PDF names (the chunks' ``source`` metadata), ``pages`` an inclusive
+    ``(first, last)`` range of 0-based page numbers, ``sections`` heading texts.
+    """
+
+    sources: Optional[Tuple[str, ...]] = None
+    pages: Optional[Tuple[int, int]] = None
+    sections: Optional[Tuple[str, ...]] = None
+
+    @property
+    def is_empty(self) -> bool:
+        return self.sources is None and self.pages is None and self.sections is None
+
+
+class ChunkMetadataIndex:
+    """Column arrays of chunk metadata with amortized appends and compacting removal."""
+
+    def __init__(self):
+        self._columns: Dict[str, np.ndarray] = {name: np.empty(0, dtype) for name, dtype in _COLUMNS.items()}
+        self._size = 0
+        self._doc_codes: Dict[str, int] = {}
+        self._section_codes: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def nbytes(self) -> int:
+        return sum(column[: self._size].nbytes for column in self._columns.values())
+
+    @property
+    def sources(self) -> List[str]:
+        """Names of the documents that currently have chunks, in the order first seen."""
+        present = set(np.unique(self._columns["doc"][: self._size]).tolist())
+        return [name for name, code in self._doc_codes.items() if code in present]
+
+    @staticmethod
+    def _code(table: Dict[str, int], value) -> int:
+        if value is None:
+            return -1
+        return table.setdefault(str(value), len(table))
+
+    def _reserve(self, n: int) -> None:
+        needed = self._size + n
+        capacity = len(self._columns["id"])
+        if needed <= capacity:
+            return
+        capacity = max(needed, 2 * capacity, 1024)
+        for name, column in self._columns.items():
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[: self._size] = column[: self._size]
+            self._columns[name] = grown
+
+    def add(self, ids: Sequence[int], metadatas: Sequence[dict]) -> None:
+        n = len(ids)
+        if not n:
+            return
+        self._reserve(n)
+        rows = slice(self._size, self._size + n)
+        self._columns["id"][rows] = np.asarray(ids, dtype=np.int64)
+        self._columns["doc"][rows] = [self._code(self._doc_codes, m.get("source")) for m in metadatas]
+        self._columns["page"][rows] = [m.get("page", -1) for m in metadatas]
+        self._columns["section"][rows] = [self._code(self._section_codes, m.get("section")) for m in metadatas]
+        self._size += n
+
+    def remove(self, ids: Iterable[int]) -> None:
+        ids = np.asarray(list(ids), dtype=np.int64)
+        if not len(ids) or not self._size:
+            return
+        keep = ~np.isin(self._columns["id"][: self._size], ids)
+        kept = int(keep.sum())
+        for name, column in self._columns.items():
+            column[:kept] = column[: self._size][keep]
+        self._size = kept
+
+    def select(self, where: ChunkFilter) -> np.ndarray:
+        """Ids of the chunks matching ``where``."""
+        mask = np.ones(self._size, dtype=bool)
+        if where.sources is not None:
+            codes = [self._doc_codes[s] for s in where.sources if s in self._doc_codes]
+            mask &= np.isin(self._columns["doc"][: self._size], codes)
+        if where.pages is not None:
+            first, last = where.pages
+            pages = self._columns["page"][: self._size]
+            mask &= (pages >= first) & (pages <= last)
+        if where.sections is not None:
+            codes = [self._section_codes[s] for s in where.sections if s in self._section_codes]
+            mask &= np.isin(self._columns["section"][: self._size], codes)
+        return self._columns["id"][: self._size][mask]
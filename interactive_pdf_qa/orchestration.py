@@ -0,0 +1,108 @@
+"""Run independent answer branches (PDF RAG, web agent) concurrently.
+
+Each branch runs in its own worker thread with its own deadline. When a branch misses
+its deadline it is cancelled cooperatively: the callback handler passed to it raises
+at the next LangChain chain/LLM/tool start, so agent loops stop between steps. The
+caller gets whatever finished in time and never waits on a slow branch.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from contextvars import copy_context
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Mapping, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+# branch(callbacks) -> value; pass ``callbacks`` on to every LangChain call in the branch
+Branch = Callable[[List[BaseCallbackHandler]], Any]
+
+
+class BranchCancelled(Exception):
+    """Raised inside a branch once its deadline has passed."""
+
+
+class CancellationHandler(BaseCallbackHandler):
+    """Callback handler that aborts a LangChain run once ``event`` is set."""
+
+    raise_error = True
+
+    def __init__(self, event: threading.Event):
+        self.event = event
+
+    def _check(self, *args, **kwargs) -> None:
+        if self.event.is_set():
+            raise BranchCancelled()
+
+    on_chain_start = _check
+    on_llm_start = _check
+    on_chat_model_start = _check
+    on_tool_start = _check
+    on_retriever_start = _check
+
+
+@dataclass
+class BranchResult:
+    name: str
+    value: Any = None
+    error: Optional[BaseException] = None
+    timed_out: bool = False
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and not self.timed_out
+
+
+def run_branches(
+    branches: Mapping[str, Branch],
+    timeouts: Mapping[str, float],
+    default_timeout: float = 60.0,
+    wrap: Optional[Callable[[Callable[[], Any]], Callable[[], Any]]] = None,
+) -> Dict[str, BranchResult]:
+    """Run ``branches`` concurrently and collect results within per-branch timeouts.
+
+    ``timeouts`` are measured from the common start time. ``wrap`` can decorate each
+    branch before it runs in its worker thread (e.g. to attach a UI context).
+    """
+    if not branches:
+        return {}
+    events = {name: threading.Event() for name in branches}
+    started = time.perf_counter()
+    finished: Dict[str, float] = {}
+
+    def _runner(name: str, branch: Branch) -> Callable[[], Any]:
+        def _call():
+            try:
+                return branch([CancellationHandler(events[name])])
+            finally:
+                finished[name] = time.perf_counter() - started
+
+        return wrap(_call) if wrap is not None else _call
+
+    pool = ThreadPoolExecutor(max_workers=len(branches), thread_name_prefix="pdfqa-branch")
+    # Each branch runs in a copy of this context (e.g. the open trace)
+    futures = {
+        name: pool.submit(copy_context().run, _runner(name, branch)) for name, branch in branches.items()
+    }
+    results: Dict[str, BranchResult] = {}
+    try:
+        for name, future in futures.items():
+            remaining = started + timeouts.get(name, default_timeout) - time.perf_counter()
+            try:
+                value = future.result(timeout=max(0.0, remaining))
+                results[name] = BranchResult(name, value=value, elapsed=finished.get(name, 0.0))
+            except FutureTimeoutError:
+                events[name].set()
+                future.cancel()
+                results[name] = BranchResult(
+                    name, timed_out=True, elapsed=time.perf_counter() - started
+                )
+            except Exception as exc:
+                results[name] = BranchResult(name, error=exc, elapsed=finished.get(name, 0.0))
+    finally:
+        # Never block on a timed-out branch; it stops at its next cancellation check
+        pool.shutdown(wait=False, cancel_futures=True)
+    return results
@@ -0,0 +1,116 @@
+"""Page-range PDF text extraction, serial or across a process pool.
+
+Kept free of Streamlit/LangChain imports so spawned worker processes start quickly.
+Work is split into page ranges (not whole files), so a single large PDF is parsed
+by several workers. Results are reassembled in input order, so output is identical
+to a serial parse.
+"""
+from __future__ import annotations
+
+import atexit
+import multiprocessing
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Deque, Iterator, List, Optional, Sequence, Tuple
+
+from pypdf import PdfReader
+
+# (path, first page, stop page)
+PageTask = Tuple[str, int, int]
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def page_count(path: str) -> int:
+    return len(PdfReader(path).pages)
+
+
+def iter_reader_pages(reader: PdfReader) -> Iterator[Tuple[int, int, str]]:
+    """Yield ``(page, total_pages, text)`` for an open reader (file path or in-memory stream)."""
+    total = len(reader.pages)
+    for i, page in enumerate(reader.pages):
+        yield i, total, page.extract_text() or ""
+
+
+def extract_page_range(task: PageTask) -> List[str]:
+    """Extract text for pages ``[start, stop)`` of one PDF."""
+    path, start, stop = task
+    reader = PdfReader(path)
+    return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def plan_tasks(paths: Sequence[str], counts: Sequence[int], pages_per_task: int) -> List[PageTask]:
+    step = max(1, pages_per_task)
+    return [
+        (path, start, min(start + step, count))
+        for path, count in zip(paths, counts)
+        for start in range(0, count, step)
+    ]
+
+
+def get_pool(workers: int) -> ProcessPoolExecutor:
+    """Reuse one worker pool per process; spawning workers costs more than small parses."""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            # "spawn" avoids forking the (multi-threaded) Streamlit server process
+            _pool = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            )
+            _pool_workers = workers
+        return _pool
+
+
+@atexit.register
+def _shutdown_pool() -> None:
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+
+
+def iter_pages(
+    paths: Sequence[str],
+    workers: int,
+    pages_per_task: int,
+    min_parallel_pages: int,
+) -> Iterator[Tuple[str, int, int, str]]:
+    """Yield every page of every PDF as ``(path, page, total_pages, text)`` in order.
+
+    Falls back to a serial parse when ``workers <= 1`` or the input has fewer than
+    ``min_parallel_pages`` pages in total. In parallel mode at most ``2 * workers``
+    page ranges are in flight, so memory stays bounded for lazy consumers.
+    """
+    counts = [page_count(p) for p in paths]
+    totals = dict(zip(paths, counts))
+    tasks = plan_tasks(paths, counts, pages_per_task)
+
+    if workers <= 1 or sum(counts) < min_parallel_pages or len(tasks) < 2:
+        # One reader per file; page-range tasks only pay off across processes
+        for path in paths:
+            for page, total, text in iter_reader_pages(PdfReader(path)):
+                yield path, page, total, text
+        return
+
+    results = _windowed_map(get_pool(workers), tasks, window=2 * workers)
+    for (path, start, _), texts in zip(tasks, results):
+        for i, text in enumerate(texts):
+            yield path, start + i, totals[path], text
+
+
+def _windowed_map(pool: ProcessPoolExecutor, tasks: Sequence[PageTask], window: int) -> Iterator[List[str]]:
+    pending: Deque[Future] = deque()
+    remaining = iter(tasks)
+    try:
+        for task in remaining:
+            pending.append(pool.submit(extract_page_range, task))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
@@ -1,39 +1,137 @@
-"""Utilities for handling PDFs: saving uploads, loading and splitting documents."""
-import tempfile
-from typing import List
+"""Utilities for handling PDFs: loading uploads and files, and splitting documents."""
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Sequence, Union
 
-import streamlit as st
+from langchain_core.documents import Document
+from pypdf import PdfReader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.document_loaders import PyPDFLoader
 
-from .config import CHUNK_SIZE, CHUNK_OVERLAP
+from .chunking import LayoutChunker, chunk_pages
+from .config import (
+    CHUNKING,
+    CHUNK_OVERLAP_TOKENS,
+    CHUNK_TOKENS,
+    CHUNK_SIZE,
+    CHUNK_OVERLAP,
+    PARSE_WORKERS,
+    PARSE_PAGES_PER_TASK,
+    PARSE_PARALLEL_MIN_PAGES,
+)
+from .pdf_parsing import iter_pages, iter_reader_pages
+from .scratch import ScratchFullError, ScratchSpace, get_scratch_space
+from .tracing import span, traced_iter
 
+if TYPE_CHECKING:
+    from streamlit.runtime.uploaded_file_manager import UploadedFile
 
-def save_uploaded_pdfs(uploaded_files: List[st.runtime.uploaded_file_manager.UploadedFile]) -> List[str]:
-    """Persist uploaded PDFs to temporary files and return file paths."""
-    file_paths: List[str] = []
-    for uf in uploaded_files:
-        suffix = ".pdf" if not uf.name.lower().endswith(".pdf") else ""
-        with tempfile.NamedTemporaryFile(delete=False, suffix=f"_{uf.name}{suffix}") as tmp:
-            tmp.write(uf.getvalue())
-            file_paths.append(tmp.name)
-    return file_paths
 
+def iter_documents_from_pdfs(pdf_paths: List[str], max_workers: Optional[int] = None) -> Iterator[Document]:
+    """Yield one document per PDF page, parsing page ranges in parallel for large inputs.
 
-def load_documents_from_pdfs(pdf_paths: List[str]):
-    """Load documents from a list of PDF file paths using PyPDFLoader."""
-    documents = []
-    for path in pdf_paths:
-        loader = PyPDFLoader(path)
-        docs = loader.load()
-        documents.extend(docs)
-    return documents
+    Order and metadata (``source``, ``page``, ``total_pages``) match a serial parse.
+    """
+    pages = iter_pages(
+        pdf_paths,
+        workers=PARSE_WORKERS if max_workers is None else max_workers,
+        pages_per_task=PARSE_PAGES_PER_TASK,
+        min_parallel_pages=PARSE_PARALLEL_MIN_PAGES,
+    )
+    for path, page, total, text in traced_iter("pdf.parse", pages, files=len(pdf_paths)):
+        yield Document(page_content=text, metadata={"source": path, "page": page, "total_pages": total})
 
 
-def split_documents(documents):
-    """Split raw documents into chunks suitable for retrieval."""
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=CHUNK_SIZE,
-        chunk_overlap=CHUNK_OVERLAP,
+def load_documents_from_pdfs(pdf_paths: List[str], max_workers: Optional[int] = None) -> List[Document]:
+    """Load one document per PDF page (see ``iter_documents_from_pdfs``)."""
+    return list(iter_documents_from_pdfs(pdf_paths, max_workers))
+
+
+class LayoutSplitter:
+    """Splits page documents with a ``LayoutChunker``, page-parallel for large inputs.
+
+    Chunks keep their page's metadata plus ``section``: the last heading seen in the
+    same source, carried across page breaks. Pages of a source must therefore be split
+    in order (one call or several).
+    """
+
+    def __init__(self, chunker: Optional[LayoutChunker] = None, workers: int = PARSE_WORKERS):
+        self.chunker = chunker or LayoutChunker()
+        self.workers = workers
+        self._sections: Dict[str, Optional[str]] = {}
+
+    def split_documents(self, documents: Sequence[Document]) -> List[Document]:
+        documents = list(documents)
+        pages = chunk_pages([d.page_content for d in documents], self.chunker, self.workers)
+        chunks: List[Document] = []
+        for doc, page_chunks in zip(documents, pages):
+            source = doc.metadata.get("source")
+            section = self._sections.get(source)
+            for chunk in page_chunks:
+                section = chunk.section or section
+                chunks.append(Document(page_content=chunk.text, metadata={**doc.metadata, "section": section}))
+            self._sections[source] = section
+        return chunks
+
+
+Splitter = Union[LayoutSplitter, RecursiveCharacterTextSplitter]
+
+
+def build_splitter(chunk_size: int = CHUNK_SIZE, chunk_overlap: int = CHUNK_OVERLAP) -> RecursiveCharacterTextSplitter:
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
     )
-    return splitter.split_documents(documents)
+
+
+def build_layout_splitter(
+    max_tokens: int = CHUNK_TOKENS,
+    overlap_tokens: int = CHUNK_OVERLAP_TOKENS,
+    workers: Optional[int] = None,
+) -> LayoutSplitter:
+    return LayoutSplitter(
+        LayoutChunker(max_tokens, overlap_tokens),
+        workers=PARSE_WORKERS if workers is None else workers,
+    )
+
+
+def default_splitter() -> Splitter:
+    """The splitter selected by ``CHUNKING`` ("layout" or "recursive")."""
+    return build_layout_splitter() if CHUNKING == "layout" else build_splitter()
+
+
+def split_documents(documents, splitter: Optional[Splitter] = None):
+    """Split raw documents into chunks suitable for retrieval."""
+    with span("pdf.split") as s:
+        chunks = (splitter or default_splitter()).split_documents(documents)
+        s.set(chunks=len(chunks))
+    return chunks
+
+
+def iter_upload_pages(
+    uploaded_file: "UploadedFile",
+    max_workers: Optional[int] = None,
+    scratch: Optional[ScratchSpace] = None,
+) -> Iterator[Document]:
+    """Lazily yield the pages of one uploaded PDF without a temp-file round trip.
+
+    Small PDFs are parsed straight from the upload's in-memory buffer. Large ones are
+    spilled to the managed scratch directory so the process pool can parse page
+    ranges; the spilled file is removed as soon as parsing ends. If the scratch space
+    is full, parsing falls back to the in-memory serial path.
+    """
+    uploaded_file.seek(0)
+    reader = PdfReader(uploaded_file)
+    workers = PARSE_WORKERS if max_workers is None else max_workers
+    if workers > 1 and len(reader.pages) >= PARSE_PARALLEL_MIN_PAGES:
+        try:
+            with uploaded_file.getbuffer() as view, (scratch or get_scratch_space()).spill(view) as path:
+                for doc in iter_documents_from_pdfs([path], max_workers=workers):
+                    doc.metadata["source"] = uploaded_file.name
+                    yield doc
+            return
+        except ScratchFullError:
+            pass
+
+    for page, total, text in traced_iter("pdf.parse", iter_reader_pages(reader), files=1):
+        yield Document(
+            page_content=text,
+            metadata={"source": uploaded_file.name, "page": page, "total_pages": total},
+        )
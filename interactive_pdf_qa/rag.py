@@ -1,21 +1,26 @@
-"""Builders for RAG components: retriever, prompts, chains."""
-from langchain.chains.history_aware_retriever import create_history_aware_retriever
-from langchain.chains import create_retrieval_chain
-from langchain.chains.combine_documents import create_stuff_documents_chain
-from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_groq import ChatGroq
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_community.vectorstores import FAISS
-from .config import RETRIEVAL_K
+"""Builders for RAG components: question rewriting, prompts, chains."""
+from operator import itemgetter
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 
+from langchain_core.documents import Document
 
-def build_retriever(splits, embeddings: HuggingFaceEmbeddings):
-    """Build a vector store retriever from document splits and embeddings.
+from langchain_core.language_models import BaseChatModel
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.runnables import (
+    Runnable,
+    RunnableBranch,
+    RunnableConfig,
+    RunnableLambda,
+    RunnablePassthrough,
+)
 
-    Uses FAISS (fast, CPU-friendly, no sqlite dependency).
-    """
-    vectorstore = FAISS.from_documents(documents=splits, embedding=embeddings)
-    return vectorstore.as_retriever(search_kwargs={"k": RETRIEVAL_K})
+from .tracing import span
+
+if TYPE_CHECKING:
+    from .answer_cache import SemanticAnswerCache
+    from .context_packing import ContextPacker
+    from .rewrite_gate import RewriteGate
 
 
 def build_contextualize_prompt() -> ChatPromptTemplate:
@@ -54,15 +59,85 @@ def build_qa_prompt() -> ChatPromptTemplate:
     )
 
 
-def build_history_aware_retriever(llm: ChatGroq, retriever, contextualize_prompt: ChatPromptTemplate):
-    """Wrap the base retriever with a step that rewrites questions using chat history."""
-    return create_history_aware_retriever(llm, retriever, contextualize_prompt)
+def build_question_rewriter(
+    llm: BaseChatModel,
+    contextualize_prompt: ChatPromptTemplate,
+    gate: Optional["RewriteGate"] = None,
+) -> Runnable:
+    """Map ``{input, chat_history}`` to a standalone question.
+
+    Without chat history the question is returned as is (no LLM call), like
+    LangChain's ``create_history_aware_retriever``. With a ``gate``, self-contained
+    questions also skip the LLM call and repeated rewrites are memoized.
+    """
+    rewrite = contextualize_prompt | llm | StrOutputParser()
+    if gate is not None:
+
+        def _standalone(inputs, config):
+            with span("rewrite") as s:
+                s.set(llm_call=False)
+
+                def _rewrite():
+                    s.set(llm_call=True)
+                    return rewrite.invoke(inputs, config)
+
+                return gate.standalone(inputs["input"], inputs.get("chat_history") or [], _rewrite)
+
+        return RunnableLambda(_standalone, name="standalone_question")
 
+    return RunnableBranch(
+        (lambda x: not x.get("chat_history"), itemgetter("input")),
+        rewrite,
+    ).with_config(run_name="standalone_question")
+
+
+def _retrieve_with_vector(retriever) -> Runnable:
+    """Retrieval for ``standalone_question``, reusing ``question_vector`` when present."""
+
+    def _retrieve(inputs: Dict[str, Any], config: RunnableConfig) -> List[Document]:
+        vector = inputs.get("question_vector")
+        if vector is None:
+            return retriever.invoke(inputs["standalone_question"], config)
+        return retriever.invoke(inputs["standalone_question"], config, query_vector=vector)
+
+    return RunnableLambda(_retrieve, name="retrieve")
+
+
+def build_rag_chain(
+    llm: BaseChatModel,
+    question_rewriter: Runnable,
+    retriever,
+    qa_prompt: ChatPromptTemplate,
+    answer_cache: Optional["SemanticAnswerCache"] = None,
+    context_packer: Optional["ContextPacker"] = None,
+):
+    """Create the end-to-end RAG chain (rewrite + retrieval + question answering).
+
+    Output keys: ``standalone_question``, ``context`` and ``answer``. With an
+    ``answer_cache``, a cached answer for a near-identical standalone question
+    skips retrieval and the QA LLM call; on a miss, a retriever using the cache's
+    embeddings reuses its ``question_vector`` instead of embedding the question again.
+    With a ``context_packer``, ``context`` and
+    ``chat_history`` are trimmed to its token budget before the QA prompt and the
+    estimated ``prompt_tokens`` are added to the output.
+    """
+    # langchain.chains is slow to import; load it only once a chain is built
+    from langchain.chains.combine_documents import create_stuff_documents_chain
 
-def build_rag_chain(llm: ChatGroq, history_aware_retriever, qa_prompt: ChatPromptTemplate):
-    """Create the end-to-end RAG chain (retrieval + question answering)."""
     question_answer_chain = create_stuff_documents_chain(
         llm,
         qa_prompt,
     )
-    return create_retrieval_chain(history_aware_retriever, question_answer_chain)
+    if answer_cache is not None and getattr(retriever, "embeddings", None) is answer_cache.embeddings:
+        retrieve: Runnable = RunnablePassthrough.assign(context=_retrieve_with_vector(retriever))
+    else:
+        retrieve = RunnablePassthrough.assign(context=itemgetter("standalone_question") | retriever)
+    if context_packer is not None:
+        retrieve = retrieve | context_packer.as_runnable(qa_prompt)
+    retrieve_and_answer = retrieve.assign(answer=question_answer_chain)
+    if answer_cache is not None:
+        retrieve_and_answer = answer_cache.wrap(retrieve_and_answer)
+
+    return (
+        RunnablePassthrough.assign(standalone_question=question_rewriter) | retrieve_and_answer
+    ).with_config(run_name="retrieval_chain")
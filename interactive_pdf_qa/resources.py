@@ -1,23 +1,92 @@
 """Cached resources such as embeddings and LLM clients."""
+from __future__ import annotations
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Optional
+
 import streamlit as st
-from langchain_groq import ChatGroq
-from langchain_huggingface import HuggingFaceEmbeddings
+from langchain_core.embeddings import Embeddings
+
+from .config import (
+    MODEL_NAME,
+    LLM_MAX_TOKENS,
+    LLM_TEMPERATURE,
+    CACHE_DIR,
+    EMBEDDING_CACHE_MAX_ENTRIES,
+    RERANK_ENABLED,
+)
+from .embedding_cache import CachedEmbeddings, EmbeddingCache
+from .embedding_engine import CpuEmbeddingEngine
+from .tracing import span
+
+if TYPE_CHECKING:
+    from langchain_groq import ChatGroq
+
+    from .hybrid import CrossEncoderReranker
+
 
-from .config import MODEL_NAME, EMBEDDING_MODEL, LLM_MAX_TOKENS, LLM_TEMPERATURE
+def create_embeddings() -> Embeddings:
+    """Create the CPU embedding engine behind a persistent vector cache."""
+    engine = CpuEmbeddingEngine()
+    cache = EmbeddingCache(CACHE_DIR, engine.signature, EMBEDDING_CACHE_MAX_ENTRIES)
+    return CachedEmbeddings(engine, cache)
+
+
+def _load_embeddings() -> Embeddings:
+    with span("embed.warmup"):
+        embeddings = create_embeddings()
+        # One forward pass, so the first real query does not pay for lazy kernel setup
+        embeddings.embed_query("warm up")
+    return embeddings
 
 
 @st.cache_resource(show_spinner=False)
-def get_embeddings() -> HuggingFaceEmbeddings:
-    """Create and cache the HuggingFace embedding model."""
-    return HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)
+def _embeddings_loader() -> Future:
+    """Start loading the embedding model in a background thread (once per process)."""
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pdfqa-warmup")
+    future = executor.submit(_load_embeddings)
+    executor.shutdown(wait=False)
+    return future
+
+
+def warm_up_embeddings() -> None:
+    """Begin loading the embedding model without waiting for it."""
+    _embeddings_loader()
+
+
+def get_embeddings() -> Embeddings:
+    """The cached (disk-cached) embedding model; blocks until the warm-up has finished."""
+    try:
+        return _embeddings_loader().result()
+    except Exception:
+        # Do not cache the failure; the next call retries the load
+        _embeddings_loader.clear()
+        raise
 
 
 @st.cache_resource(show_spinner=False)
-def get_llm(api_key: str) -> ChatGroq:
-    """Create and cache the LLM client for a given API key."""
+def get_reranker() -> Optional[CrossEncoderReranker]:
+    """Create and cache the cross-encoder reranker (None unless RERANK_ENABLED)."""
+    if not RERANK_ENABLED:
+        return None
+    from .hybrid import CrossEncoderReranker
+
+    return CrossEncoderReranker()
+
+
+def create_llm(api_key: str) -> ChatGroq:
+    """Create the Groq chat model for a given API key."""
+    from langchain_groq import ChatGroq
+
     return ChatGroq(
         groq_api_key=api_key,
         model_name=MODEL_NAME,
         temperature=LLM_TEMPERATURE,
         max_tokens=LLM_MAX_TOKENS,
     )
+
+
+@st.cache_resource(show_spinner=False)
+def get_llm(api_key: str) -> ChatGroq:
+    """Create and cache the LLM client for a given API key."""
+    return create_llm(api_key)
@@ -0,0 +1,116 @@
+"""Local gate that skips the history-rewrite LLM call for self-contained questions.
+
+The contextualize prompt costs a full LLM round trip on every turn once chat history
+exists. ``RewriteGate`` decides locally whether the question actually depends on the
+conversation (pronouns, follow-up phrasing, very short questions, or an optional
+classifier score) and memoizes rewrites per (history tail, question).
+"""
+from __future__ import annotations
+
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Optional, Sequence
+
+from .config import REWRITE_CLASSIFIER_THRESHOLD, REWRITE_HISTORY_TAIL, REWRITE_MEMO_SIZE
+
+# classifier(question, recent message texts) -> probability that a rewrite is needed
+RewriteClassifier = Callable[[str, Sequence[str]], float]
+
+_REFERENTIAL = re.compile(
+    r"\b(it|its|itself|this|that|these|those|they|them|their|theirs|he|him|his|she|her|hers|"
+    r"former|latter|above|aforementioned|previous|previously|earlier|same|such|there|ones?)\b",
+    re.IGNORECASE,
+)
+_FOLLOW_UP_START = re.compile(
+    r"^\s*(and|but|also|so|then|or|what about|how about|what else|why not|"
+    r"elaborate|explain more|tell me more|continue|go on|more on|same for|and what)\b",
+    re.IGNORECASE,
+)
+_MIN_SELF_CONTAINED_WORDS = 4
+
+
+@dataclass
+class RewriteStats:
+    turns: int = 0          # questions asked with non-empty history
+    llm_calls: int = 0      # rewrites actually sent to the LLM
+    skipped: int = 0        # judged self-contained by the gate
+    memo_hits: int = 0      # served from the rewrite memo
+
+    @property
+    def avoided(self) -> int:
+        return self.skipped + self.memo_hits
+
+
+def looks_context_dependent(question: str) -> bool:
+    """Heuristic: does the question lean on earlier turns?"""
+    if len(question.split()) < _MIN_SELF_CONTAINED_WORDS:
+        return True
+    return bool(_REFERENTIAL.search(question) or _FOLLOW_UP_START.search(question))
+
+
+class RewriteGate:
+    """Decides whether to rewrite a question and memoizes rewrites."""
+
+    def __init__(
+        self,
+        classifier: Optional[RewriteClassifier] = None,
+        classifier_threshold: float = REWRITE_CLASSIFIER_THRESHOLD,
+        history_tail: int = REWRITE_HISTORY_TAIL,
+        memo_size: int = REWRITE_MEMO_SIZE,
+    ):
+        self.classifier = classifier
+        self.classifier_threshold = classifier_threshold
+        self.history_tail = max(1, history_tail)
+        self.memo_size = max(1, memo_size)
+        self.stats = RewriteStats()
+        self._memo: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _tail(self, history: Sequence) -> Sequence[str]:
+        return [str(getattr(m, "content", m)) for m in history[-self.history_tail:]]
+
+    def needs_rewrite(self, question: str, history: Sequence) -> bool:
+        if not history:
+            return False
+        if looks_context_dependent(question):
+            return True
+        if self.classifier is not None:
+            return self.classifier(question, self._tail(history)) >= self.classifier_threshold
+        return False
+
+    def _memo_key(self, question: str, history: Sequence) -> str:
+        digest = hashlib.sha256()
+        for text in self._tail(history):
+            digest.update(text.encode("utf-8"))
+            digest.update(b"\x00")
+        digest.update(question.strip().lower().encode("utf-8"))
+        return digest.hexdigest()
+
+    def standalone(self, question: str, history: Sequence, rewrite: Callable[[], str]) -> str:
+        """Return the standalone question, calling ``rewrite()`` only when needed."""
+        if not history:
+            return question
+        with self._lock:
+            self.stats.turns += 1
+        if not self.needs_rewrite(question, history):
+            with self._lock:
+                self.stats.skipped += 1
+            return question
+
+        key = self._memo_key(question, history)
+        with self._lock:
+            if key in self._memo:
+                self._memo.move_to_end(key)
+                self.stats.memo_hits += 1
+                return self._memo[key]
+
+        rewritten = rewrite()
+        with self._lock:
+            self.stats.llm_calls += 1
+            self._memo[key] = rewritten
+            while len(self._memo) > self.memo_size:
+                self._memo.popitem(last=False)
+        return rewritten
@@ -0,0 +1,106 @@
+"""Managed, size-capped scratch directory for PDFs that must exist on disk.
+
+Most uploads are parsed straight from memory. Only work that needs a real file (the
+multi-process page parser) spills into this directory, and every spilled file is
+deleted when its ``spill`` context exits. The directory itself is removed at
+interpreter exit, and directories left behind by dead processes are swept on start.
+"""
+from __future__ import annotations
+
+import atexit
+import os
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+from .config import SCRATCH_DIR, SCRATCH_MAX_BYTES
+
+_PREFIX = "pdfqa-scratch-"
+
+
+class ScratchFullError(RuntimeError):
+    """Raised when spilling a file would exceed the scratch size cap."""
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _sweep_stale(base: Path) -> None:
+    for path in base.glob(f"{_PREFIX}*"):
+        pid = path.name[len(_PREFIX):]
+        if pid.isdigit() and int(pid) != os.getpid() and not _pid_alive(int(pid)):
+            shutil.rmtree(path, ignore_errors=True)
+
+
+class ScratchSpace:
+    """Per-process scratch directory with a cap on the bytes spilled at any one time."""
+
+    def __init__(self, root: Optional[str] = SCRATCH_DIR, max_bytes: int = SCRATCH_MAX_BYTES):
+        base = Path(root or tempfile.gettempdir())
+        base.mkdir(parents=True, exist_ok=True)
+        _sweep_stale(base)
+        self.path = base / f"{_PREFIX}{os.getpid()}"
+        self.path.mkdir(exist_ok=True)
+        self.max_bytes = max_bytes
+        self._used = 0
+        self._lock = threading.Lock()
+        atexit.register(self.cleanup)
+
+    @property
+    def used_bytes(self) -> int:
+        return self._used
+
+    @contextmanager
+    def spill(self, data, suffix: str = ".pdf") -> Iterator[str]:
+        """Write bytes-like ``data`` to a scratch file and yield its path; always deleted."""
+        size = memoryview(data).nbytes
+        with self._lock:
+            if self._used + size > self.max_bytes:
+                raise ScratchFullError(
+                    f"Scratch space full ({self._used + size} > {self.max_bytes} bytes)"
+                )
+            self._used += size
+        path = None
+        try:
+            fd, path = tempfile.mkstemp(suffix=suffix, dir=self.path)
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(data)
+            yield path
+        finally:
+            if path is not None:
+                _unlink_quietly(path)
+            with self._lock:
+                self._used -= size
+
+    def cleanup(self) -> None:
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+def _unlink_quietly(path: str) -> None:
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+_default: Optional[ScratchSpace] = None
+_default_lock = threading.Lock()
+
+
+def get_scratch_space() -> ScratchSpace:
+    """Process-wide scratch space, created on first use."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = ScratchSpace()
+        return _default
@@ -0,0 +1,47 @@
+"""Helpers for streaming answers token by token and timing them."""
+from __future__ import annotations
+
+import time
+from typing import Iterable, Iterator, List, Optional
+
+
+def answer_chunks(chain_stream: Iterable[dict], key: str = "answer") -> Iterator[str]:
+    """Pick the answer text out of a RAG chain's streamed output dicts."""
+    for chunk in chain_stream:
+        piece = chunk.get(key) if isinstance(chunk, dict) else None
+        if piece:
+            yield piece
+
+
+class StreamTimer:
+    """Measures time-to-first-token and total latency of a text stream.
+
+    The clock starts when the timer is created, so create it when the question is
+    submitted to include retrieval and any tool calls in both numbers.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.first_token_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._parts: List[str] = []
+
+    def wrap(self, chunks: Iterable[str]) -> Iterator[str]:
+        for chunk in chunks:
+            if self.first_token_at is None:
+                self.first_token_at = time.perf_counter()
+            self._parts.append(chunk)
+            yield chunk
+        self.finished_at = time.perf_counter()
+
+    @property
+    def text(self) -> str:
+        return "".join(self._parts)
+
+    @property
+    def ttft(self) -> Optional[float]:
+        return None if self.first_token_at is None else self.first_token_at - self.started
+
+    @property
+    def total(self) -> float:
+        return (self.finished_at or time.perf_counter()) - self.started
@@ -1,12 +1,14 @@
 from __future__ import annotations
 
-from typing import Optional
+from typing import Iterator, Optional
 
+from .tracing import span, traced_iter
 
-def synthesize_combined_answer(llm, question: str, pdf_answer: Optional[str], web_answer: Optional[str]) -> str:
+
+def _synthesis_prompt(question: str, pdf_answer: Optional[str], web_answer: Optional[str]) -> str:
     pdf_part = pdf_answer if pdf_answer else "N/A"
     web_part = web_answer if web_answer else "N/A"
-    synthesis_prompt = (
+    return (
         "You are a helpful assistant. Combine the following answers into one clear, concise response "
         "to the user's question. Prefer precise facts from the PDF answer when available, and "
         "augment with web information only if it adds non-conflicting useful context. Do not mention "
@@ -16,5 +18,20 @@ def synthesize_combined_answer(llm, question: str, pdf_answer: Optional[str], we
         f"Web answer: {web_part}\n\n"
         "Final combined answer:"
     )
-    combined_msg = llm.invoke(synthesis_prompt)
+
+
+def synthesize_combined_answer(llm, question: str, pdf_answer: Optional[str], web_answer: Optional[str]) -> str:
+    with span("synthesis"):
+        combined_msg = llm.invoke(_synthesis_prompt(question, pdf_answer, web_answer))
     return getattr(combined_msg, "content", str(combined_msg))
+
+
+def stream_combined_answer(
+    llm, question: str, pdf_answer: Optional[str], web_answer: Optional[str]
+) -> Iterator[str]:
+    """Token-streaming variant of ``synthesize_combined_answer``."""
+    stream = llm.stream(_synthesis_prompt(question, pdf_answer, web_answer))
+    for chunk in traced_iter("synthesis", stream, streamed=True):
+        piece = getattr(chunk, "content", chunk)
+        if piece:
+            yield piece
@@ -0,0 +1,387 @@
+"""Lightweight per-stage latency tracing with JSONL and Chrome-trace export.
+
+Stages wrap their work in ``tracer.span(name, **attrs)``; a span records its wall
+time, thread and attributes (token counts, cache hits, sizes). LangChain runs (LLM
+calls with token usage, retrievers, tools, named chain steps) are traced by passing
+``TracingCallbackHandler`` in the run config.
+
+Tracing is off unless ``PDFQA_TRACE=1``. ``tracer.trace()`` records the spans of
+one request even then, tagged with a trace id that ``spans(trace_id=...)`` filters
+on; the UI timing panel uses it, so one session's timings neither turn tracing on for
+the others nor pick up their spans (or background ingestion's). Outside both, ``span``
+returns a shared no-op object, so instrumented code pays one flag and one context
+variable check. With ``PDFQA_TRACE_FILE`` set, spans are exported at exit: Chrome trace format
+(open in ``chrome://tracing`` or Perfetto) for ``.json``, one span per line otherwise.
+"""
+from __future__ import annotations
+
+import atexit
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, TypeVar
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from .config import TRACE_ENABLED, TRACE_FILE, TRACE_MAX_SPANS
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# Generic LangChain runnables that would only add noise to a trace
+_GENERIC_RUN_PREFIXES = ("Runnable", "ChatPromptTemplate", "StrOutputParser", "PromptTemplate")
+
+# Id of the trace opened by ``Tracer.trace`` in the current context, if any
+_current_trace: ContextVar[Optional[int]] = ContextVar("pdfqa_trace", default=None)
+
+
+@dataclass
+class Span:
+    name: str
+    start: float                      # seconds since the tracer was created
+    duration: float = 0.0
+    seq: int = 0
+    thread: str = ""
+    attrs: Dict[str, Any] = field(default_factory=dict)
+    trace_id: Optional[int] = None
+
+
+class _NoopSpan:
+    """Returned by a disabled tracer; every operation does nothing."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        return None
+
+    def set(self, **attrs) -> None:
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class _ActiveSpan:
+    __slots__ = ("_tracer", "_name", "_attrs", "_start", "_trace_id")
+
+    def __init__(self, tracer: "Tracer", name: str, attrs: Dict[str, Any]):
+        self._tracer = tracer
+        self._name = name
+        self._attrs = attrs
+        self._start = 0.0
+        self._trace_id = _current_trace.get()
+
+    def __enter__(self) -> "_ActiveSpan":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None:
+            self._attrs["error"] = exc_type.__name__
+        self._tracer._finish(
+            self._name, self._start, time.perf_counter() - self._start, self._attrs, self._trace_id
+        )
+
+    def set(self, **attrs) -> None:
+        self._attrs.update(attrs)
+
+
+class Tracer:
+    """Collects spans in a bounded in-memory buffer."""
+
+    def __init__(self, enabled: bool = TRACE_ENABLED, max_spans: int = TRACE_MAX_SPANS):
+        self.enabled = enabled
+        self._origin = time.perf_counter()
+        self._epoch_us = time.time() * 1e6
+        self._spans: Deque[Span] = deque(maxlen=max(1, max_spans))
+        self._seq = itertools.count(1)
+        self._trace_ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    @property
+    def active(self) -> bool:
+        """Whether spans are recorded here: tracing is on or a trace is open in this context."""
+        return self.enabled or _current_trace.get() is not None
+
+    @contextmanager
+    def trace(self) -> Iterator[int]:
+        """Record the spans of this context under a new trace id, even when disabled.
+
+        The id covers the current thread and contexts copied from it (LangChain's
+        executors, ``run_branches``), not threads started independently.
+        """
+        trace_id = next(self._trace_ids)
+        token = _current_trace.set(trace_id)
+        try:
+            yield trace_id
+        finally:
+            _current_trace.reset(token)
+
+    def span(self, name: str, **attrs):
+        """Context manager timing a block; ``.set(**attrs)`` adds attributes inside it."""
+        if not self.active:
+            return _NOOP
+        return _ActiveSpan(self, name, attrs)
+
+    def record(
+        self, name: str, start: float, duration: float, *, trace_id: Optional[int] = None, **attrs
+    ) -> None:
+        """Add a span timed elsewhere (``start`` is a ``time.perf_counter()`` value).
+
+        ``trace_id`` defaults to the trace open in the current context.
+        """
+        if trace_id is None:
+            trace_id = _current_trace.get()
+        if self.enabled or trace_id is not None:
+            self._finish(name, start, duration, attrs, trace_id)
+
+    def _finish(
+        self, name: str, start: float, duration: float, attrs: Dict[str, Any], trace_id: Optional[int] = None
+    ) -> None:
+        span = Span(
+            name=name,
+            start=start - self._origin,
+            duration=duration,
+            seq=next(self._seq),
+            thread=threading.current_thread().name,
+            attrs=attrs,
+            trace_id=trace_id,
+        )
+        with self._lock:
+            self._spans.append(span)
+
+    def mark(self) -> int:
+        """Position to pass to ``spans(since=...)`` to get only later spans."""
+        with self._lock:
+            return self._spans[-1].seq if self._spans else 0
+
+    def spans(self, since: int = 0, trace_id: Optional[int] = None) -> List[Span]:
+        """Buffered spans after ``since``; only those of one trace if ``trace_id`` is given."""
+        with self._lock:
+            return [
+                s for s in self._spans if s.seq > since and (trace_id is None or s.trace_id == trace_id)
+            ]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._spans.clear()
+
+    # ---------------------------
+    # Export
+    # ---------------------------
+
+    def export_jsonl(self, path: str, spans: Optional[Iterable[Span]] = None) -> int:
+        spans = list(self.spans() if spans is None else spans)
+        with open(path, "w", encoding="utf-8") as fh:
+            for span in spans:
+                fh.write(json.dumps(asdict(span), default=str) + "\n")
+        return len(spans)
+
+    def chrome_trace(self, spans: Optional[Iterable[Span]] = None) -> Dict[str, Any]:
+        """Spans as a Chrome trace-event document (complete "X" events per thread)."""
+        spans = list(self.spans() if spans is None else spans)
+        pid = os.getpid()
+        threads: Dict[str, int] = {}
+        events = []
+        for span in spans:
+            tid = threads.setdefault(span.thread, len(threads) + 1)
+            events.append(
+                {
+                    "name": span.name,
+                    "ph": "X",
+                    "ts": self._epoch_us + span.start * 1e6,
+                    "dur": span.duration * 1e6,
+                    "pid": pid,
+                    "tid": tid,
+                    "args": span.attrs,
+                }
+            )
+        events.extend(
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+            for name, tid in threads.items()
+        )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export_chrome(self, path: str, spans: Optional[Iterable[Span]] = None) -> int:
+        spans = list(self.spans() if spans is None else spans)
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(self.chrome_trace(spans), fh, default=str)
+        return len(spans)
+
+    def export(self, path: str) -> int:
+        """Chrome trace for ``.json`` paths, JSONL otherwise."""
+        if path.endswith(".json"):
+            return self.export_chrome(path)
+        return self.export_jsonl(path)
+
+
+_tracer = Tracer()
+
+
+def get_tracer() -> Tracer:
+    return _tracer
+
+
+def span(name: str, **attrs):
+    """``get_tracer().span``; the usual entry point for instrumented code."""
+    return _tracer.span(name, **attrs) if _tracer.active else _NOOP
+
+
+def traced(name: str) -> Callable[[F], F]:
+    """Decorator tracing every call of a function as a span called ``name``."""
+
+    def decorator(fn: F) -> F:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _tracer.active:
+                return fn(*args, **kwargs)
+            with _tracer.span(name):
+                return fn(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+def traced_iter(name: str, items: Iterable, **attrs) -> Iterator:
+    """Yield from ``items`` inside one span covering the whole iteration.
+
+    Adds ``count`` and ``busy`` (seconds spent producing items, excluding the time the
+    consumer held each item) to the span.
+    """
+    if not _tracer.active:
+        yield from items
+        return
+    count, busy = 0, 0.0
+    with _tracer.span(name, **attrs) as s:
+        iterator = iter(items)
+        while True:
+            started = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                busy += time.perf_counter() - started
+                break
+            busy += time.perf_counter() - started
+            count += 1
+            yield item
+        s.set(count=count, busy=round(busy, 6))
+
+
+def _export_at_exit() -> None:
+    if TRACE_FILE and _tracer.spans():
+        _tracer.export(TRACE_FILE)
+
+
+atexit.register(_export_at_exit)
+
+
+# ---------------------------
+# LangChain integration
+# ---------------------------
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """Turns LangChain runs into spans: LLM calls (with token usage), retrievers,
+    tools and named chain steps (generic runnables are skipped).
+
+    Spans go to ``trace_id`` (by default the trace open where the handler is created),
+    since LangChain may call handlers from threads that do not share that context.
+    """
+
+    def __init__(self, tracer: Optional[Tracer] = None, trace_id: Optional[int] = None):
+        self.tracer = tracer or _tracer
+        self.trace_id = _current_trace.get() if trace_id is None else trace_id
+        self._runs: Dict[UUID, tuple] = {}
+        self._lock = threading.Lock()
+
+    def _start(self, run_id: UUID, name: str, **attrs) -> None:
+        if not (self.tracer.enabled or self.trace_id is not None):
+            return
+        with self._lock:
+            self._runs[run_id] = (name, time.perf_counter(), attrs)
+
+    def _end(self, run_id: UUID, **attrs) -> None:
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+        if run is not None:
+            name, start, start_attrs = run
+            self.tracer.record(
+                name, start, time.perf_counter() - start, trace_id=self.trace_id, **start_attrs, **attrs
+            )
+
+    @staticmethod
+    def _name(serialized: Optional[Dict[str, Any]], kwargs: Dict[str, Any], default: str) -> str:
+        name = kwargs.get("name") or (serialized or {}).get("name")
+        if not name:
+            ids = (serialized or {}).get("id") or [default]
+            name = ids[-1]
+        return str(name)
+
+    def on_chain_start(self, serialized, inputs, *, run_id, **kwargs) -> None:
+        name = self._name(serialized, kwargs, "chain")
+        if not name.startswith(_GENERIC_RUN_PREFIXES):
+            self._start(run_id, f"chain.{name}")
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs) -> None:
+        attrs = {}
+        if isinstance(outputs, dict):
+            if "answer_cache_hit" in outputs:
+                attrs["answer_cache_hit"] = bool(outputs["answer_cache_hit"])
+            if "prompt_tokens" in outputs:
+                attrs["prompt_tokens_est"] = outputs["prompt_tokens"]
+        self._end(run_id, **attrs)
+
+    def on_chain_error(self, error, *, run_id, **kwargs) -> None:
+        self._end(run_id, error=type(error).__name__)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs) -> None:
+        self._start(run_id, f"llm.{self._name(serialized, kwargs, 'llm')}")
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs) -> None:
+        self._start(run_id, f"llm.{self._name(serialized, kwargs, 'chat_model')}")
+
+    def on_llm_end(self, response, *, run_id, **kwargs) -> None:
+        usage = dict((response.llm_output or {}).get("token_usage") or {})
+        if not usage:
+            for generations in response.generations:
+                for generation in generations:
+                    meta = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                    if meta:
+                        usage = {
+                            "prompt_tokens": meta.get("input_tokens"),
+                            "completion_tokens": meta.get("output_tokens"),
+                        }
+        attrs = {k: usage[k] for k in ("prompt_tokens", "completion_tokens") if usage.get(k) is not None}
+        self._end(run_id, **attrs)
+
+    def on_llm_error(self, error, *, run_id, **kwargs) -> None:
+        self._end(run_id, error=type(error).__name__)
+
+    def on_retriever_start(self, serialized, query, *, run_id, **kwargs) -> None:
+        self._start(run_id, f"retriever.{self._name(serialized, kwargs, 'retriever')}")
+
+    def on_retriever_end(self, documents, *, run_id, **kwargs) -> None:
+        self._end(run_id, documents=len(documents))
+
+    def on_retriever_error(self, error, *, run_id, **kwargs) -> None:
+        self._end(run_id, error=type(error).__name__)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs) -> None:
+        self._start(run_id, f"tool.{self._name(serialized, kwargs, 'tool')}")
+
+    def on_tool_end(self, output, *, run_id, **kwargs) -> None:
+        self._end(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs) -> None:
+        self._end(run_id, error=type(error).__name__)
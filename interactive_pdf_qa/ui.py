@@ -1,6 +1,13 @@
 """UI helper components for the Streamlit app."""
+import json
+
 import streamlit as st
 
+try:
+    from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+except ImportError:  # very old/new Streamlit layouts; worker threads just lose UI access
+    add_script_run_ctx = get_script_run_ctx = None
+
 
 def render_header():
     st.title("Interactive PDF QA: RAG with Conversation Memory")
@@ -11,8 +18,8 @@ def render_api_key_input() -> str:
     return st.text_input("Enter your Groq API key:", type="password")
 
 
-def render_session_input() -> str:
-    return st.text_input("Session ID", value="default_session")
+def render_session_input(default: str) -> str:
+    return st.text_input("Session ID", value=default)
 
 
 def render_file_uploader():
@@ -26,3 +33,132 @@ def render_question_input() -> str:
 def render_agent_toggle() -> bool:
     """Whether to enable external web tools (Wikipedia/Arxiv/Search) via an agent."""
     return st.checkbox("Enable web tools (Wikipedia, Arxiv, Web search)")
+
+
+def render_stream_toggle() -> bool:
+    """Whether to render answers token by token as they are generated."""
+    return st.sidebar.checkbox("Stream answers", value=True)
+
+
+def render_latency(timer):
+    """Time to first token next to total latency for the last answer."""
+    ttft = f"{timer.ttft:.2f}s" if timer.ttft is not None else "n/a"
+    st.caption(f"Time to first token: {ttft} · Total: {timer.total:.2f}s")
+
+
+def render_trace_toggle(default: bool = False) -> bool:
+    return st.sidebar.checkbox("Show timings", value=default)
+
+
+def render_trace_panel(tracer, spans):
+    """Per-stage timings of the last request, with a Chrome-trace download."""
+    if not spans:
+        return
+    origin = min(s.start for s in spans)
+    with st.expander("Timings", expanded=False):
+        st.dataframe(
+            [
+                {
+                    "stage": s.name,
+                    "start_ms": round((s.start - origin) * 1000, 1),
+                    "duration_ms": round(s.duration * 1000, 1),
+                    "thread": s.thread,
+                    "details": ", ".join(f"{k}={v}" for k, v in s.attrs.items()),
+                }
+                for s in sorted(spans, key=lambda s: s.start)
+            ],
+            use_container_width=True,
+        )
+        st.download_button(
+            "Download Chrome trace",
+            data=json.dumps(tracer.chrome_trace(spans), default=str),
+            file_name="pdfqa-trace.json",
+            mime="application/json",
+        )
+
+
+def render_cache_metrics(answer_cache):
+    """Answer cache hit/miss counters in the sidebar."""
+    if answer_cache is None:
+        return
+    stats = answer_cache.stats
+    st.sidebar.caption(
+        f"Answer cache: {stats['hits']} hits / {stats['misses']} misses "
+        f"({stats['hit_rate']:.0%} hit rate, {stats['entries']} cached)"
+    )
+
+
+def render_rewrite_stats(gate):
+    """How many history-rewrite LLM calls the local gate avoided."""
+    if gate is None:
+        return
+    stats = gate.stats
+    st.sidebar.caption(
+        f"Question rewrites: {stats.llm_calls} LLM calls, {stats.avoided} avoided "
+        f"({stats.skipped} self-contained, {stats.memo_hits} memoized)"
+    )
+
+
+def render_prompt_tokens(stats):
+    """Estimated QA prompt size for the last request (nothing after a cache hit)."""
+    if stats is None:
+        return
+    st.caption(
+        f"Prompt ≈ {stats.prompt_tokens} tokens: context {stats.context_tokens} "
+        f"(of {stats.raw_context_tokens} retrieved), history {stats.history_tokens} "
+        f"(of {stats.raw_history_tokens})"
+    )
+
+
+def render_ingest_progress(job):
+    """Show live indexing progress; questions can be asked while this runs."""
+    if job is None:
+        return
+    if job.done:
+        if job.error is not None:
+            st.error(f"Indexing failed: {job.error}")
+        else:
+            st.success("Document index is ready.")
+        return
+
+    @st.fragment(run_every=1.0)
+    def _progress():
+        if job.done:
+            st.rerun()  # full rerun renders the final state and stops polling
+        p = job.progress
+        st.progress(
+            p.fraction,
+            text=(
+                f"Indexing {p.sources_done}/{p.sources_total} PDFs: {p.pages} pages, "
+                f"{p.chunks_indexed} chunks searchable so far..."
+            ),
+        )
+
+    _progress()
+
+
+def with_script_run_ctx(fn):
+    """Let ``fn`` write to the page when it runs in a worker thread."""
+    if get_script_run_ctx is None:
+        return fn
+    ctx = get_script_run_ctx()
+
+    def _wrapped():
+        import threading
+
+        add_script_run_ctx(threading.current_thread(), ctx)
+        return fn()
+
+    return _wrapped
+
+
+def render_branch_notes(results):
+    """Mention tools-mode branches that timed out or failed."""
+    notes = []
+    for result in results.values():
+        if result.timed_out:
+            notes.append(f"{result.name} timed out after {result.elapsed:.0f}s")
+        elif result.error is not None:
+            notes.append(f"{result.name} failed: {result.error}")
+    if notes:
+        st.caption("Answered without: " + "; ".join(notes))
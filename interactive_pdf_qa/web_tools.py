@@ -0,0 +1,221 @@
+"""External tool layer for the web agent: pluggable backends, disk cache, parallel fan-out.
+
+Each source (Wikipedia, Arxiv, web search) is a ``ToolBackend``. Results are cached on
+disk per (tool, normalized query) with a TTL, so repeated or popular questions skip
+network latency. ``fan_out`` queries every source at once, and the agent gets an
+``all_sources`` tool that does that in a single step instead of several ReAct turns.
+Set ``PDFQA_TOOL_BACKEND=offline`` to use local stand-ins (JSON files) for testing.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from contextlib import suppress
+from contextvars import copy_context
+from pathlib import Path
+from typing import Callable, Dict, List, Mapping, Optional, Sequence
+
+from langchain.tools import Tool
+
+from .config import (
+    TOOL_BACKEND,
+    TOOL_CACHE_DIR,
+    TOOL_CACHE_TTL_SECONDS,
+    TOOL_FANOUT_TIMEOUT_SECONDS,
+    TOOL_OFFLINE_DIR,
+)
+from .tracing import span
+
+
+def normalize_query(query: str) -> str:
+    return re.sub(r"\s+", " ", query).strip().lower()
+
+
+class ToolBackend(ABC):
+    """One external source, queried with free text."""
+
+    name: str = "tool"
+    description: str = ""
+
+    @abstractmethod
+    def run(self, query: str) -> str:
+        """The source's result for ``query`` as text."""
+
+
+class FunctionBackend(ToolBackend):
+    """Backend around any ``query -> str`` callable (e.g. a LangChain tool's ``run``)."""
+
+    def __init__(self, name: str, description: str, func: Callable[[str], str]):
+        self.name = name
+        self.description = description
+        self._func = func
+
+    def run(self, query: str) -> str:
+        return self._func(query)
+
+
+class OfflineBackend(ToolBackend):
+    """Local stand-in answering from ``<directory>/<name>.json`` ({query: result})."""
+
+    def __init__(self, name: str, description: str, directory: Optional[str] = TOOL_OFFLINE_DIR):
+        self.name = name
+        self.description = description
+        self._answers: Dict[str, str] = {}
+        path = Path(directory) / f"{name}.json" if directory else None
+        if path is not None and path.exists():
+            data = json.loads(path.read_text())
+            self._answers = {normalize_query(q): str(a) for q, a in data.items()}
+
+    def run(self, query: str) -> str:
+        return self._answers.get(normalize_query(query), f"No {self.name} results for: {query}")
+
+
+class ToolResultCache:
+    """On-disk TTL cache of tool results, one JSON file per (tool, query)."""
+
+    def __init__(self, directory: str = TOOL_CACHE_DIR, ttl_seconds: float = TOOL_CACHE_TTL_SECONDS):
+        self.directory = Path(directory)
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, tool: str, query: str) -> Path:
+        digest = hashlib.sha256(f"{tool}\x00{normalize_query(query)}".encode("utf-8")).hexdigest()
+        return self.directory / re.sub(r"[^A-Za-z0-9_.-]+", "_", tool) / f"{digest}.json"
+
+    def get(self, tool: str, query: str) -> Optional[str]:
+        path = self._path(tool, query)
+        try:
+            entry = json.loads(path.read_text())
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        if time.time() - entry.get("created", 0) > self.ttl_seconds:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry.get("result")
+
+    def put(self, tool: str, query: str, result: str) -> None:
+        path = self._path(tool, query)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # A unique temp file per write: fan_out threads may cache the same key at once
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{path.stem[:12]}-", suffix=".tmp", dir=path.parent)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                json.dump({"created": time.time(), "query": query, "result": result}, fh)
+            os.replace(tmp_path, path)
+        except BaseException:
+            with suppress(OSError):
+                os.unlink(tmp_path)
+            raise
+
+
+class CachedBackend(ToolBackend):
+    """Serves a backend's results from a ``ToolResultCache`` when fresh."""
+
+    def __init__(self, backend: ToolBackend, cache: ToolResultCache):
+        self.backend = backend
+        self.cache = cache
+        self.name = backend.name
+        self.description = backend.description
+
+    def run(self, query: str) -> str:
+        with span(f"tool_backend.{self.name}") as s:
+            cached = self.cache.get(self.name, query)
+            s.set(cache_hit=cached is not None)
+            if cached is not None:
+                return cached
+            result = self.backend.run(query)
+            self.cache.put(self.name, query, result)
+            return result
+
+
+def fan_out(
+    backends: Sequence[ToolBackend],
+    query: str,
+    timeout: float = TOOL_FANOUT_TIMEOUT_SECONDS,
+) -> Dict[str, str]:
+    """Query all backends in parallel; slow or failing sources are left out."""
+    results: Dict[str, str] = {}
+    pool = ThreadPoolExecutor(max_workers=max(1, len(backends)), thread_name_prefix="pdfqa-tool")
+    try:
+        # Each backend runs in a copy of this context, so its span joins the open trace
+        futures = {b.name: pool.submit(copy_context().run, b.run, query) for b in backends}
+        deadline = time.perf_counter() + timeout
+        for name, future in futures.items():
+            try:
+                results[name] = future.result(timeout=max(0.0, deadline - time.perf_counter()))
+            except FutureTimeoutError:
+                future.cancel()
+            except Exception:  # one broken source should not sink the others
+                pass
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    return results
+
+
+def _live_backends() -> List[ToolBackend]:
+    from langchain_community.tools import ArxivQueryRun, DuckDuckGoSearchRun, WikipediaQueryRun
+    from langchain_community.utilities import ArxivAPIWrapper, WikipediaAPIWrapper
+
+    wiki = WikipediaQueryRun(
+        api_wrapper=WikipediaAPIWrapper(top_k_results=1, doc_content_chars_max=250)
+    )
+    arxiv = ArxivQueryRun(
+        api_wrapper=ArxivAPIWrapper(top_k_results=1, doc_content_chars_max=250)
+    )
+    search = DuckDuckGoSearchRun(name="Search")
+    return [FunctionBackend(t.name, t.description, t.run) for t in (wiki, arxiv, search)]
+
+
+def _offline_backends() -> List[ToolBackend]:
+    return [
+        OfflineBackend("wikipedia", "Offline stand-in for Wikipedia lookups."),
+        OfflineBackend("arxiv", "Offline stand-in for Arxiv paper search."),
+        OfflineBackend("Search", "Offline stand-in for web search."),
+    ]
+
+
+BACKEND_FACTORIES: Mapping[str, Callable[[], List[ToolBackend]]] = {
+    "live": _live_backends,
+    "offline": _offline_backends,
+}
+
+
+def build_backends(
+    mode: str = TOOL_BACKEND, cache: Optional[ToolResultCache] = None
+) -> List[ToolBackend]:
+    """Create the external backends for ``mode``, wrapped in the result cache."""
+    try:
+        factory = BACKEND_FACTORIES[mode]
+    except KeyError:
+        raise ValueError(f"Unknown tool backend {mode!r}; expected one of {sorted(BACKEND_FACTORIES)}")
+    cache = cache or ToolResultCache()
+    return [CachedBackend(b, cache) for b in factory()]
+
+
+def as_langchain_tools(backends: Sequence[ToolBackend]) -> List[Tool]:
+    """Agent tools: one ``all_sources`` fan-out tool plus each backend on its own."""
+
+    def _all_sources(query: str) -> str:
+        results = fan_out(backends, query)
+        if not results:
+            return "No results from external sources."
+        return "\n\n".join(f"[{name}] {text}" for name, text in results.items())
+
+    fan_out_tool = Tool(
+        name="all_sources",
+        description=(
+            "Search Wikipedia, Arxiv and the web at once. Prefer this over the individual "
+            "sources for general questions; input is a search query."
+        ),
+        func=_all_sources,
+    )
+    return [fan_out_tool] + [Tool(name=b.name, description=b.description, func=b.run) for b in backends]
@@ -0,0 +1,42 @@
+import pytest
+
+from interactive_pdf_qa import chunking
+from interactive_pdf_qa.chunking import LayoutChunker, chunk_pages
+
+
+def _page(i: int) -> str:
+    rows = "\n".join(f"PX-{i}{r}   valve   {r * 3} Nm" for r in range(4))
+    body = " ".join(f"Sentence {s} on page {i} covers the seal and the bearing." for s in range(8))
+    return f"{i}. Maintenance step {i}\n\n{body}\n\nPart   Item   Torque\n{rows}\n"
+
+
+@pytest.fixture
+def pool_calls(monkeypatch):
+    calls = []
+    get_pool = chunking.get_pool
+
+    def counting_get_pool(workers):
+        calls.append(workers)
+        return get_pool(workers)
+
+    monkeypatch.setattr(chunking, "get_pool", counting_get_pool)
+    return calls
+
+
+def test_parallel_chunks_match_serial(pool_calls):
+    texts = [_page(i) for i in range(7)]
+    chunker = LayoutChunker(max_tokens=40, overlap_tokens=5)
+
+    serial = chunk_pages(texts, chunker, workers=1)
+    parallel = chunk_pages(texts, chunker, workers=2, pages_per_task=3, min_parallel_pages=1)
+
+    assert pool_calls == [2]
+    assert parallel == serial
+    assert len(serial) == len(texts)
+    assert all(len(chunks) > 1 for chunks in serial)
+
+
+def test_small_inputs_stay_serial(pool_calls):
+    chunker = LayoutChunker(max_tokens=40, overlap_tokens=5)
+    chunk_pages([_page(0), _page(1)], chunker, workers=2, min_parallel_pages=3)
+    assert pool_calls == []
@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from interactive_pdf_qa.embedding_cache import CachedEmbeddings, EmbeddingCache, text_key
+
+
+def _vec(value: float, dim: int = 4) -> list:
+    return [value] * dim
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "test/model", max_entries=3)
+    yield cache
+    cache.close()
+
+
+def test_least_recently_used_entry_is_evicted(cache):
+    cache.put_many(["a", "b", "c"], [_vec(1), _vec(2), _vec(3)])
+    cache.get_many(["a"])  # a is now more recent than b
+    cache.put_many(["d"], [_vec(4)])
+
+    assert len(cache) == 3
+    a, b, c, d = cache.get_many(["a", "b", "c", "d"])
+    assert b is None
+    np.testing.assert_array_equal(a, _vec(1))
+    np.testing.assert_array_equal(c, _vec(3))
+    np.testing.assert_array_equal(d, _vec(4))
+
+
+def test_evicted_slots_are_reused(cache, tmp_path):
+    for i in range(10):
+        cache.put_many([f"k{i}"], [_vec(i)])
+    assert len(cache) == 3
+    [vectors] = (tmp_path / "test_model").glob("vectors.*.f32")
+    # The file never grows past max_entries rows
+    assert vectors.stat().st_size <= 3 * 4 * np.dtype(np.float32).itemsize
+    np.testing.assert_array_equal(cache.get_many(["k9"])[0], _vec(9))
+
+
+def test_cache_reopens_with_its_entries(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "test/model", max_entries=10)
+    cache.put_many(["a", "b"], [_vec(1), _vec(2)])
+    cache.flush()
+    cache.close()
+
+    reopened = EmbeddingCache(str(tmp_path), "test/model", max_entries=10)
+    a, b, missing = reopened.get_many(["a", "b", "missing"])
+    np.testing.assert_array_equal(a, _vec(1))
+    np.testing.assert_array_equal(b, _vec(2))
+    assert missing is None
+    reopened.close()
+
+
+def test_dimension_change_starts_a_new_generation(cache, tmp_path):
+    cache.put_many(["a"], [_vec(1, dim=4)])
+    cache.put_many(["b"], [_vec(2, dim=8)])
+
+    assert cache.get_many(["a"]) == [None]
+    np.testing.assert_array_equal(cache.get_many(["b"])[0], _vec(2, dim=8))
+    # The old file is unlinked, never truncated under other processes' maps
+    assert len(list((tmp_path / "test_model").glob("vectors.*.f32"))) == 1
+
+
+class _CountingEmbeddings:
+    def __init__(self):
+        self.calls = []
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        return [_vec(len(t)) for t in texts]
+
+    def embed_query(self, text):
+        return _vec(len(text))
+
+
+def test_cached_embeddings_embed_each_text_once(cache):
+    inner = _CountingEmbeddings()
+    embeddings = CachedEmbeddings(inner, cache)
+
+    first = embeddings.embed_documents(["x", "yy", "x"])
+    second = embeddings.embed_documents(["yy", "x"])
+
+    assert inner.calls == [["x", "yy"]]
+    assert first == [_vec(1), _vec(2), _vec(1)]
+    assert second == [_vec(2), _vec(1)]
+    assert (embeddings.hits, embeddings.misses) == (2, 3)
+    assert cache.get_many([text_key("yy")])[0] is not None
@@ -0,0 +1,57 @@
+import io
+import json
+import threading
+import time
+
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from benchmarks.synthetic_pdf import make_corpus
+from interactive_pdf_qa.fake_llm import FakeChatModel
+from interactive_pdf_qa.headless import HeadlessQA, run_batch
+from interactive_pdf_qa.history_store import open_history_store
+
+
+@pytest.fixture
+def qa(tmp_path):
+    qa = HeadlessQA(
+        FakeChatModel(),
+        embeddings=DeterministicFakeEmbedding(size=32),
+        history_store=open_history_store("memory"),
+        concurrency=4,
+    )
+    make_corpus(str(tmp_path / "pdfs"), 1, 2)
+    qa.index_folder(str(tmp_path / "pdfs"))
+    return qa
+
+
+def test_run_batch_keeps_session_turns_in_order(qa):
+    questions = [
+        {"id": n, "session_id": f"s{n % 2}" if n % 3 else None, "question": f"question {n} about the pump"}
+        for n in range(12)
+    ]
+    finished = []
+    lock = threading.Lock()
+    ask = qa.ask
+
+    def slow_ask(question, session_id=None, id=None):
+        # Earlier turns take longer, so a later turn would overtake them if started early
+        time.sleep(0.01 * (12 - id))
+        result = ask(question, session_id, id)
+        with lock:
+            finished.append((session_id, id))
+        return result
+
+    qa.ask = slow_ask
+    out = io.StringIO()
+    summary = run_batch(qa, questions, out)
+
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [r["id"] for r in records] == list(range(12))
+    assert summary.questions == 12 and summary.errors == 0
+    for session in ("s0", "s1"):
+        turns = [q["id"] for q in questions if q["session_id"] == session]
+        assert [n for s, n in finished if s == session] == turns
+        history = qa.history_store.get(session).messages
+        asked = [m.content for m in history if m.type == "human"]
+        assert asked == [f"question {n} about the pump" for n in turns]
@@ -0,0 +1,44 @@
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from interactive_pdf_qa.history_store import open_history_store
+
+
+@pytest.fixture(params=["sqlite", "memory"])
+def store(request, tmp_path):
+    kwargs = {"path": str(tmp_path / "history.sqlite3")} if request.param == "sqlite" else {}
+    store = open_history_store(request.param, max_messages=4, window=3, **kwargs)
+    yield store
+    store.close()
+
+
+def test_sessions_stay_separate(store):
+    alice, bob = store.get("alice"), store.get("bob")
+    alice.add_messages([HumanMessage("alice asks"), AIMessage("alice answer")])
+    bob.add_messages([HumanMessage("bob asks")])
+
+    assert [m.content for m in store.get("alice").messages] == ["alice asks", "alice answer"]
+    assert [m.content for m in store.get("bob").messages] == ["bob asks"]
+
+    store.get("bob").clear()
+    assert store.get("bob").messages == []
+    assert len(store.get("alice").messages) == 2
+
+
+def test_history_is_capped_and_windowed(store):
+    history = store.get("s")
+    history.add_messages([HumanMessage(str(i)) for i in range(6)])
+    # max_messages=4 keeps 2..5; window=3 reads the newest three
+    assert [m.content for m in history.messages] == ["3", "4", "5"]
+
+
+def test_sqlite_history_persists_across_reopen(tmp_path):
+    path = str(tmp_path / "history.sqlite3")
+    store = open_history_store("sqlite", path=path)
+    store.get("s").add_messages([HumanMessage("kept")])
+    store.close()
+
+    reopened = open_history_store("sqlite", path=path)
+    assert [m.content for m in reopened.get("s").messages] == ["kept"]
+    assert reopened.get("other").messages == []
+    reopened.close()
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from interactive_pdf_qa import ann_index
+from interactive_pdf_qa.ann_index import INDEX_TYPES
+from interactive_pdf_qa.index_manager import IndexManager
+from interactive_pdf_qa.metadata_index import ChunkFilter
+
+DIM = 48
+
+
+@pytest.fixture(params=INDEX_TYPES)
+def kind(request, monkeypatch):
+    if request.param == "ivfpq":
+        # 4-bit codes need 16x fewer training vectors than 8-bit ones; keeps the test fast
+        monkeypatch.setattr(ann_index, "PQ_NBITS", 4)
+        monkeypatch.setitem(ann_index._MIN_TRAIN_VECTORS, "ivfpq", 39 * 2 ** 4)
+    return request.param
+
+
+def _add(manager: IndexManager, key: str, vectors: np.ndarray, start: int) -> None:
+    texts = [f"{key} chunk {start + i}" for i in range(len(vectors))]
+    metadatas = [{"source": f"{key}.pdf", "page": i % 5} for i in range(len(vectors))]
+    manager.add_embeddings(key, texts, vectors, metadatas)
+
+
+def test_add_search_remove(kind):
+    n = 800 if kind == "ivfpq" else 200
+    vectors = np.random.default_rng(0).standard_normal((n, DIM)).astype(np.float32)
+    half = n // 2
+    manager = IndexManager(DeterministicFakeEmbedding(size=DIM), index_type=kind)
+    _add(manager, "a", vectors[:half], 0)
+    _add(manager, "b", vectors[half:], half)
+
+    assert manager.index_spec.kind == kind
+    assert manager.sources == ["a", "b"]
+    assert manager.num_vectors == n
+    for i in range(0, n, 20):
+        [top] = manager.search("ignored", k=1, query_vector=vectors[i])
+        assert top.page_content.endswith(f"chunk {i}")
+
+    version = manager.version
+    assert manager.remove_source("a") == half
+    assert manager.version > version
+    assert manager.sources == ["b"]
+    assert manager.num_vectors == n - half
+    results = manager.search("ignored", k=5, query_vector=vectors[0])
+    assert len(results) == 5
+    assert all(d.metadata["source"] == "b.pdf" for d in results)
+    assert manager.remove_source("a") == 0
+
+
+def test_search_filters_by_metadata(kind):
+    n = 800 if kind == "ivfpq" else 200
+    vectors = np.random.default_rng(1).standard_normal((n, DIM)).astype(np.float32)
+    manager = IndexManager(DeterministicFakeEmbedding(size=DIM), index_type=kind)
+    _add(manager, "a", vectors[: n // 2], 0)
+    _add(manager, "b", vectors[n // 2 :], n // 2)
+
+    results = manager.search(
+        "ignored", k=4, where=ChunkFilter(sources=("b.pdf",), pages=(2, 2)), query_vector=vectors[0]
+    )
+    assert len(results) == 4
+    assert all(d.metadata == {"source": "b.pdf", "page": 2} for d in results)
+
+
+def test_empty_source_is_recorded():
+    manager = IndexManager(DeterministicFakeEmbedding(size=DIM))
+    assert manager.add_source("empty", []) == 0
+    assert manager.has_source("empty")
+    assert manager.search("anything") == []
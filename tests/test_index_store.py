@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from interactive_pdf_qa import index_store
+from interactive_pdf_qa.index_manager import IndexManager
+from interactive_pdf_qa.index_store import IndexStore, default_namespace
+
+DIM = 16
+
+
+@pytest.fixture
+def embeddings():
+    return DeterministicFakeEmbedding(size=DIM)
+
+
+def _chunks(n: int, source: str = "doc.pdf"):
+    texts = [f"chunk {i} of {source}" for i in range(n)]
+    metadatas = [{"source": source, "page": i} for i in range(n)]
+    return texts, metadatas
+
+
+def test_save_and_load_round_trip(tmp_path, embeddings):
+    store = IndexStore(str(tmp_path), namespace="ns")
+    texts, metadatas = _chunks(5)
+    vectors = embeddings.embed_documents(texts)
+    store.save("key", texts, vectors, metadatas, embeddings)
+
+    assert store.has("key")
+    assert store.keys() == ["key"]
+    loaded = store.load("key", embeddings)
+    assert loaded.index.ntotal == 5
+    np.testing.assert_allclose(loaded.index.reconstruct_n(0, 5), np.asarray(vectors, dtype=np.float32))
+    docs = [loaded.docstore.search(loaded.index_to_docstore_id[i]) for i in range(5)]
+    assert [d.page_content for d in docs] == texts
+    assert [d.metadata for d in docs] == metadatas
+
+
+def test_writer_writes_nothing_until_commit(tmp_path, embeddings):
+    store = IndexStore(str(tmp_path), namespace="ns")
+    writer = store.writer("key", embeddings)
+    for texts, metadatas in (_chunks(3), _chunks(2, "other.pdf")):
+        writer.add(texts, embeddings.embed_documents(texts), metadatas)
+        assert not store.has("key")
+    writer.commit()
+
+    assert writer.count == 5
+    assert store.load("key", embeddings).index.ntotal == 5
+
+
+def test_missing_key_loads_as_none(tmp_path, embeddings):
+    store = IndexStore(str(tmp_path), namespace="ns")
+    assert store.load("missing", embeddings) is None
+    assert store.keys() == []
+
+
+def test_stored_source_attaches_to_a_manager(tmp_path, embeddings):
+    store = IndexStore(str(tmp_path), namespace="ns")
+    texts, metadatas = _chunks(4)
+    store.save("key", texts, embeddings.embed_documents(texts), metadatas, embeddings)
+
+    manager = IndexManager(embeddings, store=store)
+    assert manager.attach_stored("key")
+    assert not manager.attach_stored("missing")
+    assert manager.sources == ["key"]
+    assert manager.search(texts[2], k=1)[0].page_content == texts[2]
+
+
+def test_namespace_changes_with_model_and_chunking(tmp_path, monkeypatch, embeddings):
+    monkeypatch.setattr(index_store, "CHUNKING", "layout")
+    namespace = default_namespace("model-a")
+    assert default_namespace("model-b") != namespace
+    monkeypatch.setattr(index_store, "CHUNK_TOKENS", index_store.CHUNK_TOKENS + 1)
+    assert default_namespace("model-a") != namespace
+
+    # A store under another namespace does not see the old indexes
+    texts, metadatas = _chunks(2)
+    IndexStore(str(tmp_path), namespace=namespace).save(
+        "key", texts, embeddings.embed_documents(texts), metadatas, embeddings
+    )
+    assert not IndexStore(str(tmp_path), namespace=default_namespace("model-a")).has("key")
+    assert not IndexStore(str(tmp_path), namespace=default_namespace("model-b")).has("key")
+    assert IndexStore(str(tmp_path), namespace=namespace).has("key")
@@ -0,0 +1,87 @@
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from interactive_pdf_qa.index_manager import IndexManager
+from interactive_pdf_qa.index_store import IndexStore
+from interactive_pdf_qa.ingest import StreamingIngestor
+
+DIM = 16
+
+
+def _pages(source: str, n: int):
+    return [
+        Document(
+            page_content=f"Section {i}\n\nPage {i} of {source} describes the pump valve and seal.",
+            metadata={"source": source, "page": i},
+        )
+        for i in range(n)
+    ]
+
+
+class _FailingEmbeddings(DeterministicFakeEmbedding):
+    """Raises once it is asked to embed a chunk of ``fail_on``."""
+
+    fail_on: str = ""
+
+    def embed_documents(self, texts):
+        if any(self.fail_on in t for t in texts):
+            raise RuntimeError("embedding backend down")
+        return super().embed_documents(texts)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return IndexStore(str(tmp_path), namespace="ns")
+
+
+def _source_docs(manager: IndexManager, source: str):
+    store = manager.vectorstore
+    docs = (store.docstore.search(doc_id) for doc_id in store.index_to_docstore_id.values())
+    return [d for d in docs if d.metadata["source"] == source]
+
+
+def test_sources_are_indexed_and_saved(store):
+    manager = IndexManager(DeterministicFakeEmbedding(size=DIM), store=store)
+    ingestor = StreamingIngestor(manager, batch_size=2, split_window=3)
+    diff = ingestor.run({"a": lambda: _pages("a.pdf", 4), "b": lambda: _pages("b.pdf", 5)})
+
+    assert diff.added == ("a", "b")
+    assert manager.sources == ["a", "b"]
+    assert len(_source_docs(manager, "b.pdf")) == len(manager._source_ids["b"]) > 0
+    assert store.keys() == ["a", "b"]
+    assert ingestor.progress.done and ingestor.progress.pages == 9
+    assert ingestor.progress.sources_done == 2
+
+
+def test_embed_failure_rolls_back_the_current_source(store):
+    # b's later pages fail after its first batches were already indexed
+    embeddings = _FailingEmbeddings(size=DIM, fail_on="Page 3 of b.pdf")
+    manager = IndexManager(embeddings, store=store)
+    with pytest.raises(RuntimeError, match="embedding backend down"):
+        StreamingIngestor(manager, batch_size=1, split_window=1).run(
+            {"a": lambda: _pages("a.pdf", 2), "b": lambda: _pages("b.pdf", 5)}
+        )
+
+    assert manager.sources == ["a"]
+    assert _source_docs(manager, "b.pdf") == []
+    assert manager.num_vectors == len(manager._source_ids["a"])
+    assert store.keys() == ["a"]
+
+
+def test_parse_failure_rolls_back_the_current_source(store):
+    def broken_pages():
+        yield from _pages("b.pdf", 3)
+        raise OSError("truncated PDF")
+
+    manager = IndexManager(DeterministicFakeEmbedding(size=DIM), store=store)
+    with pytest.raises(OSError, match="truncated PDF"):
+        StreamingIngestor(manager, batch_size=1, split_window=1).run(
+            {"a": lambda: _pages("a.pdf", 2), "b": broken_pages}
+        )
+
+    # Parsing runs ahead, so a may have been cancelled too; only complete sources remain
+    assert "b" not in manager.sources
+    assert manager.vectorstore is None or _source_docs(manager, "b.pdf") == []
+    assert store.keys() == manager.sources
+    assert manager.num_vectors == sum(len(manager._source_ids[key]) for key in manager.sources)
@@ -0,0 +1,45 @@
+import pytest
+
+from interactive_pdf_qa import web_tools
+from interactive_pdf_qa.web_tools import CachedBackend, FunctionBackend, ToolResultCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(web_tools.time, "time", lambda: now[0])
+    return now
+
+
+def test_entries_expire_after_ttl(tmp_path, clock):
+    cache = ToolResultCache(str(tmp_path), ttl_seconds=60)
+    cache.put("search", "Pump  Torque", "result")
+
+    clock[0] += 60
+    assert cache.get("search", "pump torque") == "result"
+    clock[0] += 1
+    assert cache.get("search", "pump torque") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_entries_are_per_tool(tmp_path, clock):
+    cache = ToolResultCache(str(tmp_path), ttl_seconds=60)
+    cache.put("search", "query", "from search")
+    assert cache.get("wiki", "query") is None
+    assert cache.get("search", "query") == "from search"
+
+
+def test_cached_backend_refetches_expired_results(tmp_path, clock):
+    calls = []
+    backend = CachedBackend(
+        FunctionBackend("search", "test", lambda q: calls.append(q) or f"answer {len(calls)}"),
+        ToolResultCache(str(tmp_path), ttl_seconds=60),
+    )
+
+    assert backend.run("query") == "answer 1"
+    assert backend.run("QUERY ") == "answer 1"
+    clock[0] += 61
+    assert backend.run("query") == "answer 2"
+    assert calls == ["query", "query"]
+    # Nothing but the cached entries is left in the directory
+    assert [p.suffix for p in tmp_path.rglob("*") if p.is_file()] == [".json"]